@@ -42,5 +42,22 @@ class Application(models.Model):
     )
     comment = models.TextField(max_length=1500, null=True, blank=False)
 
+    _loaded_status = None
+
     def __str__(self) -> str:
         return self.short_name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.status
+        return instance
+
+    def save(self, *args, **kwargs):
+        from head.counters import PENDING_APPLICATIONS, increment
+
+        pending = self.status == "moderation"
+        was_pending = self._loaded_status == "moderation"
+        super().save(*args, **kwargs)
+        increment({PENDING_APPLICATIONS: pending - was_pending})
+        self._loaded_status = self.status
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from attributes.models import AttributeValue, normalize_value
+
+
+class Command(BaseCommand):
+    help = "Fill normalized values and products of attribute values"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of attribute values updated per query",
+        )
+
+    def handle(self, *args, **options):
+        last_pk = 0
+        updated = 0
+        while True:
+            rows = list(
+                AttributeValue.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "value", "product_variant__product")[
+                    : options["chunk_size"]
+                ]
+            )
+            if not rows:
+                break
+            AttributeValue.objects.bulk_update(
+                [
+                    AttributeValue(
+                        pk=pk,
+                        normalized_value=normalize_value(value),
+                        product_id=product,
+                    )
+                    for pk, value, product in rows
+                ],
+                ["normalized_value", "product"],
+            )
+            last_pk = rows[-1][0]
+            updated += len(rows)
+        self.stdout.write(f"Attribute index rebuilt, {updated} values")
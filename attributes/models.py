@@ -1,6 +1,13 @@
 from django.db import models
 
 
+def normalize_value(value):
+    """
+    Normalized attribute value used by filters and facets
+    """
+    return " ".join(value.split()).casefold()
+
+
 class Attribute(models.Model):
     """
     Product attribute model
@@ -33,11 +40,31 @@ class AttributeValue(models.Model):
         related_name="values",
     )
     value = models.CharField(max_length=100, verbose_name="Attribute value")
+    # index columns of attribute filters, see products.filters
+    normalized_value = models.CharField(max_length=100, default="", editable=False)
+    product = models.ForeignKey(
+        "products.Product",
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        editable=False,
+    )
 
     def __str__(self):
         return f"{self.value}"
 
+    def save(self, *args, **kwargs):
+        self.normalized_value = normalize_value(self.value)
+        self.product_id = self.product_variant.product_id
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["value"]
         verbose_name = "Product attribute value"
         verbose_name_plural = "Product attribute values"
+        indexes = [
+            models.Index(
+                fields=["attribute", "normalized_value", "product"],
+                name="attribute_value_lookup_idx",
+            )
+        ]
@@ -0,0 +1,366 @@
+"""
+Endpoint benchmarks
+Requests endpoints against data of current database through Django test
+client or a running server, records latency percentiles, throughput, query
+count and peak memory, and compares results with a stored baseline
+"""
+import json
+import logging
+import math
+import re
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.models import Order
+from products.models import ProductVariant
+from users.models import Address, Customer
+
+ADMIN_EMAIL = "benchmark-admin@example.com"
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+# requests measured with tracemalloc, tracing slows requests down
+MEMORY_SAMPLES = 5
+
+
+class Endpoint:
+    """
+    Benchmarked request, path and data are formatted with a sample of
+    product, variant, address and search word
+    user is customer, admin or None for anonymous requests
+    """
+
+    def __init__(self, name, path, method="GET", user="customer", data=None):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.user = user
+        self.data = data
+
+    def get_request(self, sample):
+        data = None
+        if self.data is not None:
+            data = {
+                key: value.format(**sample) if isinstance(value, str) else value
+                for key, value in self.data.items()
+            }
+        return self.method, self.path.format(**sample), data
+
+
+ENDPOINTS = [
+    Endpoint("products", "/api/shops/products/"),
+    Endpoint("products-anonymous", "/api/shops/products/", user=None),
+    Endpoint("products-search", "/api/shops/products/?search={word}"),
+    Endpoint("product-detail", "/api/shops/products/{product}/"),
+    Endpoint(
+        "buy",
+        "/api/shops/products/{product}/buy/",
+        method="POST",
+        data={"product_variant": "{variant}", "quantity": 1, "address": "{address}"},
+    ),
+    Endpoint("orders", "/api/orders/"),
+    Endpoint("admin-products", "/api/admin/products/", user="admin"),
+    Endpoint("admin-orders", "/api/admin/orders/", user="admin"),
+    Endpoint("admin-shops", "/api/admin/shops/", user="admin"),
+    Endpoint("admin-users", "/api/admin/users/", user="admin"),
+]
+
+
+class ClientTransport:
+    """
+    Send requests through Django test client in this process
+    """
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def send(self, method, path, data, token):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(data) if data is not None else "",
+            content_type="application/json",
+            **headers,
+        )
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+
+class HttpTransport:
+    """
+    Send requests to a running server, e.g. local gunicorn
+    Query counts are read from Server-Timing header of sampled requests
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def send(self, method, path, data, token):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else None,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code, error.headers.get("Server-Timing", "")
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of values
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def get_samples(size, requests):
+    """
+    Return tokens of benchmark users and samples of rows to request
+    Customer with most orders buys variants with enough stock for all requests
+    """
+    customer_id = (
+        Order.objects.order_by()
+        .values("user")
+        .annotate(count=Count("pk"))
+        .order_by("-count")
+        .values_list("user", flat=True)
+        .first()
+    )
+    address = Address.objects.filter(user=customer_id).first()
+    if address is None:
+        address = Address.objects.order_by("pk").first()
+    variants = list(
+        ProductVariant.objects.filter(stock__gte=math.ceil(requests / size) + 1)
+        .order_by("pk")
+        .values_list("product", "pk", "product__name")[:size]
+    )
+    if address is None or not variants:
+        return None, []
+
+    admin, _ = Customer.objects.get_or_create(
+        email=ADMIN_EMAIL, defaults={"is_staff": True, "is_superuser": True}
+    )
+    tokens = {
+        None: None,
+        "customer": str(AccessToken.for_user(address.user)),
+        "admin": str(AccessToken.for_user(admin)),
+    }
+    samples = [
+        {
+            "product": product,
+            "variant": variant,
+            "address": address.pk,
+            "word": (re.findall(r"[^\W\d_]+", name) or [name])[-1],
+        }
+        for product, variant, name in variants
+    ]
+    return tokens, samples
+
+
+def get_queries(server_timing):
+    match = QUERIES_PATTERN.search(server_timing)
+    return int(match.group(1)) if match else None
+
+
+def measure_endpoint(endpoint, transport, token, samples, requests, concurrency):
+    """
+    Send requests of endpoint, return its results
+    """
+    requests_list = [
+        endpoint.get_request(samples[index % len(samples)]) for index in range(requests)
+    ]
+
+    def send(request):
+        start = time.perf_counter()
+        status, server_timing = transport.send(*request, token)
+        return time.perf_counter() - start, status, get_queries(server_timing)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as executor:
+            timings = list(executor.map(send, requests_list))
+    else:
+        timings = [send(request) for request in requests_list]
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency * 1000 for latency, _, _ in timings]
+    queries = [count for _, _, count in timings if count is not None]
+    return {
+        "method": endpoint.method,
+        "path": endpoint.path,
+        "requests": requests,
+        "errors": sum(status >= 400 for _, status, _ in timings),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / requests, 2),
+        "throughput_rps": round(requests / elapsed, 1),
+        "queries": max(queries) if queries else None,
+        "peak_memory_kb": None,
+    }
+
+
+def measure_memory(endpoint, transport, token, samples):
+    """
+    Highest traced allocation peak of a few requests, in kilobytes
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    peak = 0
+    try:
+        for sample in samples[:MEMORY_SAMPLES]:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            transport.send(*endpoint.get_request(sample), token)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if started:
+            tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+@contextmanager
+def quiet_instrumentation_log():
+    """
+    Every in-process request is sampled for its query count, log lines of
+    the samples would flood the output
+    """
+    logger = logging.getLogger("common.instrumentation")
+    disabled, logger.disabled = logger.disabled, True
+    try:
+        yield
+    finally:
+        logger.disabled = disabled
+
+
+def measure_endpoints(endpoints, transport, options):
+    tokens, samples = get_samples(
+        options["sample_size"],
+        options["requests"] + options["warmup"] + MEMORY_SAMPLES,
+    )
+    if not samples:
+        return None
+    results = {}
+    for endpoint in endpoints:
+        token = tokens[endpoint.user]
+        for sample in samples[: options["warmup"]]:
+            transport.send(*endpoint.get_request(sample), token)
+        results[endpoint.name] = measure_endpoint(
+            endpoint,
+            transport,
+            token,
+            samples,
+            options["requests"],
+            options["concurrency"],
+        )
+        if isinstance(transport, ClientTransport):
+            results[endpoint.name]["peak_memory_kb"] = measure_memory(
+                endpoint, transport, token, samples
+            )
+    return results
+
+
+def run_benchmarks(
+    endpoints=ENDPOINTS,
+    requests=100,
+    warmup=5,
+    base_url=None,
+    concurrency=1,
+    sample_size=100,
+):
+    """
+    Benchmark endpoints, return results with run metadata or None if
+    database has no data to request, see fill --scale
+    In-process runs are sequential in a transaction which is rolled back,
+    so orders created by buy are not kept
+    """
+    options = {
+        "requests": requests,
+        "warmup": warmup,
+        "concurrency": concurrency if base_url is not None else 1,
+        "sample_size": sample_size,
+    }
+    if base_url is None:
+        with transaction.atomic(), quiet_instrumentation_log():
+            with override_settings(INSTRUMENTATION_SAMPLE_RATE=1):
+                results = measure_endpoints(endpoints, ClientTransport(), options)
+            transaction.set_rollback(True)
+    else:
+        results = measure_endpoints(endpoints, HttpTransport(base_url), options)
+    if results is None:
+        return None
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "target": base_url or "client",
+            "database": connection.vendor,
+            **options,
+        },
+        "endpoints": results,
+    }
+
+
+COMPARED_META = ("database", "target", "requests")
+
+
+def compare(results, baseline, threshold=0.1, metric="p95_ms"):
+    """
+    Compare endpoints with baseline run
+    Endpoint regressed if metric grew by more than threshold, it made more
+    queries or had more errors, returns rows of endpoint name, baseline and
+    current metric, relative change and regression flag
+    Raises ValueError if runs used different database, target or number of
+    requests
+    """
+    differences = [
+        f"{key} {baseline['meta'].get(key)} != {results['meta'].get(key)}"
+        for key in COMPARED_META
+        if baseline["meta"].get(key) != results["meta"].get(key)
+    ]
+    if differences:
+        raise ValueError(f"Runs are not comparable: {', '.join(differences)}")
+
+    rows = []
+    for name, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            rows.append((name, None, current[metric], None, False))
+            continue
+        change = current[metric] / previous[metric] - 1 if previous[metric] else 0
+        more_queries = (
+            current["queries"] is not None
+            and previous["queries"] is not None
+            and current["queries"] > previous["queries"]
+        )
+        more_errors = current["errors"] > previous["errors"]
+        rows.append(
+            (
+                name,
+                previous[metric],
+                current[metric],
+                change,
+                change > threshold or more_queries or more_errors,
+            )
+        )
+    return rows
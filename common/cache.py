@@ -0,0 +1,196 @@
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .instrumentation import record_cache_access
+
+RESPONSE_KEY_PREFIX = "response"
+TAG_KEY_PREFIX = "tag"
+
+
+def make_tag(model, pk=None):
+    """
+    Tag of all model instances or of a single instance
+    """
+    label = model._meta.label_lower
+    if pk is None:
+        return label
+    return f"{label}:{pk}"
+
+
+def get_related_tags(instance, related_fields):
+    """
+    Tags of related instances
+    Ids are taken from foreign key columns, so no queries are made
+    """
+    tags = set()
+    for name in related_fields:
+        field = instance._meta.get_field(name)
+        pk = getattr(instance, field.attname)
+        if pk is not None:
+            tags.add(make_tag(field.related_model, pk))
+    return tags
+
+
+def get_tag_versions(tags):
+    """
+    Return current version of every tag, None for never invalidated tags
+    """
+    keys = {f"{TAG_KEY_PREFIX}:{tag}": tag for tag in tags}
+    versions = cache.get_many(list(keys))
+    return {tag: versions.get(key) for key, tag in keys.items()}
+
+
+def invalidate_tags(tags):
+    """
+    Drop cached entries tagged with any of tags
+    """
+    cache.set_many(
+        {f"{TAG_KEY_PREFIX}:{tag}": uuid.uuid4().hex for tag in tags}, timeout=None
+    )
+
+
+def get_instance_invalidation_tags(instance, related_paths=()):
+    """
+    Tags of instance, its model and instances on dotted attribute paths
+    """
+    tags = set()
+    for path in ("", *related_paths):
+        related = instance
+        for name in filter(None, path.split(".")):
+            related = getattr(related, name, None)
+        if related is not None:
+            tags.update({make_tag(type(related)), make_tag(type(related), related.pk)})
+    return tags
+
+
+def invalidate_instance(instance, related_paths=()):
+    invalidate_tags(get_instance_invalidation_tags(instance, related_paths))
+
+
+def get_cached(key):
+    """
+    Return cached value if none of its tags were invalidated after caching
+    """
+    entry = cache.get(key)
+    if entry is None or get_tag_versions(entry["tags"]) != entry["tags"]:
+        record_cache_access(False)
+        return None
+    record_cache_access(True)
+    return entry["value"]
+
+
+def set_cached(key, value, tags, timeout=None):
+    cache.set(
+        key,
+        {"value": value, "tags": get_tag_versions(tags)},
+        settings.CACHE_TTL if timeout is None else timeout,
+    )
+
+
+class CachedResponseBase:
+    """
+    Cache GET responses of anonymous users
+    Key is path, sorted query params and Accept header, list entries are
+    tagged with their model, retrieve entries with the instance, and both
+    with related instances, handlers add the tags to cache_tags
+    """
+
+    cache_related_fields: tuple = ()
+    cache_timeout = None
+
+    def retrieve_instance(self, request):
+        instance = self.get_object()
+        if instance is not None:
+            self.cache_tags.add(make_tag(type(instance), instance.pk))
+            self.cache_tags |= get_related_tags(instance, self.cache_related_fields)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        for instance in page or []:
+            self.cache_tags |= get_related_tags(instance, self.cache_related_fields)
+        return page
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = "|".join(
+            [request.path, urlencode(params), request.META.get("HTTP_ACCEPT", "")]
+        )
+        return f"{RESPONSE_KEY_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        self.cache_tags = set()
+        if request.method != "GET" or not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = get_cached(key)
+        if cached is not None:
+            return Response(cached["data"], status=cached["status"])
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_cached(
+                key,
+                {"data": response.data, "status": response.status_code},
+                self.cache_tags,
+                self.cache_timeout,
+            )
+        return response
+
+
+class CachedListMixin(CachedResponseBase):
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(self.list_instances, request, *args, **kwargs)
+
+    def list_instances(self, request, *args, **kwargs):
+        # any write of the model can change the list, created instances too
+        self.cache_tags.add(make_tag(self.get_queryset().model))
+        return super().list(request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseBase):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(self.retrieve_instance, request)
+
+
+class CachedResponseMixin(CachedListMixin, CachedRetrieveMixin):
+    """
+    Cache list and retrieve responses of anonymous users
+    Viewsets with one of the actions use CachedListMixin or CachedRetrieveMixin,
+    routers route every action viewset has
+    """
+
+
+class InvalidateCacheMixin:
+    """
+    Invalidate cached responses containing created, updated or deleted instance
+    cache_invalidate_related lists dotted paths to related instances to invalidate
+    """
+
+    cache_invalidate_related: tuple = ()
+
+    def invalidate_cache(self, instance):
+        invalidate_instance(instance, self.cache_invalidate_related)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_cache(serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_cache(serializer.instance)
+
+    def perform_destroy(self, instance):
+        tags = get_instance_invalidation_tags(instance, self.cache_invalidate_related)
+        super().perform_destroy(instance)
+        invalidate_tags(tags)
@@ -0,0 +1,158 @@
+import csv
+import json
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_DIRECTORY = "exports"
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+class Echo:
+    """
+    File-like object returning written value, lets csv.writer build single lines
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def iter_jsonl(rows, fields):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+WRITERS = {"csv": iter_csv, "jsonl": iter_jsonl}
+
+
+def get_export_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterate values of fields without building model instances
+    Rows are fetched in chunks, so memory doesn't depend on number of rows
+    """
+    return (
+        queryset.select_related(None)
+        .prefetch_related(None)
+        .values(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_export(queryset, fields, export_format):
+    return WRITERS[export_format](get_export_rows(queryset, fields), fields)
+
+
+def get_view_path(view):
+    return f"{type(view).__module__}.{type(view).__qualname__}"
+
+
+def load_view(view_path, params):
+    """
+    Rebuild export view in Celery task from its GET query parameters
+    params maps names to lists of values, as QueryDict.lists() returns
+    """
+    query = QueryDict(mutable=True)
+    for key, values in params.items():
+        query.setlist(key, values)
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = query
+    return import_string(view_path)(
+        request=Request(request),
+        action="export",
+        format_kwarg=None,
+        args=(),
+        kwargs={},
+    )
+
+
+def write_export(queryset, fields, export_format, name):
+    """
+    Write export to temporary file and save it to default storage
+    The file appears in storage only when it is complete
+    """
+    with tempfile.TemporaryFile("w+b") as file:
+        for line in iter_export(queryset, fields, export_format):
+            file.write(line.encode())
+        file.seek(0)
+        return default_storage.save(name, File(file))
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=list(WRITERS), default="csv")
+    background = serializers.BooleanField(default=False)
+
+
+class ExportJobSerializer(serializers.Serializer):
+    file = serializers.CharField()
+
+
+class ExportMixin:
+    """
+    Add export action streaming filtered list as CSV or JSON Lines
+    export_fields lists values() lookups of exported columns,
+    ?background=true writes the file to MEDIA_ROOT/exports in Celery task
+    """
+
+    export_fields: list = []
+
+    @extend_schema(
+        description="Export filtered list as CSV or JSON Lines",
+        parameters=[
+            OpenApiParameter("export_format", OpenApiTypes.STR, enum=list(WRITERS)),
+            OpenApiParameter("background", OpenApiTypes.BOOL),
+        ],
+        responses={
+            (200, "text/csv"): OpenApiTypes.BINARY,
+            (200, "application/x-ndjson"): OpenApiTypes.BINARY,
+            202: OpenApiResponse(ExportJobSerializer),
+        },
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request, *args, **kwargs):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        export_format = query.validated_data["export_format"]
+        queryset = self.filter_queryset(self.get_queryset())
+        name = f"{queryset.model._meta.model_name}-{uuid.uuid4().hex}.{export_format}"
+
+        if query.validated_data["background"]:
+            from common.tasks import export_queryset
+
+            path = f"{EXPORT_DIRECTORY}/{name}"
+            # filters are already validated by filter_queryset above
+            export_queryset.delay(
+                get_view_path(self),
+                dict(request.query_params.lists()),
+                export_format,
+                path,
+            )
+            return Response(
+                {"file": default_storage.url(path)}, status=status.HTTP_202_ACCEPTED
+            )
+
+        response = StreamingHttpResponse(
+            iter_export(queryset, self.export_fields, export_format),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{name}"'
+        return response
@@ -0,0 +1,375 @@
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from redis.exceptions import RedisError
+from rest_framework import renderers, serializers
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+ROUTE_METRICS_KEY = "instrumentation:routes"
+
+# metrics of current request, None when request is not sampled
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Measurements of one sampled request
+    Queries made while serializing are counted in both db and serializer time
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0.0
+        self.total_time = 0.0
+        self.serializing = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def get_server_timing(self):
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f"serializer;dur={self.serializer_time * 1000:.1f}",
+                f'cache;desc="{self.cache_hits} hits {self.cache_misses} misses"',
+                f"total;dur={self.total_time * 1000:.1f}",
+            ]
+        )
+
+
+def record_cache_access(hit):
+    """
+    Count cache hit or miss of current request
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def time_serializer_data(data):
+    """
+    Wrap serializer data property to add its time to current request
+    Nested serializers are timed once, by the outermost one
+    """
+    getter = data.fget
+
+    def timed_data(serializer):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return getter(serializer)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return getter(serializer)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    return property(timed_data)
+
+
+def install_serializer_timing():
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        serializer_class.data = time_serializer_data(serializer_class.data)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def get_index(self, value):
+        return bisect_left(self.buckets, value)
+
+    def observe(self, value):
+        self.counts[self.get_index(value)] += 1
+        self.sum += value
+
+    def copy(self):
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        return histogram
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RouteMetrics:
+    """
+    Histograms and counters of sampled requests per route and method
+    Kept in process memory, used when cache is not Redis,
+    see SharedRouteMetrics
+    """
+
+    HISTOGRAMS = {
+        "http_request_duration_seconds": "Total time of sampled requests",
+        "http_request_db_duration_seconds": "Database time of sampled requests",
+        "http_request_serializer_duration_seconds": "Serializer time of sampled requests",
+        "http_request_db_queries": "SQL queries of sampled requests",
+    }
+    COUNTERS = {
+        "http_request_cache_hits_total": "Cache hits of sampled requests",
+        "http_request_cache_misses_total": "Cache misses of sampled requests",
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def get_values(self, metrics):
+        return {
+            "http_request_duration_seconds": metrics.total_time,
+            "http_request_db_duration_seconds": metrics.db_time,
+            "http_request_serializer_duration_seconds": metrics.serializer_time,
+            "http_request_db_queries": metrics.queries,
+            "http_request_cache_hits_total": metrics.cache_hits,
+            "http_request_cache_misses_total": metrics.cache_misses,
+        }
+
+    def make_route(self):
+        duration_buckets = tuple(settings.INSTRUMENTATION_DURATION_BUCKETS)
+        histograms = {name: Histogram(duration_buckets) for name in self.HISTOGRAMS}
+        histograms["http_request_db_queries"] = Histogram(
+            tuple(settings.INSTRUMENTATION_QUERY_BUCKETS)
+        )
+        return {"histograms": histograms, "counters": dict.fromkeys(self.COUNTERS, 0)}
+
+    def observe(self, method, route, metrics):
+        values = self.get_values(metrics)
+        with self.lock:
+            entry = self.routes.get((method, route))
+            if entry is None:
+                entry = self.routes[(method, route)] = self.make_route()
+            for name, histogram in entry["histograms"].items():
+                histogram.observe(values[name])
+            for name in entry["counters"]:
+                entry["counters"][name] += values[name]
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def get_routes(self):
+        """
+        Return copy of route entries
+        """
+        with self.lock:
+            return {
+                key: {
+                    "histograms": {
+                        name: histogram.copy()
+                        for name, histogram in entry["histograms"].items()
+                    },
+                    "counters": dict(entry["counters"]),
+                }
+                for key, entry in self.routes.items()
+            }
+
+    def render(self):
+        """
+        Return metrics in Prometheus text exposition format
+        """
+        routes = sorted(self.get_routes().items())
+        lines = []
+        for name, help_text in self.HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), entry in routes:
+                labels = f'method="{method}",route="{escape_label(route)}"'
+                histogram = entry["histograms"][name]
+                cumulative = 0
+                for bucket, count in zip(
+                    (*histogram.buckets, "+Inf"), histogram.counts
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}'
+                    )
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        for name, help_text in self.COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), entry in routes:
+                labels = f'method="{method}",route="{escape_label(route)}"'
+                lines.append(f"{name}{{{labels}}} {entry['counters'][name]}")
+        return "\n".join(lines) + "\n"
+
+
+def parse_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class SharedRouteMetrics(RouteMetrics):
+    """
+    Route metrics of all processes aggregated in one Redis hash
+    A sampled request increments its bucket, sum and counter fields with
+    one pipeline of HINCRBY, so every worker renders the same values
+    """
+
+    def __init__(self, connection, key=ROUTE_METRICS_KEY):
+        self.connection = connection
+        self.key = key
+
+    @staticmethod
+    def get_field(method, route, name, part=None):
+        return json.dumps([method, route, name, part])
+
+    def observe(self, method, route, metrics):
+        values = self.get_values(metrics)
+        pipeline = self.connection.pipeline(transaction=False)
+        for name, histogram in self.make_route()["histograms"].items():
+            value = values[name]
+            index = histogram.get_index(value)
+            pipeline.hincrby(self.key, self.get_field(method, route, name, index), 1)
+            increment = (
+                pipeline.hincrby if isinstance(value, int) else pipeline.hincrbyfloat
+            )
+            increment(self.key, self.get_field(method, route, name, "sum"), value)
+        for name in self.COUNTERS:
+            if values[name]:
+                pipeline.hincrby(
+                    self.key, self.get_field(method, route, name), values[name]
+                )
+        try:
+            pipeline.execute()
+        except RedisError:
+            logger.warning("Route metrics are not recorded", exc_info=True)
+
+    def clear(self):
+        self.connection.delete(self.key)
+
+    def get_routes(self):
+        routes = {}
+        for field, value in self.connection.hgetall(self.key).items():
+            method, route, name, part = json.loads(field)
+            entry = routes.get((method, route))
+            if entry is None:
+                entry = routes[(method, route)] = self.make_route()
+            if name in entry["counters"]:
+                entry["counters"][name] = int(value)
+            elif name in entry["histograms"]:
+                histogram = entry["histograms"][name]
+                if part == "sum":
+                    histogram.sum = parse_number(value)
+                else:
+                    # fields of buckets removed from settings go to +Inf
+                    index = min(part, len(histogram.counts) - 1)
+                    histogram.counts[index] += int(value)
+        return routes
+
+
+route_metrics = RouteMetrics()
+
+
+def get_route_metrics():
+    """
+    Return metrics shared by processes through Redis cache or metrics of
+    this process when cache is not Redis
+    """
+    if settings.CACHES["default"]["BACKEND"].startswith("django_redis."):
+        from django_redis import get_redis_connection
+
+        return SharedRouteMetrics(get_redis_connection("default"))
+    return route_metrics
+
+
+def get_route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.route
+
+
+class InstrumentationMiddleware:
+    """
+    Measure sampled requests: SQL queries and their time, cache hits and misses,
+    serializer time and total time
+    Adds Server-Timing header, logs a JSON line and updates route metrics,
+    requests which are not sampled are passed through untouched
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        metrics.total_time = time.perf_counter() - start
+
+        route = get_route(request)
+        response["Server-Timing"] = metrics.get_server_timing()
+        get_route_metrics().observe(request.method, route, metrics)
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "route": route,
+                    "status": response.status_code,
+                    "queries": metrics.queries,
+                    "db_ms": round(metrics.db_time * 1000, 1),
+                    "cache_hits": metrics.cache_hits,
+                    "cache_misses": metrics.cache_misses,
+                    "serializer_ms": round(metrics.serializer_time * 1000, 1),
+                    "total_ms": round(metrics.total_time * 1000, 1),
+                }
+            )
+        )
+        return response
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    """
+    Render metrics text as is, errors as JSON
+    """
+
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return json.dumps(data).encode(self.charset)
@@ -0,0 +1,121 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmark import ENDPOINTS, METRICS, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark API endpoints against current database, "
+        "save results and compare them with a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=100,
+            help="Number of measured requests per endpoint",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Number of requests per endpoint sent before measuring",
+        )
+        parser.add_argument(
+            "--endpoints",
+            default="",
+            help="Comma separated names of benchmarked endpoints, all by default: "
+            + ", ".join(endpoint.name for endpoint in ENDPOINTS),
+        )
+        parser.add_argument(
+            "--url",
+            default=None,
+            help="Base URL of a running server, e.g. http://127.0.0.1:8000, "
+            "requests go through Django test client by default",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of concurrent requests to the server, used with --url",
+        )
+        parser.add_argument("--output", default=None, help="Write results to JSON file")
+        parser.add_argument(
+            "--baseline", default=None, help="Compare with results of JSON file"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Relative growth of metric reported as regression",
+        )
+        parser.add_argument(
+            "--metric",
+            choices=METRICS,
+            default="p95_ms",
+            help="Latency metric compared with baseline",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = ENDPOINTS
+        if options["endpoints"]:
+            names = options["endpoints"].split(",")
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint.name in names]
+            unknown = set(names) - {endpoint.name for endpoint in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        results = run_benchmarks(
+            endpoints,
+            requests=options["requests"],
+            warmup=options["warmup"],
+            base_url=options["url"],
+            concurrency=options["concurrency"],
+        )
+        if results is None:
+            raise CommandError(
+                "No products or addresses to request, generate data with fill --scale"
+            )
+        self.write_results(results)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+            try:
+                rows = compare(
+                    results, baseline, options["threshold"], options["metric"]
+                )
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.write_comparison(rows, options["metric"])
+            regressed = [name for name, *_, flag in rows if flag]
+            if regressed:
+                raise CommandError(f"Regressed endpoints: {', '.join(regressed)}")
+
+    def write_results(self, results):
+        self.stdout.write(
+            f"{'endpoint':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'req/s':>10}{'queries':>9}{'peak KB':>10}{'errors':>8}"
+        )
+        for name, row in results["endpoints"].items():
+            self.stdout.write(
+                f"{name:<20}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                f"{row['throughput_rps']:>10}{str(row['queries']):>9}"
+                f"{str(row['peak_memory_kb']):>10}{row['errors']:>8}"
+            )
+
+    def write_comparison(self, rows, metric):
+        self.stdout.write(f"Comparison of {metric} with baseline")
+        for name, previous, current, change, regressed in rows:
+            if previous is None:
+                self.stdout.write(f"{name:<20} new {current}")
+                continue
+            line = f"{name:<20}{previous:>10}{current:>10}{change:>+10.1%}"
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
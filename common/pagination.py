@@ -1,7 +1,93 @@
+from collections import OrderedDict
+
 from rest_framework import pagination
+from rest_framework.response import Response
+
+
+class CommonCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination without COUNT(*) and OFFSET
+    Return count, next, previous and results like CommonPagination,
+    count is filled only on ?count=true and capped with count_limit
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "id")
+    count_query_param = "count"
+    count_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = queryset.order_by()[: self.count_limit].count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {
+            "type": "integer",
+            "nullable": True,
+            "example": 123,
+        }
+        return response_schema
+
+
+class NameCursorPagination(CommonCursorPagination):
+    ordering = ("name", "id")
 
 
 class CommonPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination
+    Views with cursor_pagination_class switch to it when ?cursor is passed,
+    empty ?cursor= returns the first page
+    """
+
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_query_param = "cursor"
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_pagination_class = getattr(view, "cursor_pagination_class", None)
+        if (
+            cursor_pagination_class is not None
+            and self.cursor_query_param in request.query_params
+        ):
+            self.cursor_paginator = cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        cursor_pagination_class = getattr(view, "cursor_pagination_class", None)
+        if cursor_pagination_class is not None:
+            names = {parameter["name"] for parameter in parameters}
+            parameters += [
+                parameter
+                for parameter in cursor_pagination_class().get_schema_operation_parameters(
+                    view
+                )
+                if parameter["name"] not in names
+            ]
+        return parameters
@@ -0,0 +1,639 @@
+"""
+Deterministic synthetic data generator for benchmarks
+Every row is derived from seed and its index, so chunks of a stage can be
+generated in any order and in separate processes with the same result
+"""
+import io
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.text import slugify
+
+from attributes.models import Attribute, AttributeValue, normalize_value
+from common.cache import invalidate_tags, make_tag
+from head.counters import reconcile_counters
+from orders.models import Order
+from orders.rollups import rebuild_daily_sales
+from payments.models import ShopLedgerEntry
+from products.models import Brand, BrandType, Category, Image, Product, ProductVariant
+from products.pricing import calculate_variant_prices
+from reviews.models import Review
+from shops.models import Shop
+from users.models import Address, Customer
+
+IMAGE_DIR = "tests/img"
+STORAGE_DIR = "synthetic"
+PASSWORD = "jfmfn123"
+NAMESPACE = uuid.UUID("8a0c1d5e-2f4b-4c7d-9e6a-3b5f7d9c1e2a")
+CENT = Decimal("0.01")
+HISTORY_DAYS = 365
+
+VARIANTS_PER_PRODUCT = 2
+IMAGES_PER_VARIANT = 1
+REVIEWS_PER_PRODUCT = 2
+CATEGORY_ROOTS = 8
+CATEGORY_CHILDREN = 5
+
+BRAND_TYPES = ["Clothes", "Electronics", "Food", "Home", "Sport"]
+ATTRIBUTES = {
+    "color": ["Red", "Green", "Blue", "Black", "White", "Yellow", "Gray"],
+    "size": ["XS", "S", "M", "L", "XL", "XXL"],
+}
+WORDS = [
+    "amber", "bold", "classic", "crisp", "daily", "deluxe", "eco", "fresh",
+    "golden", "handy", "lite", "modern", "nordic", "prime", "pure", "royal",
+    "smart", "solid", "swift", "urban", "vivid", "wild",
+]  # fmt: skip
+TITLES = [
+    "backpack", "blender", "boots", "cap", "chair", "coat", "headphones",
+    "jacket", "jeans", "kettle", "lamp", "laptop", "mug", "phone", "scarf",
+    "sneakers", "sofa", "speaker", "t-shirt", "watch",
+]  # fmt: skip
+CITIES = ["Bishkek", "Osh", "Almaty", "Tashkent", "Karakol", "Naryn"]
+UNITS = ["piece", "kg", "pair", "set"]
+# order statuses with weights, most of history is completed
+ORDER_STATUSES = [
+    ("completed", 60),
+    ("delivered", 10),
+    ("paid", 8),
+    ("pending", 8),
+    ("delivering", 5),
+    ("ready", 3),
+    ("canceled", 4),
+    ("payment_error", 1),
+    ("shop_decline", 1),
+]
+STAGE_GROUPS = [["customers"], ["addresses", "shops"], ["products"], ["orders"]]
+# models with integer keys, ids are assigned by generator and sequences are reset
+SEQUENCE_MODELS = [Product, ProductVariant, Image, AttributeValue, ShopLedgerEntry]
+CACHED_MODELS = [Customer, Shop, Brand, Category, Product, ProductVariant, Order]
+
+
+def make_uuid(seed, kind, index):
+    return uuid.uuid5(NAMESPACE, f"{seed}:{kind}:{index}")
+
+
+def make_rng(seed, kind, index):
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def make_name(rng, index):
+    return f"{rng.choice(WORDS)} {rng.choice(TITLES)} {index}".capitalize()
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+@contextmanager
+def keep_created_at(*models):
+    """
+    Let bulk_create store generated creation dates instead of now
+    """
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Plan:
+    """
+    Row counts, id offsets and catalog of one generator run
+    Scale is number of customers, other counts are derived from it
+    """
+
+    def __init__(self, scale, seed=0, batch_size=1000):
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        self.counts = {
+            "customers": scale,
+            "addresses": scale,
+            "shops": max(1, scale // 100),
+            "brands": max(1, min(1000, scale // 100)),
+            "products": max(1, scale // 2),
+            "orders": scale,
+        }
+        # dates are anchored to start of the day, reruns of a day match
+        self.now = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.password = make_password(PASSWORD)
+        self.product_offset = get_next_id(Product)
+        self.variant_offset = get_next_id(ProductVariant)
+        self.image_offset = get_next_id(Image)
+        self.value_offset = get_next_id(AttributeValue)
+        self.ledger_offset = get_next_id(ShopLedgerEntry)
+        self.images = []
+        self.brands = []
+        self.categories = []
+        self.attributes = []
+
+    def get_uuid(self, kind, index):
+        return make_uuid(self.seed, kind, index)
+
+    def get_rng(self, kind, index):
+        return make_rng(self.seed, kind, index)
+
+    def get_shop_name(self, index):
+        rng = self.get_rng("shop", index)
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} shop {self.seed}-{index}"
+
+    def get_created_at(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+    def get_chunks(self, stage):
+        """
+        Index ranges of stage rows, orders are chunked by shop
+        """
+        count = self.counts["shops" if stage == "orders" else stage]
+        size = max(1, self.batch_size // self.get_rows_per_index(stage))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def get_rows_per_index(self, stage):
+        if stage == "orders":
+            return max(1, self.counts["orders"] // self.counts["shops"])
+        if stage == "products":
+            return VARIANTS_PER_PRODUCT
+        return 1
+
+
+def store_images():
+    """
+    Upload test images once, generated rows share the stored names
+    """
+    names = []
+    for filename in sorted(os.listdir(IMAGE_DIR)):
+        name = f"{STORAGE_DIR}/{filename}"
+        if not default_storage.exists(name):
+            with open(os.path.join(IMAGE_DIR, filename), "rb") as file:
+                name = default_storage.save(name, File(file))
+        names.append(name)
+    return names
+
+
+def create_catalog(plan):
+    """
+    Brand types, brands, category tree and attributes
+    Rows are few, they are saved one by one and reused by later runs
+    """
+    rng = plan.get_rng("catalog", 0)
+    attributes = [Attribute.objects.get_or_create(name=name)[0] for name in ATTRIBUTES]
+    types = [BrandType.objects.get_or_create(name=name)[0] for name in BRAND_TYPES]
+
+    brands = []
+    for index in range(plan.counts["brands"]):
+        brand, _ = Brand.objects.get_or_create(
+            pk=plan.get_uuid("brand", index),
+            defaults={
+                "name": f"{rng.choice(WORDS)} brand {plan.seed}-{index}".capitalize(),
+                "image": rng.choice(plan.images),
+                "type": rng.choice(types),
+                "featured": index < 10,
+            },
+        )
+        brands.append(brand.pk)
+
+    categories = []
+    for root_index in range(CATEGORY_ROOTS):
+        root, _ = Category.objects.get_or_create(
+            pk=plan.get_uuid("category", root_index),
+            defaults={
+                "name": f"Category {plan.seed}-{root_index}",
+                "image": rng.choice(plan.images),
+                "description": "Generated category",
+                "featured": True,
+            },
+        )
+        for child_index in range(CATEGORY_CHILDREN):
+            index = f"{root_index}-{child_index}"
+            category, created = Category.objects.get_or_create(
+                pk=plan.get_uuid("category", index),
+                defaults={
+                    "name": f"Category {plan.seed}-{index}",
+                    "image": rng.choice(plan.images),
+                    "description": "Generated category",
+                    "tax": Decimal(rng.choice([0, 5, 10, 12, 20])),
+                    "parent": root,
+                },
+            )
+            if created:
+                category.attributes.add(*attributes)
+            categories.append((category.pk, category.tax))
+
+    plan.brands = brands
+    plan.categories = categories
+    plan.attributes = [(attribute.pk, attribute.name) for attribute in attributes]
+    return Counter(
+        brands=len(brands), categories=CATEGORY_ROOTS * (CATEGORY_CHILDREN + 1)
+    )
+
+
+def is_generated(plan):
+    """
+    Check whether rows of seed of plan are in database
+    Ids and emails are derived from seed, inserting them again fails
+    """
+    return Customer.objects.filter(
+        email__startswith=f"customer{plan.seed}-", email__endswith="@example.com"
+    ).exists()
+
+
+def generate_customers(plan, start, stop):
+    customers = []
+    for index in range(start, stop):
+        rng = plan.get_rng("customer", index)
+        customers.append(
+            Customer(
+                id=plan.get_uuid("customer", index),
+                email=f"customer{plan.seed}-{index}@example.com",
+                password=plan.password,
+                first_name=rng.choice(WORDS).capitalize(),
+                last_name=rng.choice(WORDS).capitalize(),
+                phone=f"+996{rng.randrange(10**9):09}",
+                is_seller=index < plan.counts["shops"],
+                date_joined=plan.get_created_at(rng),
+            )
+        )
+    Customer.objects.bulk_create(customers)
+    return Counter(customers=len(customers))
+
+
+def generate_addresses(plan, start, stop):
+    addresses = []
+    for index in range(start, stop):
+        rng = plan.get_rng("address", index)
+        addresses.append(
+            Address(
+                id=plan.get_uuid("address", index),
+                user_id=plan.get_uuid("customer", index),
+                city=rng.choice(CITIES),
+                country="Kyrgyzstan",
+                street=f"{rng.choice(WORDS)} street {rng.randrange(1, 200)}".title(),
+                phone=f"+996{rng.randrange(10**9):09}",
+            )
+        )
+    Address.objects.bulk_create(addresses)
+    return Counter(addresses=len(addresses))
+
+
+def generate_shops(plan, start, stop):
+    """
+    Owner of shop N is customer N
+    """
+    shops = []
+    for index in range(start, stop):
+        rng = plan.get_rng("shop-details", index)
+        name = plan.get_shop_name(index)
+        shops.append(
+            Shop(
+                id=plan.get_uuid("shop", index),
+                name=name,
+                slug=slugify(name),
+                user_id=plan.get_uuid("customer", index),
+                email=f"shop{plan.seed}-{index}@example.com",
+                phone=f"+996{plan.seed}{index:09}",
+                address=f"{rng.choice(CITIES)}, {rng.choice(WORDS)} street",
+                verified=rng.random() < 0.8,
+                cover_picture=rng.choice(plan.images),
+                profile_picture=rng.choice(plan.images),
+            )
+        )
+    Shop.objects.bulk_create(shops)
+    return Counter(shops=len(shops))
+
+
+def generate_products(plan, start, stop):
+    """
+    Products with variants, images, attribute values and reviews
+    Variant prices, product listing columns and ratings are calculated here,
+    shop ratings are rebuilt from reviews after the stage
+    """
+    products, variants, images, values, reviews = [], [], [], [], []
+    for index in range(start, stop):
+        rng = plan.get_rng("product", index)
+        product_id = plan.product_offset + index
+        shop_index = index % plan.counts["shops"]
+        category_id, tax = rng.choice(plan.categories)
+        name = make_name(rng, index)
+        product = Product(
+            id=product_id,
+            name=name,
+            slug=slugify(f"{plan.get_shop_name(shop_index)}-{name}"),
+            description=f"{name}, {rng.choice(WORDS)} and {rng.choice(WORDS)}",
+            category_id=category_id,
+            brand_id=rng.choice(plan.brands),
+            shop_id=plan.get_uuid("shop", shop_index),
+            unit=rng.choice(UNITS),
+            featured=rng.random() < 0.01,
+            created_at=plan.get_created_at(rng),
+        )
+
+        product_variants = []
+        for number in range(VARIANTS_PER_PRODUCT):
+            variant_id = plan.variant_offset + index * VARIANTS_PER_PRODUCT + number
+            price = Decimal(rng.randrange(100, 100000)) * CENT
+            discount = rng.choice([None, 0, 5, 10, 20, 50])
+            discount_price, overall_price, tax_price = (
+                value.quantize(CENT)
+                for value in calculate_variant_prices(price, discount, tax)
+            )
+            stock = rng.randrange(0, 100)
+            variant = ProductVariant(
+                id=variant_id,
+                product_id=product_id,
+                price=price,
+                discount=discount,
+                discount_price=discount_price,
+                overall_price=overall_price,
+                tax_price=tax_price,
+                stock=stock,
+                status="available" if stock else "unavailable",
+                thumbnail=rng.choice(plan.images),
+            )
+            product_variants.append(variant)
+            for image_number in range(IMAGES_PER_VARIANT):
+                images.append(
+                    Image(
+                        id=plan.image_offset
+                        + (variant_id - plan.variant_offset) * IMAGES_PER_VARIANT
+                        + image_number,
+                        product_variant_id=variant_id,
+                        image=rng.choice(plan.images),
+                    )
+                )
+            for number, (attribute_id, attribute_name) in enumerate(plan.attributes):
+                value = rng.choice(ATTRIBUTES[attribute_name])
+                values.append(
+                    AttributeValue(
+                        id=plan.value_offset
+                        + (variant_id - plan.variant_offset) * len(plan.attributes)
+                        + number,
+                        product_variant_id=variant_id,
+                        attribute_id=attribute_id,
+                        value=value,
+                        normalized_value=normalize_value(value),
+                        product_id=product_id,
+                    )
+                )
+
+        first = product_variants[0]
+        product.price = first.price
+        product.discount = first.discount
+        product.discount_price = first.discount_price
+        product.overall_price = first.overall_price
+        product.thumbnail = first.thumbnail
+        product.min_price = min(variant.overall_price for variant in product_variants)
+        product.max_price = max(variant.overall_price for variant in product_variants)
+
+        for number in range(REVIEWS_PER_PRODUCT):
+            rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0]
+            reviews.append(
+                Review(
+                    id=plan.get_uuid("review", f"{index}-{number}"),
+                    user_id=plan.get_uuid(
+                        "customer", rng.randrange(plan.counts["customers"])
+                    ),
+                    product_variant_id=rng.choice(product_variants).id,
+                    product_id=product_id,
+                    shop_id=product.shop_id,
+                    rating=rating,
+                    comment=f"{rng.choice(WORDS).capitalize()} {rng.choice(TITLES)}",
+                )
+            )
+            product.rating_sum += rating
+            product.rating_count += 1
+        if product.rating_count:
+            product.rating = round(
+                Decimal(product.rating_sum) / product.rating_count, 1
+            )
+        products.append(product)
+        variants.extend(product_variants)
+
+    batch_size = plan.batch_size
+    Product.objects.bulk_create(products, batch_size=batch_size)
+    ProductVariant.objects.bulk_create(variants, batch_size=batch_size)
+    Image.objects.bulk_create(images, batch_size=batch_size)
+    AttributeValue.objects.bulk_create(values, batch_size=batch_size)
+    Review.objects.bulk_create(reviews, batch_size=batch_size)
+    return Counter(
+        products=len(products),
+        variants=len(variants),
+        images=len(images),
+        attribute_values=len(values),
+        reviews=len(reviews),
+    )
+
+
+def get_order_index(plan, shop_index):
+    """
+    Index of first order of shop and number of its orders
+    """
+    count, shops = plan.counts["orders"], plan.counts["shops"]
+    per_shop, rest = divmod(count, shops)
+    return shop_index * per_shop + min(shop_index, rest), per_shop + (shop_index < rest)
+
+
+def generate_orders(plan, start, stop):
+    """
+    Orders of shops start to stop with ledger entries of credited orders
+    Shop balances and daily sales are rebuilt after the stage
+    """
+    shop_ids = {plan.get_uuid("shop", index): index for index in range(start, stop)}
+    shop_variants = defaultdict(list)
+    for variant in (
+        ProductVariant.objects.filter(product__shop__in=list(shop_ids))
+        .order_by("pk")
+        .values("pk", "product__shop", "discount_price", "tax_price")
+    ):
+        shop_variants[shop_ids[variant["product__shop"]]].append(variant)
+
+    statuses, weights = zip(*ORDER_STATUSES)
+    orders, entries = [], []
+    for shop_index in range(start, stop):
+        variants = shop_variants[shop_index]
+        first, count = get_order_index(plan, shop_index)
+        if not variants:
+            continue
+        shop_id = plan.get_uuid("shop", shop_index)
+        shop_orders = []
+        for index in range(first, first + count):
+            rng = plan.get_rng("order", index)
+            customer_index = rng.randrange(plan.counts["customers"])
+            variant = rng.choice(variants)
+            quantity = rng.randrange(1, 4)
+            status = rng.choices(statuses, weights)[0]
+            created_at = plan.get_created_at(rng)
+            delivered_at = None
+            if status in ("delivered", "completed"):
+                delivered_at = min(
+                    created_at + timedelta(days=rng.randrange(1, 10)), plan.now
+                )
+            order = Order(
+                id=plan.get_uuid("order", index),
+                user_id=plan.get_uuid("customer", customer_index),
+                address_id=plan.get_uuid("address", customer_index),
+                shop_id=shop_id,
+                product_variant_id=variant["pk"],
+                quantity=quantity,
+                total_price=variant["discount_price"] * quantity,
+                status=status,
+                created_at=created_at,
+                delivered_at=delivered_at,
+            )
+            shop_orders.append((order, index, variant["tax_price"] * quantity))
+        orders.extend(order for order, _, _ in shop_orders)
+
+        balance = Decimal(0)
+        shop_orders.sort(key=lambda item: (item[0].created_at, item[1]))
+        for order, index, tax in shop_orders:
+            if order.status not in Order.CREDITED_STATUSES:
+                continue
+            amount = order.total_price - tax
+            balance += amount
+            entries.append(
+                ShopLedgerEntry(
+                    id=plan.ledger_offset + index,
+                    shop_id=shop_id,
+                    kind="order",
+                    amount=amount,
+                    balance=balance,
+                    order_id=order.id,
+                    created_at=order.created_at,
+                )
+            )
+
+    Order.objects.bulk_create(orders, batch_size=plan.batch_size)
+    ShopLedgerEntry.objects.bulk_create(entries, batch_size=plan.batch_size)
+    return Counter(orders=len(orders), ledger_entries=len(entries))
+
+
+GENERATORS = {
+    "customers": generate_customers,
+    "addresses": generate_addresses,
+    "shops": generate_shops,
+    "products": generate_products,
+    "orders": generate_orders,
+}
+
+
+def generate_chunk(plan, stage, start, stop):
+    with keep_created_at(Product, Order, ShopLedgerEntry), transaction.atomic():
+        rows = GENERATORS[stage](plan, start, stop)
+    return stage, rows
+
+
+def run_tasks(tasks, workers):
+    """
+    Yield results of (plan, stage, start, stop) tasks as they finish
+    Workers get fresh database connections, forked ones can't be shared
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield generate_chunk(*task)
+        return
+    connections.close_all()
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        yield from pool.imap_unordered(star_generate_chunk, tasks)
+
+
+def star_generate_chunk(task):
+    return generate_chunk(*task)
+
+
+def reset_sequences():
+    statements = connection.ops.sequence_reset_sql(no_style(), SEQUENCE_MODELS)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def rebuild_derived(plan):
+    """
+    Rebuild data which bulk_create skipped, return rows per step
+    """
+    from reviews.management.commands.rebuild_ratings import Command as Ratings
+
+    ratings = Ratings()
+    ratings.rebuild(Shop, "shop", plan.batch_size)
+    yield "shop ratings", Counter(shops=plan.counts["shops"])
+
+    yield "daily sales", Counter(daily_sales=rebuild_daily_sales())
+
+    call_command(
+        "rebuild_shop_balances", chunk_size=plan.batch_size, stdout=io.StringIO()
+    )
+    yield "shop balances", Counter(shops=plan.counts["shops"])
+
+    reconcile_counters()
+    yield "counters", Counter()
+
+    call_command(
+        "rebuild_search_index", chunk_size=plan.batch_size, stdout=io.StringIO()
+    )
+    yield "search index", Counter(products=plan.counts["products"])
+
+
+def generate(plan, workers=1, log=print):
+    """
+    Generate all stages of plan, stages of one group run concurrently
+    log is called with stage name, rows and elapsed seconds, with workers
+    elapsed time of stage is counted from start of its group
+    Return total rows per model
+    """
+    if workers > 1 and connection.vendor == "sqlite":
+        # sqlite serializes writers, extra processes only wait for the lock
+        workers = 1
+    totals = Counter()
+
+    def report(stage, rows, started):
+        totals.update(rows)
+        log(stage, rows, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    plan.images = store_images()
+    report("catalog", create_catalog(plan), started)
+
+    for group in STAGE_GROUPS:
+        started = time.perf_counter()
+        tasks = [
+            (plan, stage, start, stop)
+            for stage in group
+            for start, stop in plan.get_chunks(stage)
+        ]
+        remaining = Counter(stage for _, stage, _, _ in tasks)
+        stage_rows = defaultdict(Counter)
+        for stage, rows in run_tasks(tasks, workers):
+            stage_rows[stage].update(rows)
+            remaining[stage] -= 1
+            if not remaining[stage]:
+                report(stage, stage_rows[stage], started)
+                # stages of group run one after another without workers
+                if workers <= 1:
+                    started = time.perf_counter()
+
+    reset_sequences()
+    started = time.perf_counter()
+    for step, rows in rebuild_derived(plan):
+        report(step, rows, started)
+        started = time.perf_counter()
+    # cached responses were built before generated rows existed
+    invalidate_tags([make_tag(model) for model in CACHED_MODELS])
+    return totals
@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .exports import load_view, write_export
+
+
+@shared_task
+def export_queryset(view_path, params, export_format, name):
+    """
+    Write export of view filtered with query parameters to default storage,
+    return name of saved file
+    """
+    view = load_view(view_path, params)
+    queryset = view.filter_queryset(view.get_queryset())
+    return write_export(queryset, view.export_fields, export_format, name)
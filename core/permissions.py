@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .principals import get_shop_id
+
 
 class IsAnonymous(permissions.BasePermission):
     """
@@ -18,7 +20,7 @@ class HasShop(permissions.BasePermission):
     message = "You don't have shop"
 
     def has_permission(self, request, view):
-        return hasattr(request.user, "shop")
+        return get_shop_id(request.user) is not None
 
 
 class IsOwner(permissions.BasePermission):
@@ -29,7 +31,8 @@ class IsOwner(permissions.BasePermission):
     message = "You don't have permission to access this shop's products"
 
     def has_object_permission(self, request, view, obj):
-        return obj.shop == request.user.shop
+        return obj.shop_id == get_shop_id(request.user)
+
 
 class IsSeller(permissions.BasePermission):
     """
@@ -39,4 +42,4 @@ class IsSeller(permissions.BasePermission):
     message = "You are not seller"
 
     def has_permission(self, request, view):
-        return request.user.is_seller
\ No newline at end of file
+        return request.user.is_seller
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from common.instrumentation import record_cache_access
+
+PRINCIPAL_KEY_PREFIX = "principal"
+# user fields read by authentication and permissions, other fields are
+# deferred on users built from principal and loaded from database on access
+PRINCIPAL_FIELDS = ("id", "email", "is_active", "is_staff", "is_seller")
+
+
+class LocalCache:
+    """
+    In-process LRU cache with TTL, shared by threads of one process
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# first level of principal cache, entries of other processes expire after ttl
+local_principals = LocalCache(
+    settings.AUTH_PRINCIPAL_LOCAL_SIZE, settings.AUTH_PRINCIPAL_LOCAL_TTL
+)
+
+
+def get_principal_key(user_id):
+    return f"{PRINCIPAL_KEY_PREFIX}:{user_id}"
+
+
+def load_principal(user_id):
+    """
+    Return values of principal fields and shop id, None for unknown user
+    """
+    user = (
+        get_user_model()
+        .objects.filter(pk=user_id)
+        .values(*PRINCIPAL_FIELDS, "shop__id")
+        .first()
+    )
+    if user is None:
+        return None
+    shop_id = user.pop("shop__id")
+    return {"fields": user, "shop_id": shop_id}
+
+
+def get_principal(user_id):
+    """
+    Return cached principal from process memory, then shared cache,
+    then database
+    """
+    key = get_principal_key(user_id)
+    principal = local_principals.get(key)
+    if principal is None:
+        principal = cache.get(key)
+        record_cache_access(principal is not None)
+        if principal is None:
+            principal = load_principal(user_id)
+            if principal is None:
+                return None
+            cache.set(key, principal, settings.AUTH_PRINCIPAL_CACHE_TTL)
+        local_principals.set(key, principal)
+    return principal
+
+
+def build_user(principal):
+    """
+    Build user instance from principal
+    Fields not kept in principal are deferred, saving the instance writes
+    only principal fields which may be stale, so views writing current user
+    load its row instead, see load_user
+    shop_id is set from principal, missing shop is cached as well,
+    so hasattr(user, "shop") doesn't query shops of users without shop
+    """
+    user_model = get_user_model()
+    fields = principal["fields"]
+    # from_db takes values of loaded fields in order of model fields
+    names = [
+        field.attname
+        for field in user_model._meta.concrete_fields
+        if field.attname in fields
+    ]
+    user = user_model.from_db("default", names, [fields[name] for name in names])
+    user.shop_id = principal["shop_id"]
+    if principal["shop_id"] is None:
+        user._state.fields_cache["shop"] = None
+    return user
+
+
+def load_user(user):
+    """
+    Return database row of authenticated user
+    """
+    return get_user_model().objects.get(pk=user.pk)
+
+
+def delete_principal(user_id):
+    key = get_principal_key(user_id)
+    local_principals.delete(key)
+    cache.delete(key)
+
+
+def invalidate_principal(user_id):
+    """
+    Delete cached principal when current transaction commits, so requests
+    running before commit don't cache old values again
+    """
+    transaction.on_commit(lambda: delete_principal(user_id))
+
+
+def get_shop_id(user):
+    """
+    Return shop id of user without query for users built from principal
+    """
+    if hasattr(user, "shop_id"):
+        return user.shop_id
+    shop = getattr(user, "shop", None)
+    return shop.pk if shop is not None else None
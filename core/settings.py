@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -29,6 +30,28 @@ CORS_ALLOWED_ORIGINS = config(
 
 CELERY_BROKER_URL = config("REDIS_URL")
 CELERY_RESULT_BACKEND = config("REDIS_URL")
+CELERY_BEAT_SCHEDULE = {
+    "complete-delivered-orders": {
+        "task": "orders.tasks.complete_delivered_orders",
+        "schedule": crontab(minute=0),
+    },
+    "rebuild-recent-daily-sales": {
+        "task": "orders.tasks.rebuild_recent_daily_sales",
+        "schedule": crontab(minute=30, hour=2),
+    },
+    "flush-platform-counters": {
+        "task": "head.tasks.flush_platform_counters",
+        "schedule": crontab(),
+    },
+    "reconcile-platform-counters": {
+        "task": "head.tasks.reconcile_platform_counters",
+        "schedule": crontab(minute=15, hour="*/6"),
+    },
+    "build-recommendations": {
+        "task": "products.tasks.build_recommendations",
+        "schedule": crontab(minute=0, hour=3),
+    },
+}
 
 AUTH_USER_MODEL = "users.Customer"
 # Application definition
@@ -67,6 +90,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "common.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -154,9 +178,7 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("core.authentication.CachedJWTAuthentication",),
     "DEFAULT_PAGINATION_CLASS": "common.pagination.CommonPagination",
     # "EXCEPTION_HANDLER": "common.exception_handler.custom_exception_handler",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
@@ -226,6 +248,53 @@ SESSION_CACHE_ALIAS = "default"
 
 CACHE_TTL = 60 * 1
 
+# Instrumentation
+# share of requests measured by common.instrumentation, 0 turns it off
+INSTRUMENTATION_SAMPLE_RATE = config(
+    "INSTRUMENTATION_SAMPLE_RATE", default=0.1, cast=float
+)
+INSTRUMENTATION_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+INSTRUMENTATION_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "common.instrumentation": {
+            "handlers": ["console"],
+            "level": config("INSTRUMENTATION_LOG_LEVEL", default="INFO"),
+        },
+    },
+}
+
+# Orders
+# delivered orders are completed by orders.tasks.complete_delivered_orders
+ORDER_COMPLETE_AFTER_DAYS = config("ORDER_COMPLETE_AFTER_DAYS", default=3, cast=int)
+# days of sales rollups rebuilt nightly by orders.tasks.rebuild_recent_daily_sales
+SALES_ROLLUP_REBUILD_DAYS = config("SALES_ROLLUP_REBUILD_DAYS", default=7, cast=int)
+# longest date range of shop analytics
+SALES_ANALYTICS_MAX_DAYS = 366
+
+# Authentication
+# users and shop ids of JWT requests are cached, see core.principals
+AUTH_PRINCIPAL_CACHE_TTL = 60 * 5
+AUTH_PRINCIPAL_LOCAL_TTL = 5
+AUTH_PRINCIPAL_LOCAL_SIZE = 1024
+
+# Admin dashboard
+# variants with stock at or below threshold are counted as low stock
+LOW_STOCK_THRESHOLD = config("LOW_STOCK_THRESHOLD", default=5, cast=int)
+
+# Product search
+# backend is picked by database vendor when empty, see products.search
+PRODUCT_SEARCH_BACKEND = config("PRODUCT_SEARCH_BACKEND", default="")
+PRODUCT_SEARCH_CONFIG = config("PRODUCT_SEARCH_CONFIG", default="simple")
+# neighbours kept per product by products.recommendations
+PRODUCT_RECOMMENDATIONS_TOP_K = config(
+    "PRODUCT_RECOMMENDATIONS_TOP_K", default=10, cast=int
+)
+
 # Email
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
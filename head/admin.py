@@ -1 +1,5 @@
 from django.contrib import admin
+
+from .models import PlatformCounter
+
+admin.site.register(PlatformCounter)
@@ -0,0 +1,277 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PlatformCounter
+
+logger = logging.getLogger(__name__)
+
+GMV = "gmv"
+PENDING_APPLICATIONS = "applications.moderation"
+UNVERIFIED_PAYMENTS = "payments.unverified"
+LOW_STOCK_VARIANTS = "variants.low_stock"
+# daily counters of new users are kept for the longest period of stats
+NEW_USERS_DAYS = 30
+# pending deltas are kept in cache as integers of hundredths
+PENDING_SCALE = 100
+# flush and reconcile hold the lock, expires if its worker dies
+LOCK_KEY = "counters.lock"
+LOCK_TIMEOUT = 10 * 60
+LOCK_WAIT = 60
+
+
+def get_order_status_counter(status):
+    return f"orders.{status}"
+
+
+def get_new_users_counter(date):
+    return f"users.new.{date.isoformat()}"
+
+
+def is_low_stock(stock):
+    return stock is not None and stock <= settings.LOW_STOCK_THRESHOLD
+
+
+def get_pending_key(name):
+    return f"counters.pending.{name}"
+
+
+def get_counter_names():
+    """
+    Names of counters which may have pending deltas
+    """
+    from orders.models import Order
+
+    since = timezone.localdate() - timedelta(days=NEW_USERS_DAYS)
+    return [
+        GMV,
+        PENDING_APPLICATIONS,
+        UNVERIFIED_PAYMENTS,
+        LOW_STOCK_VARIANTS,
+        *(get_order_status_counter(status) for status, _ in Order.STATUSES),
+        *(
+            get_new_users_counter(since + timedelta(days=days))
+            for days in range(NEW_USERS_DAYS + 1)
+        ),
+    ]
+
+
+def add_pending(deltas):
+    for name, delta in deltas.items():
+        key = get_pending_key(name)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, int(delta * PENDING_SCALE))
+        except ValueError:
+            # key expired or was evicted between add and incr
+            cache.set(key, int(delta * PENDING_SCALE), timeout=None)
+
+
+def get_pending(names):
+    keys = {get_pending_key(name): name for name in names}
+    return {keys[key]: value for key, value in cache.get_many(keys).items() if value}
+
+
+def discard_pending(pending):
+    for name, value in pending.items():
+        try:
+            cache.decr(get_pending_key(name), value)
+        except ValueError:
+            # key expired or was evicted, nothing is left to discard
+            pass
+
+
+@contextmanager
+def counters_lock(wait=0):
+    """
+    Hold lock shared by flush and reconcile, yield whether it was acquired
+    Waits up to wait seconds while the lock is held by other worker
+    """
+    deadline = time.monotonic() + wait
+    acquired = cache.add(LOCK_KEY, 1, LOCK_TIMEOUT)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(1)
+        acquired = cache.add(LOCK_KEY, 1, LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(LOCK_KEY)
+
+
+def increment(deltas):
+    """
+    Add deltas to named counters once the current transaction commits
+    Deltas are accumulated in cache with atomic increments and folded into
+    counter rows by flush_counters, so checkouts do not queue on row locks
+    of the same counters
+    Zero deltas and None names are skipped
+    """
+    deltas = {name: delta for name, delta in deltas.items() if name and delta}
+    if deltas:
+        transaction.on_commit(lambda: add_pending(deltas))
+
+
+def apply_pending():
+    """
+    Move pending deltas from cache to counter rows, one UPDATE per counter
+    Called with counters lock held
+    """
+    pending = get_pending(get_counter_names())
+    with transaction.atomic():
+        for name, value in pending.items():
+            delta = Decimal(value) / PENDING_SCALE
+            counters = PlatformCounter.objects.filter(name=name)
+            if not counters.update(value=F("value") + delta):
+                PlatformCounter.objects.get_or_create(name=name)
+                counters.update(value=F("value") + delta)
+    discard_pending(pending)
+    return pending
+
+
+def flush_counters():
+    """
+    Fold pending deltas into counter rows
+    Skipped while reconcile_counters holds the lock, it flushes as well
+    """
+    with counters_lock() as acquired:
+        if not acquired:
+            return {}
+        return apply_pending()
+
+
+def get_counters(names):
+    """
+    Return values of counter rows with deltas not flushed yet
+    """
+    values = dict(
+        PlatformCounter.objects.filter(name__in=names).values_list("name", "value")
+    )
+    pending = get_pending(names)
+    return {
+        name: values.get(name, 0) + Decimal(pending.get(name, 0)) / PENDING_SCALE
+        for name in names
+    }
+
+
+def get_platform_stats():
+    """
+    Return admin dashboard stats from counters only
+    """
+    from orders.models import Order
+
+    today = timezone.localdate()
+    statuses = [status for status, _ in Order.STATUSES]
+    new_users = {
+        get_new_users_counter(today - timedelta(days=days)): days
+        for days in range(NEW_USERS_DAYS)
+    }
+    counters = get_counters(
+        [
+            GMV,
+            PENDING_APPLICATIONS,
+            UNVERIFIED_PAYMENTS,
+            LOW_STOCK_VARIANTS,
+            *map(get_order_status_counter, statuses),
+            *new_users,
+        ]
+    )
+    return {
+        "gmv": counters[GMV],
+        "orders": {
+            status: int(counters[get_order_status_counter(status)])
+            for status in statuses
+        },
+        "new_users": {
+            f"{period}d": int(
+                sum(counters[name] for name, days in new_users.items() if days < period)
+            )
+            for period in (1, 7, NEW_USERS_DAYS)
+        },
+        "pending_applications": int(counters[PENDING_APPLICATIONS]),
+        "unverified_payments": int(counters[UNVERIFIED_PAYMENTS]),
+        "low_stock_variants": int(counters[LOW_STOCK_VARIANTS]),
+    }
+
+
+def reconcile_counters():
+    """
+    Recalculate all counters from tables
+    Counters drift when rows are changed with bulk updates or cascades
+    Pending deltas are flushed first under the lock shared with
+    flush_counters, then rows are overwritten with totals of tables
+    A delta committed between the flush and reading of tables is counted
+    by the table and stays pending, so it is added twice until the next
+    reconcile; the window lasts the few UPDATEs of the flush
+    """
+    with counters_lock(LOCK_WAIT) as acquired:
+        if not acquired:
+            logger.warning("Counters are not reconciled, lock is held")
+            return
+        apply_pending()
+        with transaction.atomic():
+            recalculate_counters()
+
+
+def recalculate_counters():
+    """
+    Overwrite counter rows with totals of tables
+    """
+    from applications.models import Application
+    from orders.models import Order
+    from payments.models import Payment
+    from products.models import ProductVariant
+    from users.models import Customer
+
+    values = {
+        GMV: Order.objects.filter(status__in=Order.CREDITED_STATUSES).aggregate(
+            total=Sum("total_price")
+        )["total"]
+        or 0,
+        PENDING_APPLICATIONS: Application.objects.filter(status="moderation").count(),
+        UNVERIFIED_PAYMENTS: Payment.objects.filter(is_verified=None).count(),
+        LOW_STOCK_VARIANTS: ProductVariant.objects.filter(
+            stock__lte=settings.LOW_STOCK_THRESHOLD
+        ).count(),
+    }
+    statuses = dict(
+        Order.objects.order_by().values_list("status").annotate(count=Count("pk"))
+    )
+    for status, _ in Order.STATUSES:
+        values[get_order_status_counter(status)] = statuses.get(status, 0)
+    since = timezone.localdate() - timedelta(days=NEW_USERS_DAYS)
+    joined = dict(
+        Customer.objects.filter(date_joined__date__gte=since)
+        .annotate(date=TruncDate("date_joined"))
+        .order_by()
+        .values_list("date")
+        .annotate(count=Count("pk"))
+    )
+    for days in range(NEW_USERS_DAYS + 1):
+        date = since + timedelta(days=days)
+        values[get_new_users_counter(date)] = joined.get(date, 0)
+
+    PlatformCounter.objects.filter(
+        Q(name__startswith="users.new.") & ~Q(name__in=values)
+    ).delete()
+    existing = set(
+        PlatformCounter.objects.filter(name__in=values).values_list("name", flat=True)
+    )
+    counters = [
+        PlatformCounter(name=name, value=value) for name, value in values.items()
+    ]
+    PlatformCounter.objects.bulk_update(
+        [counter for counter in counters if counter.name in existing], ["value"]
+    )
+    PlatformCounter.objects.bulk_create(
+        [counter for counter in counters if counter.name not in existing]
+    )
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class PlatformCounter(models.Model):
+    """
+    Named counter of admin dashboard
+    Incremented on model transitions and reconciled periodically,
+    see head.counters
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} {self.value}"
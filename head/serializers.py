@@ -40,11 +40,15 @@ class AdminProductSerializer(serializers.ModelSerializer):
     shop = AdminShopSerializer(read_only=True)
     variants = ProductVariantSerializer(read_only=True, many=True)
     category = AdminCategoryReadSerializer(read_only=True)
-    thumbnail = serializers.URLField(read_only=True)
-    discount = serializers.IntegerField()
-    discount_price = serializers.DecimalField(max_digits=10, decimal_places=2)
-    overall_price = serializers.DecimalField(max_digits=10, decimal_places=2)
-    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    thumbnail = serializers.ImageField(read_only=True)
+    discount = serializers.IntegerField(read_only=True)
+    discount_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+    overall_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     # reviews = ReviewSerializer(many=True)
 
@@ -72,7 +76,7 @@ class AdminProductSerializer(serializers.ModelSerializer):
 class AdminProductUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
 class AdminCustomerSerializer(serializers.ModelSerializer):
@@ -92,3 +96,25 @@ class AdminCustomerSerializer(serializers.ModelSerializer):
             "is_superuser",
             "is_seller",
         ]
+
+
+class ApplyDiscountSerializer(serializers.Serializer):
+    """
+    Discount in percents for all variants of brand, shop or category subtree
+    """
+
+    discount = serializers.IntegerField(min_value=0, max_value=100)
+
+
+class AdminStatsSerializer(serializers.Serializer):
+    """
+    Admin dashboard stats to read only
+    orders has count per status, new_users per 1d, 7d and 30d
+    """
+
+    gmv = serializers.DecimalField(max_digits=16, decimal_places=2)
+    orders = serializers.DictField(child=serializers.IntegerField())
+    new_users = serializers.DictField(child=serializers.IntegerField())
+    pending_applications = serializers.IntegerField()
+    unverified_payments = serializers.IntegerField()
+    low_stock_variants = serializers.IntegerField()
@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from .counters import flush_counters, reconcile_counters
+
+
+@shared_task
+def flush_platform_counters():
+    """
+    Fold pending deltas of admin dashboard counters into counter rows
+    """
+    flush_counters()
+
+
+@shared_task
+def reconcile_platform_counters():
+    """
+    Recalculate admin dashboard counters from tables
+    """
+    reconcile_counters()
@@ -1,7 +1,7 @@
 from django.urls import include, path
 
 from .routers import router
-from .views import AdminSiteSettingsViewSet
+from .views import AdminMetricsViewSet, AdminSiteSettingsViewSet, AdminStatsViewSet
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -15,4 +15,8 @@ urlpatterns = [
             }
         ),
     ),
+    path("stats/", AdminStatsViewSet.as_view({"get": "list"}), name="admin-stats"),
+    path(
+        "metrics/", AdminMetricsViewSet.as_view({"get": "list"}), name="admin-metrics"
+    ),
 ]
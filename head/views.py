@@ -1,20 +1,25 @@
-from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
-from rest_framework import filters, mixins, permissions, viewsets
+from rest_framework import filters, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from datetime import timedelta
 
 from orders.models import Order
-from orders.serializers import OrderSerializer
+from orders.serializers import OrderListSerializer, OrderSerializer
+from orders.views import OrderReadMixin
 
 from applications.models import Application
 from applications.serializers import ApplicationSerializer, SingleApplicationSerializer
 from attributes.models import Attribute
 from attributes.serializers import AttributeSerializer
+from head.counters import get_platform_stats
 from head.serializers import (
     AdminCustomerSerializer,
     AdminProductSerializer,
     AdminProductUpdateSerializer,
+    AdminStatsSerializer,
+    ApplyDiscountSerializer,
 )
 from pages.models import Page, PageCategory, SiteSettings
 from pages.serializers import (
@@ -26,6 +31,7 @@ from pages.serializers import (
 from posts.models import Post
 from posts.serializers import PostSerializer
 from products.models import Brand, BrandType, Category, Product, ProductVariant
+from products.tasks import reprice_variants
 from products.serializers import (
     BrandSerializer,
     BrandTypeSerializer,
@@ -41,9 +47,43 @@ from sliders.models import Slide, Slider
 from sliders.serializers import SliderSerializer, SlideSerializer
 from users.models import Customer
 from payments.models import TransferMoney
+from payments.views import ShopLedgerMixin
 from payments.serializers import TransferMoneySerializer, CreateTransferMoneySerializer
-from django.utils import timezone
-from orders.tasks import check_payment_status
+from common.cache import InvalidateCacheMixin
+from common.exports import ExportMixin
+from common.instrumentation import (
+    PROMETHEUS_CONTENT_TYPE,
+    PrometheusRenderer,
+    get_route_metrics,
+)
+from common.pagination import CommonCursorPagination
+
+
+class ApplyDiscountMixin:
+    """
+    Add action to set discount of all related product variants
+    Variants are repriced in background
+    """
+
+    discount_lookup = ""
+
+    def get_discount_filters(self, instance):
+        return {self.discount_lookup: str(instance.pk)}
+
+    @extend_schema(
+        description="Set discount of all product variants",
+        request=ApplyDiscountSerializer,
+        responses={202: ApplyDiscountSerializer},
+    )
+    @action(detail=True, methods=["post"])
+    def apply_discount(self, request, *args, **kwargs):
+        serializer = ApplyDiscountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reprice_variants.delay(
+            self.get_discount_filters(self.get_object()),
+            serializer.validated_data["discount"],
+        )
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
 
 class AdminUsersViewSet(
@@ -66,6 +106,9 @@ class AdminUsersViewSet(
 
 
 class AdminShopViewSet(
+    InvalidateCacheMixin,
+    ApplyDiscountMixin,
+    ShopLedgerMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -79,6 +122,12 @@ class AdminShopViewSet(
     queryset = Shop.objects.all()
     serializer_class = ShopSerializer
     permission_classes = [permissions.IsAdminUser]
+    discount_lookup = "product__shop"
+
+    def get_queryset(self):
+        if self.action == "retrieve":
+            return Shop.objects.with_details()
+        return Shop.objects.select_related("user")
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -86,7 +135,9 @@ class AdminShopViewSet(
         return ShopSerializer
 
 
-class AdminCategoryViewSet(viewsets.ModelViewSet):
+class AdminCategoryViewSet(
+    InvalidateCacheMixin, ApplyDiscountMixin, viewsets.ModelViewSet
+):
     """
     Viewset to manage categories
     Allowed: All methods
@@ -110,8 +161,18 @@ class AdminCategoryViewSet(viewsets.ModelViewSet):
             return CreateCategorySerializer
         return CategorySerializer
 
+    def get_discount_filters(self, instance):
+        """
+        Discount is applied to the whole category subtree
+        """
+        categories = instance.get_descendants(include_self=True)
+        pks = categories.values_list("pk", flat=True)
+        return {"product__category__in": [str(pk) for pk in pks]}
+
 
-class AdminBrandViewSet(viewsets.ModelViewSet):
+class AdminBrandViewSet(
+    InvalidateCacheMixin, ApplyDiscountMixin, viewsets.ModelViewSet
+):
     """
     Viewset to manage brands
     Allowed: All methods
@@ -120,6 +181,7 @@ class AdminBrandViewSet(viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [permissions.IsAdminUser]
+    discount_lookup = "product__brand"
     filter_backends = [
         filters.SearchFilter,
         filters.OrderingFilter,
@@ -145,6 +207,8 @@ class AdminBrandTypeViewSet(viewsets.ModelViewSet):
 
 
 class AdminProductViewSet(
+    InvalidateCacheMixin,
+    ExportMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
@@ -160,37 +224,31 @@ class AdminProductViewSet(
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     search_fields = ["name"]
     ordering_fields = ["name", "rating", "created_at"]
+    cache_invalidate_related = ("shop", "category")
+    export_fields = [
+        "id",
+        "name",
+        "slug",
+        "shop__name",
+        "brand__name",
+        "category__name",
+        "unit",
+        "price",
+        "discount",
+        "overall_price",
+        "min_price",
+        "max_price",
+        "rating",
+        "rating_count",
+        "created_at",
+    ]
 
     def get_queryset(self):
         """
         Returns all products
         """
-        return Product.objects.prefetch_related("variants").annotate(
-            overall_price=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "overall_price"
-                )[:1]
-            ),
-            discount_price=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "discount_price"
-                )[:1]
-            ),
-            discount=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "discount"
-                )[:1]
-            ),
-            price=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values("price")[
-                :1
-                ]
-            ),
-            thumbnail=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "thumbnail"
-                )[:1]
-            ),
+        return Product.objects.select_related("shop", "category", "brand").prefetch_related(
+            "variants__images", "variants__attribute_values__attribute"
         )
 
     def get_serializer_class(self):
@@ -212,7 +270,7 @@ class AdminProductViewSet(
         return super().update(request, *args, **kwargs)
 
 
-class AdminPostViewSet(viewsets.ModelViewSet):
+class AdminPostViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset to manage posts
     Allowed: All methods
@@ -224,9 +282,10 @@ class AdminPostViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        self.invalidate_cache(serializer.instance)
 
 
-class AdminPageViewSet(viewsets.ModelViewSet):
+class AdminPageViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset to manage pages
     Allowed: All methods
@@ -234,6 +293,7 @@ class AdminPageViewSet(viewsets.ModelViewSet):
 
     queryset = Page.objects.all()
     permission_classes = [permissions.IsAdminUser]
+    cache_invalidate_related = ("category",)
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -241,7 +301,7 @@ class AdminPageViewSet(viewsets.ModelViewSet):
         return PageSerializer
 
 
-class AdminPageCategoryViewSet(viewsets.ModelViewSet):
+class AdminPageCategoryViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset to manage page categories
     Allowed: All methods
@@ -262,7 +322,7 @@ class AdminPageCategoryViewSet(viewsets.ModelViewSet):
     description="Get all sliders with their slides",
     responses={200: SliderSerializer(many=True)},
 )
-class AdminSliderViewSet(viewsets.ModelViewSet):
+class AdminSliderViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset to manage sliders
     Allowed: All methods
@@ -274,18 +334,20 @@ class AdminSliderViewSet(viewsets.ModelViewSet):
     lookup_field = "slug"
 
 
-class AdminSlideViewSet(viewsets.ModelViewSet):
+class AdminSlideViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset to manage slides
     Allowed: All methods
     """
 
-    queryset = Slide.objects.all()
+    queryset = Slide.objects.select_related("slider")
     serializer_class = SlideSerializer
     permission_classes = [permissions.IsAdminUser]
+    cache_invalidate_related = ("slider",)
 
 
 class AdminSiteSettingsViewSet(
+    InvalidateCacheMixin,
     mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet
 ):
     """
@@ -301,7 +363,37 @@ class AdminSiteSettingsViewSet(
         return SiteSettings.objects.first()
 
 
+@extend_schema(responses={200: AdminStatsSerializer}, tags=["admin"])
+class AdminStatsViewSet(viewsets.ViewSet):
+    """
+    Admin dashboard stats
+    Served from platform counters, see head.counters
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        return Response(AdminStatsSerializer(get_platform_stats()).data)
+
+
+@extend_schema(responses={200: str}, tags=["admin"])
+class AdminMetricsViewSet(viewsets.ViewSet):
+    """
+    Request metrics of all processes in Prometheus text format
+    Collected by common.instrumentation.InstrumentationMiddleware
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+
+    def list(self, request):
+        return Response(
+            get_route_metrics().render(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
+
+
 class AdminProductVariantViewSet(
+    InvalidateCacheMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
@@ -313,6 +405,7 @@ class AdminProductVariantViewSet(
 
     queryset = ProductVariant.objects.all()
     permission_classes = [permissions.IsAdminUser]
+    cache_invalidate_related = ("product", "product.shop")
 
     def get_serializer_class(self):
         if self.action in ["update", "partial_update"]:
@@ -344,7 +437,7 @@ class AdminApplicationViewSet(
 
 
 class AdminTransferMoneyViewSet(mixins.ListModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet):
-    queryset = TransferMoney.objects.all()
+    queryset = TransferMoney.objects.select_related("shop")
     permission_classes = [permissions.IsAdminUser]
 
     def get_serializer_class(self):
@@ -353,7 +446,7 @@ class AdminTransferMoneyViewSet(mixins.ListModelMixin, mixins.UpdateModelMixin,
         return TransferMoneySerializer
 
 
-class AdminOrderViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,mixins.UpdateModelMixin, viewsets.GenericViewSet):
+class AdminOrderViewSet(OrderReadMixin, ExportMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,mixins.UpdateModelMixin, viewsets.GenericViewSet):
     """
     Viewset to manage orders
     Allowed: All methods
@@ -364,18 +457,25 @@ class AdminOrderViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,mixins.
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     filterset_fields = ["status"]
     search_fields = ["name"]
+    cursor_pagination_class = CommonCursorPagination
+    export_fields = [
+        "id",
+        "status",
+        "created_at",
+        "delivered_at",
+        "user__email",
+        "shop__name",
+        "product_variant",
+        "product_variant__product__name",
+        "quantity",
+        "total_price",
+        "payment",
+        "address__city",
+        "address__street",
+    ]
 
     def get_serializer_class(self):
+        if self.action == "list" and not self.is_expanded():
+            return OrderListSerializer
         return OrderSerializer
 
-    def update(self, request, *args, **kwargs):
-        if request.data.get("status") == "delivered":
-            order = self.get_object()
-            order.status = "delivered"
-            order.delivered_at = timezone.now()
-            order.save()
-            check_payment_status.apply_async(
-                args=[order.id], countdown=60 * 60 * 24 * 3
-            )
-        return super().update(request, *args, **kwargs)
-
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Order
+from .models import DailySales, Order
 
 admin.site.register(Order)
+admin.site.register(DailySales)
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.rollups import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily sales rollups from orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Rebuild only last days, all rollups are rebuilt by default",
+        )
+
+    def handle(self, *args, **options):
+        date_from = None
+        if options["days"] is not None:
+            date_from = timezone.localdate() - timedelta(days=options["days"])
+        rows = rebuild_daily_sales(date_from=date_from)
+        self.stdout.write(f"Daily sales rebuilt, {rows} rows")
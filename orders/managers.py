@@ -0,0 +1,36 @@
+from django.db import models
+from django.db.models import Prefetch
+
+
+class OrderQuerySet(models.QuerySet):
+    """
+    Custom queryset for orders
+    """
+
+    def for_listing(self):
+        """
+        Load everything OrderListSerializer renders with joins
+        """
+        return self.select_related("shop", "address", "product_variant__product")
+
+    def with_details(self):
+        """
+        Load everything OrderSerializer renders
+        Number of queries doesn't depend on orders count
+        """
+        from attributes.models import AttributeValue
+
+        return self.select_related(
+            "user",
+            "shop__user",
+            "address",
+            "product_variant__product__shop",
+            "product_variant__product__category",
+            "product_variant__product__brand",
+        ).prefetch_related(
+            "product_variant__images",
+            Prefetch(
+                "product_variant__attribute_values",
+                queryset=AttributeValue.objects.select_related("attribute"),
+            ),
+        )
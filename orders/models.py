@@ -1,8 +1,12 @@
 import uuid
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from .managers import OrderQuerySet
+from .rollups import record_sale
+
 
 class Order(models.Model):
     """
@@ -52,26 +56,141 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
 
+    # shop is credited for orders in these statuses
+    CREDITED_STATUSES = {"paid", "ready", "delivering", "delivered", "completed"}
+
+    objects = OrderQuerySet.as_manager()
+    _loaded_status = None
+
     def __str__(self):
         return f"{self.user} - {self.shop}"
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # range scans of orders.tasks.complete_delivered_orders
+            models.Index(
+                fields=["status", "delivered_at"], name="order_status_delivered_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.status
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or "status" in fields:
+            self._loaded_status = self.status
+
+    def is_credited(self, status):
+        return status in self.CREDITED_STATUSES
+
+    def get_shop_amount(self):
+        """
+        Amount shop earns for order, tax stays with the platform
+        """
+        return self.total_price - self.product_variant.tax_price * self.quantity
+
+    def get_credited_amount(self):
+        """
+        Amount of the last credit of order, refunds reverse it exactly
+        """
+        from payments.models import ShopLedgerEntry
 
+        amount = (
+            ShopLedgerEntry.objects.filter(order=self, kind="order")
+            .order_by("-pk")
+            .values_list("amount", flat=True)
+            .first()
+        )
+        return self.get_shop_amount() if amount is None else amount
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
-        self.total_price = self.product_variant.discount_price * self.quantity
-        if self.status == "delivered":
+        from head.counters import GMV, get_order_status_counter, increment
+
+        # price is frozen at creation, ledger and rollups hold amounts derived from it
+        if self._state.adding:
+            self.total_price = self.product_variant.discount_price * self.quantity
+        if self.status == "delivered" and self.delivered_at is None:
             self.delivered_at = timezone.now()
-        if self.status == "paid":
-            from payments.models import TransferMoney
-
-            tax = self.product_variant.tax_price * self.quantity
-            TransferMoney.objects.create(
-                payment=self.payment,
-                shop=self.shop,
-                amount=self.total_price,
-                tax=tax,
-            )
-        if self.status == "payment_error":
-            self.payment.money_transfer.delete()
+        credited = self.is_credited(self.status)
+        was_credited = self.is_credited(self._loaded_status)
         super().save(*args, **kwargs)
+        if credited != was_credited:
+            self.record_ledger_entry(credited)
+            record_sale(self, 1 if credited else -1)
+        if self.status != self._loaded_status:
+            deltas = {
+                get_order_status_counter(self.status): 1,
+                GMV: (credited - was_credited) * self.total_price,
+            }
+            if self._loaded_status is not None:
+                deltas[get_order_status_counter(self._loaded_status)] = -1
+            increment(deltas)
+        self._loaded_status = self.status
+
+    def record_ledger_entry(self, credited):
+        """
+        Credit shop when order is paid, refund when paid order is reverted
+        """
+        from payments.models import TransferMoney, record_entry
+
+        amount = self.get_shop_amount() if credited else self.get_credited_amount()
+        if credited:
+            if self.payment_id is not None:
+                TransferMoney.objects.create(
+                    payment_id=self.payment_id,
+                    shop_id=self.shop_id,
+                    amount=self.total_price,
+                    tax=self.total_price - amount,
+                )
+            record_entry(self.shop_id, "order", amount, order=self)
+        else:
+            # confirmed transfers are already paid out, the refund debit covers them
+            transfer = (
+                TransferMoney.objects.filter(
+                    payment_id=self.payment_id,
+                    shop_id=self.shop_id,
+                    amount=self.total_price,
+                )
+                .filter(Q(confirm_photo="") | Q(confirm_photo__isnull=True))
+                .first()
+            )
+            if transfer is not None:
+                transfer.delete()
+            record_entry(self.shop_id, "refund", -amount, order=self)
+
+
+class DailySales(models.Model):
+    """
+    Daily sales rollup of shop product variant
+    Counts orders in Order.CREDITED_STATUSES by their creation date
+    """
+
+    shop = models.ForeignKey(
+        "shops.Shop", on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    product_variant = models.ForeignKey(
+        "products.ProductVariant",
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    units = models.IntegerField(default=0)
+    orders = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.shop_id} {self.product_variant_id} {self.date}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["shop", "date", "product_variant"],
+                name="daily_sales_unique",
+            )
+        ]
@@ -0,0 +1,123 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def record_sale(order, sign):
+    """
+    Add order to daily sales rollup of its shop, sign -1 removes it
+    Removal subtracts what was added, total_price is frozen at order creation
+    and the day comes from created_at
+    """
+    from .models import DailySales
+
+    key = {
+        "shop_id": order.shop_id,
+        "product_variant_id": order.product_variant_id,
+        "date": timezone.localdate(order.created_at),
+    }
+    rows = DailySales.objects.filter(**key)
+    changes = {
+        "revenue": F("revenue") + sign * order.total_price,
+        "units": F("units") + sign * order.quantity,
+        "orders": F("orders") + sign,
+    }
+    if not rows.update(**changes):
+        DailySales.objects.get_or_create(**key)
+        rows.update(**changes)
+
+
+@transaction.atomic
+def rebuild_daily_sales(date_from=None, date_to=None):
+    """
+    Recalculate daily sales rollup of orders created in date range
+    Return number of rollup rows
+    """
+    from .models import DailySales, Order
+
+    orders = Order.objects.filter(status__in=Order.CREDITED_STATUSES)
+    rollups = DailySales.objects.all()
+    if date_from is not None:
+        orders = orders.filter(created_at__date__gte=date_from)
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to is not None:
+        orders = orders.filter(created_at__date__lte=date_to)
+        rollups = rollups.filter(date__lte=date_to)
+
+    rows = (
+        orders.annotate(date=TruncDate("created_at"))
+        .order_by()
+        .values("shop", "product_variant", "date")
+        .annotate(revenue=Sum("total_price"), units=Sum("quantity"), orders=Count("pk"))
+    )
+    rollups.delete()
+    return len(
+        DailySales.objects.bulk_create(
+            (
+                DailySales(
+                    shop_id=row["shop"],
+                    product_variant_id=row["product_variant"],
+                    date=row["date"],
+                    revenue=row["revenue"],
+                    units=row["units"],
+                    orders=row["orders"],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+    )
+
+
+SALES_GROUPS = {
+    "day": {"date": "date"},
+    "product": {
+        "product": "product_variant__product",
+        "name": "product_variant__product__name",
+    },
+    "category": {
+        "category": "product_variant__product__category",
+        "name": "product_variant__product__category__name",
+    },
+}
+
+
+def get_sales_totals(row):
+    revenue = row["revenue"] or 0
+    orders = row["orders"] or 0
+    return {
+        "revenue": revenue,
+        "units": row["units"] or 0,
+        "orders": orders,
+        "average_order_value": round(revenue / orders, 2) if orders else 0,
+    }
+
+
+def get_sales_analytics(shop, date_from, date_to, group_by="day"):
+    """
+    Return sales totals of shop in date range grouped by day, product or category
+    Only rollup rows are read, so the cost doesn't depend on number of orders
+    """
+    from .models import DailySales
+
+    rollups = DailySales.objects.filter(
+        shop=shop, date__gte=date_from, date__lte=date_to
+    ).order_by()
+    sums = {
+        "revenue": Sum("revenue"),
+        "units": Sum("units"),
+        "orders": Sum("orders"),
+    }
+    fields = SALES_GROUPS[group_by]
+    rows = rollups.values(*fields.values()).annotate(**sums).order_by(*fields.values())
+    return {
+        "totals": get_sales_totals(rollups.aggregate(**sums)),
+        "results": [
+            {
+                **{name: row[lookup] for name, lookup in fields.items()},
+                **get_sales_totals(row),
+            }
+            for row in rows
+        ],
+    }
@@ -1,16 +1,22 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from django.conf import settings
 from django.db.transaction import atomic
+from django.utils import timezone
 
 from payments.models import Payment
-from products.serializers import ProductSerializer, ProductVariantSerializer
+from products.serializers import (
+    ProductSerializer,
+    ProductVariantSerializer,
+    ShopProductSerializer,
+)
 from shops.serializers import ShopSerializer
 from users.serializers import AddressSerializer, CustomerSerializer
-import redis
-from django.conf import settings
-from redis.exceptions import LockError
 from products.models import ProductVariant
 
 from .models import Order
+from .rollups import SALES_GROUPS
 
 
 class OrderInfoSerializer(serializers.ModelSerializer):
@@ -57,6 +63,40 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
+class OrderListSerializer(serializers.ModelSerializer):
+    """
+    Compact order serializer for lists
+    Variant and product are returned as ids, name and thumbnail
+    """
+
+    shop = ShopProductSerializer(read_only=True)
+    product = serializers.ReadOnlyField(source="product_variant.product_id")
+    product_name = serializers.ReadOnlyField(source="product_variant.product.name")
+    thumbnail = serializers.ImageField(
+        source="product_variant.thumbnail", read_only=True
+    )
+    address = AddressSerializer(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "user",
+            "shop",
+            "created_at",
+            "total_price",
+            "status",
+            "delivered_at",
+            "product_variant",
+            "product",
+            "product_name",
+            "thumbnail",
+            "quantity",
+            "address",
+            "payment",
+        ]
+
+
 class CreateOrderSerializer(serializers.ModelSerializer):
     """
     Order serializers for create only
@@ -84,24 +124,55 @@ class CreateOrderSerializer(serializers.ModelSerializer):
 
     @atomic
     def create(self, validated_data):
-        r = redis.Redis(
-            host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB
-        )
-        product_variant:ProductVariant = validated_data["product_variant"]
-        order = super().create(validated_data)
-        lock = r.lock(f"product_variant_{product_variant.id}_quantity", timeout=1)
-        try:
-            if lock.acquire():
-                stock = ProductVariant.objects.get(id=product_variant.id).stock
-                if validated_data["quantity"] > stock:
-                    raise serializers.ValidationError(
-                        "Not enough stock for this product")
-                product_variant.stock -= validated_data["quantity"]
-                product_variant.save()
-
-        except LockError:
-            raise serializers.ValidationError("Lock error")
-        finally:
-            lock.release()
-
-        return order
\ No newline at end of file
+        reserved = ProductVariant.objects.filter(
+            pk=validated_data["product_variant"].pk
+        ).reserve_stock(validated_data["quantity"])
+        if not reserved:
+            raise serializers.ValidationError("Not enough stock for this product")
+        return super().create(validated_data)
+
+
+class SalesAnalyticsQuerySerializer(serializers.Serializer):
+    """
+    Date range and grouping of shop analytics, last 30 days by default
+    """
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(choices=list(SALES_GROUPS), default="day")
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", timezone.localdate())
+        attrs.setdefault("date_from", attrs["date_to"] - timedelta(days=29))
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must be before date_to")
+        if attrs["date_to"] - attrs["date_from"] >= timedelta(
+            days=settings.SALES_ANALYTICS_MAX_DAYS
+        ):
+            raise serializers.ValidationError(
+                f"Date range must be at most {settings.SALES_ANALYTICS_MAX_DAYS} days"
+            )
+        return attrs
+
+
+class SalesTotalsSerializer(serializers.Serializer):
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField()
+    average_order_value = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class SalesGroupSerializer(SalesTotalsSerializer):
+    date = serializers.DateField(required=False)
+    product = serializers.IntegerField(required=False)
+    category = serializers.UUIDField(required=False)
+    name = serializers.CharField(required=False)
+
+
+class SalesAnalyticsSerializer(serializers.Serializer):
+    """
+    Shop analytics serializer to read only
+    """
+
+    totals = SalesTotalsSerializer()
+    results = SalesGroupSerializer(many=True)
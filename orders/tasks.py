@@ -1,8 +1,55 @@
-from .models import Order
-from payments.models import TransferMoney
 from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
+from head.counters import get_order_status_counter, increment
+
+from .models import Order
+from .rollups import rebuild_daily_sales
+
+
+@shared_task
+def complete_delivered_orders(days=None, chunk_size=1000):
+    """
+    Complete orders delivered more than ORDER_COMPLETE_AFTER_DAYS days ago
+    Orders are updated in chunks, the status is checked again in UPDATE,
+    so concurrent runs don't complete an order twice.
+    Return number of completed orders
+    """
+    if days is None:
+        days = settings.ORDER_COMPLETE_AFTER_DAYS
+    delivered = Order.objects.filter(
+        status="delivered", delivered_at__lte=timezone.now() - timedelta(days=days)
+    )
+    completed = 0
+    while True:
+        pks = list(
+            delivered.order_by("delivered_at").values_list("pk", flat=True)[:chunk_size]
+        )
+        if not pks:
+            return completed
+        with transaction.atomic():
+            updated = Order.objects.filter(pk__in=pks, status="delivered").update(
+                status="completed"
+            )
+            increment(
+                {
+                    get_order_status_counter("delivered"): -updated,
+                    get_order_status_counter("completed"): updated,
+                }
+            )
+        completed += updated
+
 
-def check_payment_status(order):
-    order.save()
+@shared_task
+def rebuild_recent_daily_sales(days=None):
+    """
+    Rebuild daily sales rollup of last SALES_ROLLUP_REBUILD_DAYS days
+    Fixes rollups of orders changed with bulk updates
+    """
+    if days is None:
+        days = settings.SALES_ROLLUP_REBUILD_DAYS
+    return rebuild_daily_sales(date_from=timezone.localdate() - timedelta(days=days))
@@ -1,13 +1,43 @@
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework import mixins, permissions
 from rest_framework.viewsets import GenericViewSet
 
+from common.pagination import CommonCursorPagination
 from core.permissions import HasShop, IsOwner
+from core.principals import get_shop_id
 from .models import Order
-from .serializers import OrderSerializer, CreateOrderSerializer
+from .serializers import OrderListSerializer, OrderSerializer, CreateOrderSerializer
+
+LIST_SCHEMA = extend_schema(
+    description="Compact orders, expand=true returns full orders",
+    parameters=[OpenApiParameter("expand", OpenApiTypes.BOOL)],
+    responses={200: OrderListSerializer},
+    tags=["Orders"],
+)
+
+
+class OrderReadMixin:
+    """
+    Lists are compact unless ?expand=true, related objects
+    are loaded in a constant number of queries
+    """
+
+    expand_query_param = "expand"
+
+    def is_expanded(self):
+        if self.action != "list":
+            return True
+        return self.request.query_params.get(self.expand_query_param) in ("1", "true")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.is_expanded():
+            return queryset.with_details()
+        return queryset.for_listing()
 
 
+@extend_schema_view(list=LIST_SCHEMA)
 @extend_schema(
     description="Create order",
     parameters=[
@@ -18,6 +48,7 @@ from .serializers import OrderSerializer, CreateOrderSerializer
     tags=["Orders"],
 )
 class OrderViewSet(
+    OrderReadMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
@@ -33,6 +64,7 @@ class OrderViewSet(
     permission_classes = [
         permissions.IsAuthenticated,
     ]
+    cursor_pagination_class = CommonCursorPagination
 
     def get_queryset(self):
         """
@@ -41,9 +73,12 @@ class OrderViewSet(
         return Order.objects.filter(user=self.request.user)
 
     def get_serializer_class(self):
+        if self.action == "list" and not self.is_expanded():
+            return OrderListSerializer
         return OrderSerializer
 
 
+@extend_schema_view(list=LIST_SCHEMA)
 @extend_schema(
     description="Viewset for Shop's orders",
     parameters=[
@@ -53,6 +88,7 @@ class OrderViewSet(
     tags=["Orders"],
 )
 class ShopOrderViewSet(
+    OrderReadMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -64,6 +100,7 @@ class ShopOrderViewSet(
     """
 
     permission_classes = (permissions.IsAuthenticated, HasShop, IsOwner)
+    cursor_pagination_class = CommonCursorPagination
 
     def get_queryset(self):
         """
@@ -71,11 +108,13 @@ class ShopOrderViewSet(
         """
         return (
             Order.objects.all()
-            .filter(shop=self.request.user.shop)
+            .filter(shop_id=get_shop_id(self.request.user))
             .exclude(status__in=["payment_error", "pending"])
         )
 
     def get_serializer_class(self):
         if self.action == "create":
             return CreateOrderSerializer(context={"request": self.request})
+        if self.action == "list" and not self.is_expanded():
+            return OrderListSerializer
         return OrderSerializer
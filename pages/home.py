@@ -0,0 +1,84 @@
+from django.core.cache import cache
+
+from common.cache import get_tag_versions, make_tag
+from common.instrumentation import record_cache_access
+from posts.models import Post
+from posts.serializers import PostSerializer
+from products.models import Brand, Category, Product
+from products.serializers import BrandSerializer, CategorySerializer, ProductSerializer
+from sliders.models import Slide, Slider
+from sliders.serializers import SingleSliderSerializer
+
+from .models import SiteSettings
+from .serializers import SiteSettingsSerializer
+
+HOME_CACHE_KEY = "home_payload"
+HOME_LOCK_KEY = "home_payload:lock"
+# rebuild is scheduled once per lock timeout while payload is stale
+HOME_LOCK_TIMEOUT = 60
+HOME_PRODUCTS_LIMIT = 20
+HOME_POSTS_LIMIT = 6
+HOME_MODELS = [Slider, Slide, Category, Brand, Product, Post, SiteSettings]
+
+
+def get_home_tags():
+    return {make_tag(model) for model in HOME_MODELS}
+
+
+def build_home_payload():
+    """
+    Serialize all blocks of storefront home page
+    Built without request, so file fields have relative urls
+    """
+    site_settings = SiteSettings.objects.first()
+    return {
+        "sliders": SingleSliderSerializer(
+            Slider.objects.prefetch_related("slides"), many=True
+        ).data,
+        "categories": CategorySerializer(
+            Category.objects.filter(featured=True).prefetch_related("attributes"),
+            many=True,
+        ).data,
+        "brands": BrandSerializer(Brand.objects.filter(featured=True), many=True).data,
+        "products": ProductSerializer(
+            Product.objects.filter(featured=True)
+            .select_related("shop", "category", "brand")
+            .order_by("-created_at")[:HOME_PRODUCTS_LIMIT],
+            many=True,
+        ).data,
+        "posts": PostSerializer(Post.objects.all()[:HOME_POSTS_LIMIT], many=True).data,
+        "settings": SiteSettingsSerializer(site_settings).data
+        if site_settings is not None
+        else None,
+    }
+
+
+def refresh_home_payload():
+    """
+    Rebuild home payload and store it without expiration
+    Tag versions are read before building, so changes made meanwhile
+    mark the new payload stale
+    """
+    versions = get_tag_versions(get_home_tags())
+    payload = build_home_payload()
+    cache.set(HOME_CACHE_KEY, {"value": payload, "tags": versions}, timeout=None)
+    cache.delete(HOME_LOCK_KEY)
+    return payload
+
+
+def get_home_payload():
+    """
+    Return cached home payload, stale payload is returned while it is rebuilt
+    in background, payload is built in request only on cold cache
+    """
+    from .tasks import refresh_home
+
+    entry = cache.get(HOME_CACHE_KEY)
+    record_cache_access(entry is not None)
+    if entry is None:
+        return refresh_home_payload()
+    if get_tag_versions(entry["tags"]) != entry["tags"] and cache.add(
+        HOME_LOCK_KEY, True, HOME_LOCK_TIMEOUT
+    ):
+        refresh_home.delay()
+    return entry["value"]
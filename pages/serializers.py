@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from posts.serializers import PostSerializer
+from products.serializers import BrandSerializer, CategorySerializer, ProductSerializer
+from sliders.serializers import SingleSliderSerializer
 from .models import Page, PageCategory, SiteSettings
 
 
@@ -32,3 +35,16 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = SiteSettings
         fields = "__all__"
+
+
+class HomeSerializer(serializers.Serializer):
+    """
+    Storefront home page blocks to read only
+    """
+
+    sliders = SingleSliderSerializer(many=True)
+    categories = CategorySerializer(many=True)
+    brands = BrandSerializer(many=True)
+    products = ProductSerializer(many=True)
+    posts = PostSerializer(many=True)
+    settings = SiteSettingsSerializer(allow_null=True)
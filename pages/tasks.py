@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from .home import refresh_home_payload
+
+
+@shared_task
+def refresh_home():
+    """
+    Rebuild cached payload of storefront home page
+    """
+    refresh_home_payload()
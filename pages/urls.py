@@ -1,7 +1,7 @@
 from django.urls import include, path
 
 from .routers import router
-from .views import SiteSettingsViewSet
+from .views import HomeViewSet, SiteSettingsViewSet
 
 urlpatterns = [
     path(
@@ -12,5 +12,6 @@ urlpatterns = [
             }
         ),
     ),
+    path("home/", HomeViewSet.as_view({"get": "list"}), name="home"),
     path("", include(router.urls)),
 ]
@@ -1,8 +1,17 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, permissions, viewsets
+from rest_framework.response import Response
 
+from common.cache import CachedRetrieveMixin
+
+from .home import get_home_payload
 from .models import Page, PageCategory, SiteSettings
-from .serializers import PageCategorySerializer, PageSerializer, SiteSettingsSerializer
+from .serializers import (
+    HomeSerializer,
+    PageCategorySerializer,
+    PageSerializer,
+    SiteSettingsSerializer,
+)
 
 
 @extend_schema(
@@ -10,7 +19,9 @@ from .serializers import PageCategorySerializer, PageSerializer, SiteSettingsSer
     responses={200: PageCategorySerializer},
     tags=["All"],
 )
-class PageCategoriesViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class PageCategoriesViewSet(
+    CachedRetrieveMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
     """
     Pages and categories to get only
     """
@@ -25,7 +36,9 @@ class PageCategoriesViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     responses={200: PageSerializer},
     tags=["All"],
 )
-class PageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class PageViewSet(
+    CachedRetrieveMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
     """
     Page viewset to read only
     """
@@ -33,6 +46,7 @@ class PageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Page.objects.all()
     serializer_class = PageSerializer
     permission_classes = [permissions.AllowAny]
+    cache_related_fields = ("category",)
 
 
 @extend_schema(
@@ -40,7 +54,9 @@ class PageViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     responses={200: SiteSettingsSerializer},
     tags=["All"],
 )
-class SiteSettingsViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class SiteSettingsViewSet(
+    CachedRetrieveMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
     """
     SiteSettings viewset to get all SiteSettings
     Only get method allowed
@@ -52,3 +68,20 @@ class SiteSettingsViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
 
     def get_object(self):
         return SiteSettings.objects.first()
+
+
+@extend_schema(
+    description="Storefront home page blocks in one response",
+    responses={200: HomeSerializer},
+    tags=["All"],
+)
+class HomeViewSet(viewsets.ViewSet):
+    """
+    Home page viewset to get only
+    Payload is precomputed in cache, see pages.home
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request):
+        return Response(get_home_payload())
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Payment, TransferMoney
+from .models import Payment, ShopBalance, ShopLedgerEntry, TransferMoney
 
 admin.site.register(Payment)
 admin.site.register(TransferMoney)
+admin.site.register(ShopBalance)
+admin.site.register(ShopLedgerEntry)
@@ -0,0 +1,30 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django_filters.rest_framework import FilterSet
+import django_filters
+from .models import ShopLedgerEntry
+
+
+def get_day_start(date):
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+class ShopLedgerEntryFilter(FilterSet):
+    """
+    Dates are filtered as half-open created_at range, so the
+    (shop, -created_at) index is used
+    """
+
+    date_from = django_filters.DateFilter(method="filter_date_from")
+    date_to = django_filters.DateFilter(method="filter_date_to")
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(created_at__gte=get_day_start(value))
+
+    def filter_date_to(self, queryset, name, value):
+        return queryset.filter(created_at__lt=get_day_start(value + timedelta(days=1)))
+
+    class Meta:
+        model = ShopLedgerEntry
+        fields = ["date_from", "date_to", "kind"]
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from payments.models import ShopBalance, ShopLedgerEntry
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized shop balances from ledger entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of shops updated per query",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        pks = list(Shop.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(pks), chunk_size):
+            self.rebuild(pks[start : start + chunk_size])
+        self.stdout.write("Shop balances rebuilt")
+
+    @transaction.atomic
+    def rebuild(self, chunk):
+        totals = dict(
+            ShopLedgerEntry.objects.filter(shop__in=chunk)
+            .order_by()
+            .values("shop")
+            .annotate(total=Sum("amount"))
+            .values_list("shop", "total")
+        )
+        existing = set(
+            ShopBalance.objects.filter(shop__in=chunk).values_list("shop", flat=True)
+        )
+        balances = [ShopBalance(shop_id=pk, balance=totals.get(pk, 0)) for pk in chunk]
+        ShopBalance.objects.bulk_update(
+            [balance for balance in balances if balance.shop_id in existing],
+            ["balance"],
+        )
+        ShopBalance.objects.bulk_create(
+            [balance for balance in balances if balance.shop_id not in existing]
+        )
@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from django.db.transaction import atomic
 from django.utils.translation import gettext_lazy as _
 
 from orders.models import Order
@@ -27,19 +28,32 @@ class Payment(models.Model):
         verbose_name=_("Is Verified"), null=True, blank=True
     )
 
+    _loaded_is_verified = None
+
     def __str__(self):
         return f"{self.payment_type} {self.phone_number} {self.bank_account}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_verified = instance.is_verified
+        return instance
+
+    @atomic
     def save(self, *args, **kwargs):
-        if self.is_verified:
-            order = Order.objects.get(payment=self)
-            order.status = "paid"
-            order.save()
-        if self.is_verified is False:
-            order = Order.objects.get(payment=self)
-            order.status = "payment_error"
-            order.save()
+        from head.counters import UNVERIFIED_PAYMENTS, increment
+
+        if self.is_verified is not None:
+            status = "paid" if self.is_verified else "payment_error"
+            # saved one by one, order status changes are recorded in shop ledgers
+            for order in Order.objects.filter(payment=self).exclude(status=status):
+                order.status = status
+                order.save()
+        unverified = self.is_verified is None
+        was_unverified = not self._state.adding and self._loaded_is_verified is None
         super().save(*args, **kwargs)
+        increment({UNVERIFIED_PAYMENTS: unverified - was_unverified})
+        self._loaded_is_verified = self.is_verified
 
 
 class TransferMoney(models.Model):
@@ -58,3 +72,113 @@ class TransferMoney(models.Model):
 
     def __str__(self):
         return f"{self.payment} {self.amount}"
+
+    @atomic
+    def save(self, *args, **kwargs):
+        """
+        Confirmed transfer is a payout, debit it from shop balance once
+        """
+        was_confirmed = (
+            not self._state.adding
+            and TransferMoney.objects.filter(pk=self.pk)
+            .exclude(confirm_photo="")
+            .exclude(confirm_photo=None)
+            .exists()
+        )
+        super().save(*args, **kwargs)
+        if self.confirm_photo and not was_confirmed:
+            record_entry(
+                self.shop_id,
+                "payout",
+                -(self.amount - self.tax),
+                transfer_money=self,
+            )
+
+
+class ShopBalance(models.Model):
+    """
+    Materialized balance of shop, sum of its ledger entries
+    Updated in the same transaction as entries are added
+    """
+
+    shop = models.OneToOneField(
+        "shops.Shop",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance",
+    )
+    balance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name=_("Balance")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.shop_id} {self.balance}"
+
+
+class ShopLedgerEntry(models.Model):
+    """
+    Append-only record of shop balance change
+    Credits are positive, debits negative, balance is running total after entry
+    """
+
+    KINDS = (
+        ("order", "Paid order"),
+        ("refund", "Refund"),
+        ("payout", "Payout"),
+    )
+
+    shop = models.ForeignKey(
+        "shops.Shop", on_delete=models.CASCADE, related_name="ledger_entries"
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    amount = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name=_("Amount")
+    )
+    balance = models.DecimalField(
+        max_digits=12, decimal_places=2, verbose_name=_("Balance after entry")
+    )
+    order = models.ForeignKey(
+        "orders.Order",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    transfer_money = models.ForeignKey(
+        TransferMoney,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.shop_id} {self.kind} {self.amount}"
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["shop", "-created_at"], name="ledger_shop_created_idx")
+        ]
+
+
+@atomic
+def record_entry(shop_id, kind, amount, order=None, transfer_money=None):
+    """
+    Append ledger entry and move shop balance by amount
+    The balance row is updated first, it locks concurrent entries of the shop
+    """
+    balances = ShopBalance.objects.filter(shop_id=shop_id)
+    if not balances.update(balance=models.F("balance") + amount):
+        ShopBalance.objects.get_or_create(shop_id=shop_id)
+        balances.update(balance=models.F("balance") + amount)
+    return ShopLedgerEntry.objects.create(
+        shop_id=shop_id,
+        kind=kind,
+        amount=amount,
+        balance=balances.values_list("balance", flat=True).get(),
+        order=order,
+        transfer_money=transfer_money,
+    )
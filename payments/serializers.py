@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from orders.serializers import OrderSerializer, OrderInfoSerializer
-from .models import Payment, TransferMoney
+from .models import Payment, ShopBalance, ShopLedgerEntry, TransferMoney
 from head.serializers import AdminShopSerializer
 
 
@@ -63,7 +63,7 @@ class CreateTransferMoneySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TransferMoney
-        fields = ["id", "amount", "shop", "tax"]
+        fields = ["id", "amount", "shop", "tax", "confirm_photo"]
 
 
 class TransferMoneySerializer(serializers.ModelSerializer):
@@ -75,3 +75,31 @@ class TransferMoneySerializer(serializers.ModelSerializer):
     class Meta:
         model = TransferMoney
         fields = ["id", "payment", "amount", "shop", "tax", "confirm_photo"]
+
+
+class ShopBalanceSerializer(serializers.ModelSerializer):
+    """
+    Shop balance serializer to read only
+    """
+
+    class Meta:
+        model = ShopBalance
+        fields = ["shop", "balance", "updated_at"]
+
+
+class ShopLedgerEntrySerializer(serializers.ModelSerializer):
+    """
+    Shop ledger entry serializer to read only
+    """
+
+    class Meta:
+        model = ShopLedgerEntry
+        fields = [
+            "id",
+            "kind",
+            "amount",
+            "balance",
+            "order",
+            "transfer_money",
+            "created_at",
+        ]
@@ -1,12 +1,77 @@
+from django.db.models import Prefetch
 from rest_framework import viewsets, mixins, permissions
-from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+from common.exports import ExportMixin
+from common.pagination import CommonCursorPagination
+from orders.models import Order
+from .filters import ShopLedgerEntryFilter
 from .serializers import (
     CreatePaymentSerialzier,
     PaymentSerializer,
+    ShopBalanceSerializer,
+    ShopLedgerEntrySerializer,
     SinglePaymentSerializer,
 
 )
-from .models import Payment, TransferMoney
+from .models import Payment, ShopBalance, ShopLedgerEntry, TransferMoney
+
+
+def with_orders(queryset):
+    """
+    Prefetch orders with everything SinglePaymentSerializer renders
+    """
+    return queryset.prefetch_related(
+        Prefetch("orders", queryset=Order.objects.with_details())
+    )
+
+
+class StatementPagination(CommonCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class ShopLedgerMixin:
+    """
+    Add balance and statement actions of shop returned by get_object
+    Balance is read from materialized row, statement is keyset paginated
+    """
+
+    @extend_schema(
+        description="Get shop balance",
+        request=None,
+        responses={200: ShopBalanceSerializer},
+    )
+    @action(detail=True, methods=["get"])
+    def balance(self, request, *args, **kwargs):
+        shop = self.get_object()
+        balance = ShopBalance.objects.filter(shop=shop).first() or ShopBalance(
+            shop=shop
+        )
+        return Response(ShopBalanceSerializer(balance).data)
+
+    @extend_schema(
+        description="Get shop ledger entries, newest first",
+        request=None,
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE),
+            OpenApiParameter("date_to", OpenApiTypes.DATE),
+            OpenApiParameter("kind", OpenApiTypes.STR),
+        ],
+        responses={200: ShopLedgerEntrySerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def statement(self, request, *args, **kwargs):
+        entries = ShopLedgerEntryFilter(
+            request.query_params,
+            queryset=ShopLedgerEntry.objects.filter(shop=self.get_object()),
+        ).qs
+        paginator = StatementPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        serializer = ShopLedgerEntrySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 @extend_schema(
@@ -27,14 +92,17 @@ class UserPaymentViewSet(
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Payment.objects.filter(user=self.request.user)
+        # payments have no user, they belong to user through orders
+        queryset = Payment.objects.filter(orders__user=self.request.user).distinct()
+        if self.action == "retrieve":
+            return with_orders(queryset)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return SinglePaymentSerializer
         if self.action == "create":
             return CreatePaymentSerialzier
-        super().get_serializer_class()
         return PaymentSerializer
 
 
@@ -43,20 +111,24 @@ class UserPaymentViewSet(
     request=CreatePaymentSerialzier,
     tags=["admin"],
 )
-class AdminPaymentViewSet(viewsets.ModelViewSet):
+class AdminPaymentViewSet(ExportMixin, viewsets.ModelViewSet):
     """Admin payment viewset"""
 
-    permission_classses = [permissions.IsAdminUser]
+    permission_classes = [permissions.IsAdminUser]
     queryset = Payment.objects.all()
+    export_fields = [
+        "id",
+        "payment_type",
+        "phone_number",
+        "bank_account",
+        "is_verified",
+    ]
 
-    def update(self, request, *args, **kwargs):
-        if request.data.get("is_verified"):
-            payment = self.get_object()
-            payment.orders.update(status="paid")
-        else:
-            payment = self.get_object()
-            payment.orders.update(status="payment_error")
-        return super().update(request, *args, **kwargs)
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "retrieve":
+            return with_orders(queryset)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -2,6 +2,7 @@ from rest_framework import mixins, permissions
 from rest_framework.viewsets import GenericViewSet
 from drf_spectacular.utils import extend_schema
 
+from common.cache import CachedResponseMixin
 from posts.models import Post
 from posts.serializers import PostSerializer
 
@@ -11,7 +12,12 @@ from posts.serializers import PostSerializer
     responses={200: PostSerializer},
     tags=["All"],
 )
-class PostViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+class PostViewSet(
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
     """
     Post viewset for list and retrieve
     """
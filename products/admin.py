@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-from .models import Brand, BrandType, Category, Image, Product, ProductVariant
+from .models import (
+    Brand,
+    BrandType,
+    Category,
+    Image,
+    Product,
+    ProductImport,
+    ProductRecommendation,
+    ProductVariant,
+)
 
 for model in [
     Product,
@@ -9,5 +18,7 @@ for model in [
     Image,
     Brand,
     BrandType,
+    ProductImport,
+    ProductRecommendation,
 ]:
     admin.site.register(model)
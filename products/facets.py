@@ -0,0 +1,143 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Value
+from django.db.models.functions import Floor
+
+from attributes.models import AttributeValue
+from common.instrumentation import record_cache_access
+
+from .models import Category
+
+PRICE_BUCKETS = 10
+# params which don't change filtered products
+IGNORED_PARAMS = {
+    "page",
+    "page_size",
+    "cursor",
+    "count",
+    "ordering",
+    "facets",
+    "format",
+}
+
+
+def get_facets_cache_key(query_params):
+    """
+    Cache key of normalized filter params
+    """
+    params = sorted(
+        (key, value)
+        for key in query_params
+        if key not in IGNORED_PARAMS
+        for value in query_params.getlist(key)
+    )
+    digest = hashlib.sha1(urlencode(params).encode()).hexdigest()
+    return f"product_facets:{digest}"
+
+
+def get_brand_facets(queryset):
+    rows = (
+        queryset.values("brand", "brand__name")
+        .annotate(count=Count("pk"))
+        .order_by("brand__name")
+    )
+    return [
+        {"id": row["brand"], "name": row["brand__name"], "count": row["count"]}
+        for row in rows
+    ]
+
+
+def get_category_facets(queryset):
+    """
+    Count products per category including products of subcategories
+    """
+    counts = dict(queryset.values_list("category").annotate(count=Count("pk")))
+    categories = list(Category.objects.values("id", "name", "parent"))
+    parents = {category["id"]: category["parent"] for category in categories}
+    totals = dict.fromkeys(parents, 0)
+    for category_id, count in counts.items():
+        while category_id is not None:
+            totals[category_id] += count
+            category_id = parents[category_id]
+    return [
+        {**category, "count": totals[category["id"]]}
+        for category in categories
+        if totals[category["id"]]
+    ]
+
+
+def get_price_facets(queryset, buckets=PRICE_BUCKETS):
+    """
+    Histogram of overall price with equal width buckets
+    """
+    queryset = queryset.filter(overall_price__isnull=False)
+    bounds = queryset.aggregate(low=Min("overall_price"), high=Max("overall_price"))
+    low, high = bounds["low"], bounds["high"]
+    if low is None:
+        return []
+    width = (high - low) / buckets or 1
+    rows = (
+        queryset.annotate(
+            bucket=Floor(
+                ExpressionWrapper(
+                    (F("overall_price") - Value(low)) / Value(width),
+                    output_field=DecimalField(),
+                )
+            )
+        )
+        .values("bucket")
+        .annotate(count=Count("pk"))
+    )
+    counts = [0] * buckets
+    for row in rows:
+        counts[min(int(row["bucket"]), buckets - 1)] += row["count"]
+    return [
+        {"min": low + width * index, "max": low + width * (index + 1), "count": count}
+        for index, count in enumerate(counts)
+        if count
+    ]
+
+
+def get_attribute_facets(queryset):
+    """
+    Count products per normalized attribute value, label is one of raw values
+    """
+    rows = (
+        AttributeValue.objects.filter(product__in=queryset.values("pk"))
+        .values("attribute", "attribute__name", "normalized_value")
+        .annotate(label=Min("value"), count=Count("product", distinct=True))
+        .order_by("attribute__name", "normalized_value")
+    )
+    return [
+        {
+            "attribute": row["attribute"],
+            "name": row["attribute__name"],
+            "value": row["normalized_value"],
+            "label": row["label"],
+            "count": row["count"],
+        }
+        for row in rows
+    ]
+
+
+def get_product_facets(queryset, query_params):
+    """
+    Return facets of filtered products
+    Cached per normalized filter params for CACHE_TTL
+    """
+    key = get_facets_cache_key(query_params)
+    facets = cache.get(key)
+    record_cache_access(facets is not None)
+    if facets is None:
+        queryset = queryset.order_by()
+        facets = {
+            "brands": get_brand_facets(queryset),
+            "categories": get_category_facets(queryset),
+            "prices": get_price_facets(queryset),
+            "attributes": get_attribute_facets(queryset),
+        }
+        cache.set(key, facets, settings.CACHE_TTL)
+    return facets
@@ -1,13 +1,106 @@
+import uuid
+from collections import defaultdict
+
+from django.db.models import Count, Q
 from django_filters.rest_framework import FilterSet
 import django_filters
-from .models import Product
+
+from attributes.models import Attribute, AttributeValue, normalize_value
+
+from .models import Category, Product
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """
+    Comma separated values filter
+    """
+
+
+def parse_attribute_filters(value):
+    """
+    Parse "color:red,color:blue,size:xl" to attribute name -> normalized values
+    Malformed pairs are skipped
+    """
+    conditions = defaultdict(set)
+    for pair in value.split(","):
+        name, separator, attribute_value = pair.partition(":")
+        if separator and name.strip() and attribute_value.strip():
+            conditions[name.strip().casefold()].add(normalize_value(attribute_value))
+    return conditions
+
+
+def get_attribute_products(conditions):
+    """
+    Return subquery of ids of products matching all attributes with any of
+    their values, or None if some attribute doesn't exist
+    Every (attribute, value) is a range of attribute_value_lookup_idx,
+    values are grouped by product which must match every attribute
+    """
+    attributes = {
+        attribute.name.casefold(): attribute.pk
+        for attribute in Attribute.objects.filter(
+            Q(*[Q(name__iexact=name) for name in conditions], _connector=Q.OR)
+        )
+    }
+    if set(conditions) - set(attributes):
+        return None
+    query = Q(
+        *[
+            Q(attribute=attributes[name], normalized_value__in=values)
+            for name, values in conditions.items()
+        ],
+        _connector=Q.OR,
+    )
+    return (
+        AttributeValue.objects.filter(query)
+        .order_by()
+        .values("product")
+        .annotate(matched=Count("attribute", distinct=True))
+        .filter(matched=len(conditions))
+        .values("product")
+    )
 
 
 class ProductFilter(FilterSet):
     max_price = django_filters.CharFilter(field_name="price", lookup_expr="lte")
     min_price = django_filters.CharFilter(field_name="price", lookup_expr="gte")
-    brand = django_filters.CharFilter(field_name="brand__name", lookup_expr="in")
+    brand = CharInFilter(field_name="brand__name", lookup_expr="in")
+    category = django_filters.CharFilter(
+        method="filter_category",
+        help_text="Category id or slug, products of subcategories are included",
+    )
+    attributes = django_filters.CharFilter(
+        method="filter_attributes",
+        help_text="Comma separated name:value pairs, "
+        "values of one attribute are ORed, attributes are ANDed",
+    )
 
     class Meta:
         model = Product
-        fields = ["max_price", "min_price", "brand"]
+        fields = ["max_price", "min_price", "brand", "category", "attributes"]
+
+    def filter_category(self, queryset, name, value):
+        """
+        Filter by MPTT range of category, whole subtree is one range of tree
+        """
+        try:
+            lookup = {"pk": uuid.UUID(value)}
+        except ValueError:
+            lookup = {"slug": value}
+        category = Category.objects.filter(**lookup).first()
+        if category is None:
+            return queryset.none()
+        return queryset.filter(
+            category__tree_id=category.tree_id,
+            category__lft__gte=category.lft,
+            category__rght__lte=category.rght,
+        )
+
+    def filter_attributes(self, queryset, name, value):
+        conditions = parse_attribute_filters(value)
+        if not conditions:
+            return queryset
+        products = get_attribute_products(conditions)
+        if products is None:
+            return queryset.none()
+        return queryset.filter(pk__in=products)
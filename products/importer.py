@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from attributes.models import Attribute, AttributeValue, normalize_value
+from common.cache import invalidate_tags, make_tag
+from head.counters import LOW_STOCK_VARIANTS, increment, is_low_stock
+
+from .models import Brand, Category, Product, ProductImport, ProductVariant
+from .pricing import calculate_variant_prices
+from .search import get_search_backend
+
+ATTRIBUTE_PREFIX = "attribute."
+# only first errors are stored, error_count has the total
+MAX_ERRORS = 100
+
+
+class ImportRowSerializer(serializers.Serializer):
+    """
+    One product variant row of import file
+    Rows with the same product key are variants of one product,
+    name is used as key if product is empty
+    """
+
+    product = serializers.CharField(max_length=255, required=False)
+    name = serializers.CharField(max_length=100)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    category = serializers.CharField(help_text="Category id or slug")
+    brand = serializers.CharField(help_text="Brand name or slug")
+    unit = serializers.CharField(max_length=100)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    discount = serializers.IntegerField(
+        required=False, allow_null=True, min_value=0, max_value=100
+    )
+    stock = serializers.IntegerField(min_value=0)
+    thumbnail = serializers.CharField(required=False, allow_blank=True, default="")
+    attributes = serializers.DictField(
+        child=serializers.CharField(max_length=100), required=False, default=dict
+    )
+
+
+def read_csv_rows(file):
+    """
+    Yield rows of CSV file, attribute.<name> columns are collected to attributes
+    """
+    for row in csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig")):
+        data, attributes = {}, {}
+        for key, value in row.items():
+            if key is None or value in (None, ""):
+                continue
+            if key.startswith(ATTRIBUTE_PREFIX):
+                attributes[key[len(ATTRIBUTE_PREFIX) :]] = value
+            else:
+                data[key] = value
+        yield {**data, "attributes": attributes}
+
+
+def read_jsonl_rows(file):
+    """
+    Yield objects of JSON Lines file, None for invalid lines
+    """
+    for line in io.TextIOWrapper(file, encoding="utf-8"):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+READERS = {"csv": read_csv_rows, "jsonl": read_jsonl_rows}
+
+
+class ProductImporter:
+    """
+    Stream rows of import file and write them in batches with bulk_create
+    Invalid rows are reported, valid rows of the same batch are still imported
+    """
+
+    def __init__(self, shop, batch_size=1000, on_progress=None):
+        self.shop = shop
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.row_serializer = ImportRowSerializer()
+        self.categories = {}
+        self.brands = {}
+        self.attributes = {}
+        # product key -> (product id, category tax)
+        self.products = {}
+        self.processed_rows = 0
+        self.products_created = 0
+        self.variants_created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def get_stats(self):
+        return {
+            "processed_rows": self.processed_rows,
+            "products_created": self.products_created,
+            "variants_created": self.variants_created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+    def run(self, file, format):
+        self.load_references()
+        batch = []
+        for row in READERS[format](file):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        invalidate_tags({make_tag(Product), make_tag(type(self.shop), self.shop.pk)})
+        return self.get_stats()
+
+    def load_references(self):
+        """
+        Categories and attributes are small, load them once per import
+        """
+        for category in Category.objects.only("id", "slug", "tax"):
+            self.categories[str(category.pk)] = category
+            self.categories[category.slug] = category
+        self.attributes = {
+            attribute.name: attribute for attribute in Attribute.objects.all()
+        }
+
+    def load_brands(self, names):
+        names = set(names) - set(self.brands)
+        if not names:
+            return
+        for brand in Brand.objects.filter(Q(name__in=names) | Q(slug__in=names)):
+            self.brands[brand.name] = brand
+            self.brands[brand.slug] = brand
+
+    def add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def validate_batch(self, rows):
+        """
+        Return validated data of valid rows with resolved references
+        """
+        valid, errors = [], []
+        for index, row in enumerate(rows, start=self.processed_rows + 1):
+            if row is None:
+                errors.append((index, {"non_field_errors": ["Invalid JSON object"]}))
+                continue
+            try:
+                valid.append((index, self.row_serializer.run_validation(row)))
+            except serializers.ValidationError as error:
+                errors.append((index, error.detail))
+
+        self.load_brands(data["brand"] for _, data in valid)
+        resolved = []
+        for index, data in valid:
+            row_errors = {}
+            data["category"] = self.categories.get(data["category"])
+            if data["category"] is None:
+                row_errors["category"] = ["Category not found"]
+            data["brand"] = self.brands.get(data["brand"])
+            if data["brand"] is None:
+                row_errors["brand"] = ["Brand not found"]
+            unknown = set(data["attributes"]) - set(self.attributes)
+            if unknown:
+                row_errors["attributes"] = [
+                    f"Attribute {name} not found" for name in sorted(unknown)
+                ]
+            if row_errors:
+                errors.append((index, row_errors))
+            else:
+                resolved.append(data)
+
+        for index, row_errors in sorted(errors, key=lambda error: error[0]):
+            self.add_error(index, row_errors)
+        return resolved
+
+    @transaction.atomic
+    def import_batch(self, rows):
+        valid = self.validate_batch(rows)
+
+        new_products = {}
+        for data in valid:
+            key = data.get("product") or data["name"]
+            if key not in self.products and key not in new_products:
+                new_products[key] = Product(
+                    shop=self.shop,
+                    name=data["name"],
+                    slug=slugify(f"{self.shop.name}-{data['name']}"),
+                    description=data["description"],
+                    category=data["category"],
+                    brand=data["brand"],
+                    unit=data["unit"],
+                )
+        Product.objects.bulk_create(new_products.values())
+        for key, product in new_products.items():
+            self.products[key] = (product.pk, product.category.tax)
+
+        variants = []
+        for data in valid:
+            product_id, tax = self.products[data.get("product") or data["name"]]
+            discount_price, overall_price, tax_price = calculate_variant_prices(
+                data["price"], data.get("discount"), tax
+            )
+            variants.append(
+                ProductVariant(
+                    product_id=product_id,
+                    price=data["price"],
+                    discount=data.get("discount"),
+                    discount_price=discount_price,
+                    overall_price=overall_price,
+                    tax_price=tax_price,
+                    stock=data["stock"],
+                    status="available" if data["stock"] else "unavailable",
+                    thumbnail=data["thumbnail"],
+                )
+            )
+        ProductVariant.objects.bulk_create(variants)
+        increment(
+            {
+                LOW_STOCK_VARIANTS: sum(
+                    is_low_stock(variant.stock) for variant in variants
+                )
+            }
+        )
+        AttributeValue.objects.bulk_create(
+            AttributeValue(
+                product_variant=variant,
+                product_id=variant.product_id,
+                attribute=self.attributes[name],
+                value=value,
+                normalized_value=normalize_value(value),
+            )
+            for variant, data in zip(variants, valid)
+            for name, value in data["attributes"].items()
+        )
+
+        Product.objects.filter(
+            pk__in={variant.product_id for variant in variants}
+        ).refresh_listing_prices()
+        get_search_backend().index_queryset(
+            Product.objects.filter(
+                pk__in=[product.pk for product in new_products.values()]
+            )
+        )
+
+        self.processed_rows += len(rows)
+        self.products_created += len(new_products)
+        self.variants_created += len(variants)
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+
+def run_import(product_import, batch_size=1000):
+    """
+    Import file of ProductImport, store progress after every batch
+    """
+    imports = ProductImport.objects.filter(pk=product_import.pk)
+    imports.update(status="processing")
+    importer = ProductImporter(
+        product_import.shop,
+        batch_size=batch_size,
+        on_progress=lambda importer: imports.update(**importer.get_stats()),
+    )
+    try:
+        with product_import.file.open("rb") as file:
+            importer.run(file, product_import.format)
+    except Exception:
+        imports.update(status="failed", finished_at=timezone.now())
+        raise
+    imports.update(status="done", finished_at=timezone.now(), **importer.get_stats())
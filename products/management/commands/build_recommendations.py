@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from products.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = "Rebuild product recommendations from completed orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=None,
+            help="Number of recommendations kept per product",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Building product recommendations")
+        count = build_recommendations(top_k=options["top_k"])
+        self.stdout.write(f"Recommendations built for {count} products")
@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import READERS, ProductImporter
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Import products of shop from CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("shop", help="Shop slug")
+        parser.add_argument("path", help="Path to CSV or JSON Lines file")
+        parser.add_argument(
+            "--format",
+            choices=list(READERS),
+            help="File format, taken from file extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows written per batch",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            shop = Shop.objects.get(slug=options["shop"])
+        except Shop.DoesNotExist:
+            raise CommandError(f"Shop {options['shop']} not found")
+        format = options["format"] or os.path.splitext(options["path"])[1][1:].lower()
+        if format not in READERS:
+            raise CommandError(f"Unknown file format {format}")
+
+        importer = ProductImporter(
+            shop,
+            batch_size=options["batch_size"],
+            on_progress=lambda importer: self.stdout.write(
+                f"Processed {importer.processed_rows} rows"
+            ),
+        )
+        with open(options["path"], "rb") as file:
+            stats = importer.run(file, format)
+        for error in stats["errors"]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"Created {stats['products_created']} products and "
+            f"{stats['variants_created']} variants, {stats['error_count']} rows failed"
+        )
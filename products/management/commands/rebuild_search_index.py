@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild product full-text search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of products indexed per query",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        chunk_size = options["chunk_size"]
+        self.stdout.write(f"Rebuilding search index with {type(backend).__name__}")
+        product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[start : start + chunk_size]
+            backend.index_queryset(Product.objects.filter(pk__in=chunk))
+        self.stdout.write(f"Indexed {len(product_ids)} products")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Recalculate denormalized listing prices of products from their variants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of products updated per query",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Refreshing product listing prices")
+        Product.objects.all().refresh_listing_prices(chunk_size=options["chunk_size"])
+        self.stdout.write("Listing prices refreshed")
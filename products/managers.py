@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Case, F, Max, Min, Prefetch, Value, When
+
+LISTING_FIELDS = [
+    "price",
+    "discount",
+    "discount_price",
+    "overall_price",
+    "thumbnail",
+    "min_price",
+    "max_price",
+]
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    Custom queryset for products
+    """
+
+    def with_details(self):
+        """
+        Load everything SingleProductSerializer renders
+        Number of queries doesn't depend on variants, images and reviews count
+        """
+        from attributes.models import AttributeValue
+        from products.models import ProductVariant
+        from reviews.models import Review
+
+        return self.select_related("shop", "brand", "category").prefetch_related(
+            Prefetch(
+                "variants",
+                queryset=ProductVariant.objects.prefetch_related(
+                    "images",
+                    Prefetch(
+                        "attribute_values",
+                        queryset=AttributeValue.objects.select_related("attribute"),
+                    ),
+                ),
+            ),
+            Prefetch(
+                "reviews",
+                queryset=Review.objects.select_related(
+                    "user", "product_variant__product"
+                ),
+            ),
+        )
+
+    def refresh_listing_prices(self, chunk_size=1000):
+        """
+        Recalculate denormalized listing columns from product variants
+        Listing variant is the first variant of product by id
+        """
+        from products.models import ProductVariant
+
+        product_ids = list(self.values_list("pk", flat=True))
+        for start in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[start : start + chunk_size]
+            variants = ProductVariant.objects.filter(product__in=chunk)
+            ranges = {
+                row["product"]: row
+                for row in variants.order_by()
+                .values("product")
+                .annotate(
+                    min_price=Min("overall_price"), max_price=Max("overall_price")
+                )
+            }
+            listing = {}
+            for row in variants.order_by("product", "pk").values(
+                "product",
+                "price",
+                "discount",
+                "discount_price",
+                "overall_price",
+                "thumbnail",
+            ):
+                listing.setdefault(row["product"], row)
+
+            products = []
+            for pk in chunk:
+                row = listing.get(pk, {})
+                products.append(
+                    self.model(
+                        pk=pk,
+                        price=row.get("price"),
+                        discount=row.get("discount"),
+                        discount_price=row.get("discount_price"),
+                        overall_price=row.get("overall_price"),
+                        thumbnail=row.get("thumbnail") or "",
+                        min_price=ranges.get(pk, {}).get("min_price"),
+                        max_price=ranges.get(pk, {}).get("max_price"),
+                    )
+                )
+            self.model.objects.bulk_update(products, LISTING_FIELDS)
+
+
+class ProductVariantQuerySet(models.QuerySet):
+    """
+    Custom queryset for product variants
+    """
+
+    def reserve_stock(self, quantity):
+        """
+        Decrement stock with a single conditional UPDATE
+        Variant becomes unavailable when stock runs out,
+        return False if stock is lower than quantity
+        """
+        from head.counters import LOW_STOCK_VARIANTS, increment
+
+        reserved = self.filter(stock__gte=quantity).update(
+            stock=F("stock") - quantity,
+            status=Case(
+                When(stock=quantity, then=Value("unavailable")),
+                default=F("status"),
+            ),
+        )
+        if reserved:
+            # variants which dropped to low stock threshold with this reservation
+            threshold = settings.LOW_STOCK_THRESHOLD
+            increment(
+                {
+                    LOW_STOCK_VARIANTS: self.filter(
+                        stock__lte=threshold, stock__gt=threshold - quantity
+                    ).count()
+                }
+            )
+        return bool(reserved)
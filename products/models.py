@@ -1,13 +1,18 @@
 import uuid
 from decimal import Decimal
 
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.utils.text import slugify
 from mptt.models import MPTTModel, TreeForeignKey
 
 from core.helpers import PathAndRename
 from shops.models import Shop
 
+from .managers import ProductQuerySet, ProductVariantQuerySet
+from .pricing import calculate_variant_prices
+from .search import get_search_backend
+
 
 class BrandType(models.Model):
     """
@@ -63,7 +68,32 @@ class Category(MPTTModel):
 
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
+        name_changed = self.name_changed()
+        tax_changed = self.tax_changed()
         super().save(*args, **kwargs)
+        if name_changed:
+            get_search_backend().index_queryset(self.products.all())
+        if tax_changed:
+            from .tasks import reprice_variants
+
+            filters = {"product__category": str(self.pk)}
+            transaction.on_commit(lambda: reprice_variants.delay(filters))
+
+    def name_changed(self):
+        """
+        Check saved name differs, products search index contains it
+        """
+        if self._state.adding:
+            return False
+        return type(self).objects.filter(pk=self.pk).exclude(name=self.name).exists()
+
+    def tax_changed(self):
+        """
+        Check saved tax differs, variant prices are calculated with it
+        """
+        if self._state.adding:
+            return False
+        return type(self).objects.filter(pk=self.pk).exclude(tax=self.tax).exists()
 
     class Meta:
         verbose_name = "Category"
@@ -99,7 +129,18 @@ class Brand(models.Model):
 
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
+        name_changed = self.name_changed()
         super().save(*args, **kwargs)
+        if name_changed:
+            get_search_backend().index_queryset(self.products.all())
+
+    def name_changed(self):
+        """
+        Check saved name differs, products search index contains it
+        """
+        if self._state.adding:
+            return False
+        return type(self).objects.filter(pk=self.pk).exclude(name=self.name).exists()
 
     class Meta:
         ordering = ["name"]
@@ -121,9 +162,63 @@ class Product(models.Model):
         default=Decimal(0.0),
         verbose_name="Product rating",
     )
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
     featured = models.BooleanField(default=False, verbose_name="Is featured?")
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # listing columns, copied from the first variant by ProductVariant.save
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Listing price",
+    )
+    discount = models.IntegerField(
+        null=True, editable=False, db_index=True, verbose_name="Listing discount"
+    )
+    discount_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Listing discount price",
+    )
+    overall_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Listing overall price",
+    )
+    min_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Minimal variant price",
+    )
+    max_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        db_index=True,
+        verbose_name="Maximal variant price",
+    )
+    thumbnail = models.ImageField(
+        upload_to=PathAndRename("products/thumbnails/"),
+        blank=True,
+        editable=False,
+        verbose_name="Listing thumbnail",
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -132,6 +227,19 @@ class Product(models.Model):
         slug = self.shop.name + "-" + self.name
         self.slug = slugify(slug)
         super().save(*args, **kwargs)
+        get_search_backend().index_queryset(Product.objects.filter(pk=self.pk))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        get_search_backend().remove_products([pk])
+        return result
+
+    def refresh_listing_price(self):
+        """
+        Copy listing columns from variants without touching other fields
+        """
+        Product.objects.filter(pk=self.pk).refresh_listing_prices()
 
     class Meta:
         ordering = ["name"]
@@ -179,23 +287,109 @@ class ProductVariant(models.Model):
         verbose_name="Product variant thumbnail",
     )
 
+    objects = ProductVariantQuerySet.as_manager()
+    _loaded_stock = None
+
     def __str__(self):
         return self.product.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stock = instance.__dict__.get("stock")
+        return instance
+
     def save(self, *args, **kwargs):
-        if self.discount:
-            self.discount_price = self.price - (self.price * Decimal(self.discount)/Decimal(100))
-        else:
-            self.discount_price = self.price
+        from head.counters import LOW_STOCK_VARIANTS, increment, is_low_stock
 
-        self.overall_price = self.discount_price - (self.discount_price * self.product.category.tax/100)
-        self.tax_price = self.discount_price * self.product.category.tax/100
+        (
+            self.discount_price,
+            self.overall_price,
+            self.tax_price,
+        ) = calculate_variant_prices(
+            self.price, self.discount, self.product.category.tax
+        )
 
         if self.stock == 0:
             self.status = "unavailable"
         super().save(*args, **kwargs)
+        increment(
+            {
+                LOW_STOCK_VARIANTS: is_low_stock(self.stock)
+                - is_low_stock(self._loaded_stock)
+            }
+        )
+        self._loaded_stock = self.stock
+        self.product.refresh_listing_price()
+
+    def delete(self, *args, **kwargs):
+        from head.counters import LOW_STOCK_VARIANTS, increment, is_low_stock
+
+        product = self.product
+        result = super().delete(*args, **kwargs)
+        increment({LOW_STOCK_VARIANTS: -is_low_stock(self._loaded_stock)})
+        product.refresh_listing_price()
+        return result
 
     class Meta:
         ordering = ["product"]
         verbose_name = "Product variant"
         verbose_name_plural = "Product variants"
+
+
+class ProductImport(models.Model):
+    """
+    Bulk import of shop products from CSV or JSON Lines file
+    Progress is updated after every imported batch
+    """
+
+    FORMATS = (("csv", "CSV"), ("jsonl", "JSON Lines"))
+    STATUSES = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    shop = models.ForeignKey(
+        Shop, on_delete=models.CASCADE, related_name="product_imports"
+    )
+    file = models.FileField(upload_to=PathAndRename("products/imports/"))
+    format = models.CharField(max_length=10, choices=FORMATS)
+    status = models.CharField(max_length=20, choices=STATUSES, default="pending")
+    processed_rows = models.IntegerField(default=0)
+    products_created = models.IntegerField(default=0)
+    variants_created = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.shop} - {self.created_at}"
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Product import"
+        verbose_name_plural = "Product imports"
+
+
+class ProductRecommendation(models.Model):
+    """
+    Top products bought by customers who bought the product
+    Built offline by products.recommendations, neighbours is list of
+    [product id, score] ordered by score
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recommendation",
+    )
+    neighbours = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id} {len(self.neighbours)}"
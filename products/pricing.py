@@ -0,0 +1,14 @@
+from decimal import Decimal
+
+
+def calculate_variant_prices(price, discount, tax):
+    """
+    Return discount price, overall price and tax price of variant
+    Tax is taken from category in percents
+    """
+    if discount:
+        discount_price = price - (price * Decimal(discount) / Decimal(100))
+    else:
+        discount_price = price
+    tax_price = discount_price * tax / 100
+    return discount_price, discount_price - tax_price, tax_price
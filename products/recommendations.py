@@ -0,0 +1,91 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+
+from common.cache import invalidate_tags, make_tag
+from orders.models import Order
+
+from .models import ProductRecommendation
+
+# baskets are capped, pairs of a basket grow quadratically
+MAX_BASKET_SIZE = 50
+
+
+def iter_baskets(chunk_size=2000):
+    """
+    Yield sets of products bought by one customer in completed orders
+    Orders are streamed sorted by customer, so one basket is in memory at once
+    """
+    rows = (
+        Order.objects.filter(status="completed")
+        .order_by("user", "-created_at")
+        .values_list("user", "product_variant__product")
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        products = list(dict.fromkeys(product for _, product in group))
+        if len(products) > 1:
+            yield products[:MAX_BASKET_SIZE]
+
+
+def count_cooccurrences(baskets):
+    """
+    Return sparse co-occurrence matrix as product -> Counter of products
+    and number of baskets with every product
+    """
+    pairs = defaultdict(Counter)
+    totals = Counter()
+    for basket in baskets:
+        totals.update(basket)
+        for product in basket:
+            pairs[product].update(basket)
+    for product, counter in pairs.items():
+        del counter[product]
+    return pairs, totals
+
+
+def get_top_neighbours(pairs, totals, top_k):
+    """
+    Keep top_k neighbours of every product by cosine similarity of baskets
+    """
+    return {
+        product: [
+            [neighbour, round(score, 4)]
+            for score, neighbour in heapq.nlargest(
+                top_k,
+                (
+                    (count / math.sqrt(totals[product] * totals[neighbour]), neighbour)
+                    for neighbour, count in counter.items()
+                ),
+                # equal scores are ordered by product id
+                key=lambda item: (item[0], -item[1]),
+            )
+        ]
+        for product, counter in pairs.items()
+    }
+
+
+def build_recommendations(top_k=None, chunk_size=2000):
+    """
+    Rebuild recommendations of all products from completed orders
+    Return number of products with recommendations
+    """
+    if top_k is None:
+        top_k = settings.PRODUCT_RECOMMENDATIONS_TOP_K
+    pairs, totals = count_cooccurrences(iter_baskets(chunk_size))
+    neighbours = get_top_neighbours(pairs, totals, top_k)
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        ProductRecommendation.objects.bulk_create(
+            (
+                ProductRecommendation(product_id=product, neighbours=items)
+                for product, items in neighbours.items()
+            ),
+            batch_size=1000,
+        )
+    invalidate_tags({make_tag(ProductRecommendation)})
+    return len(neighbours)
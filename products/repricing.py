@@ -0,0 +1,52 @@
+from common.cache import invalidate_tags, make_tag
+
+from .models import Product, ProductVariant
+from .pricing import calculate_variant_prices
+
+PRICE_FIELDS = ["discount_price", "overall_price", "tax_price"]
+
+
+def reprice_variants(queryset, discount=None, chunk_size=1000):
+    """
+    Recalculate derived prices of variants in chunks ordered by id
+    Columns of a chunk are loaded at once, prices are computed with Decimal
+    and written back with bulk_update, discount replaces variant discounts
+    when passed. Return number of repriced variants
+    """
+    fields = PRICE_FIELDS if discount is None else PRICE_FIELDS + ["discount"]
+    queryset = queryset.order_by("pk")
+    last_pk, total = None, 0
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(
+            chunk.values_list(
+                "pk", "product", "price", "discount", "product__category__tax"
+            )[:chunk_size]
+        )
+        if not rows:
+            return total
+        pks, product_ids, prices, discounts, taxes = zip(*rows)
+        if discount is not None:
+            discounts = [discount] * len(rows)
+
+        derived = map(calculate_variant_prices, prices, discounts, taxes)
+        variants = [
+            ProductVariant(
+                pk=pk,
+                discount=variant_discount,
+                discount_price=discount_price,
+                overall_price=overall_price,
+                tax_price=tax_price,
+            )
+            for pk, variant_discount, (discount_price, overall_price, tax_price) in zip(
+                pks, discounts, derived
+            )
+        ]
+        ProductVariant.objects.bulk_update(variants, fields)
+
+        product_ids = set(product_ids)
+        Product.objects.filter(pk__in=product_ids).refresh_listing_prices()
+        invalidate_tags(
+            {make_tag(Product)} | {make_tag(Product, pk) for pk in product_ids}
+        )
+        last_pk, total = pks[-1], total + len(rows)
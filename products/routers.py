@@ -6,6 +6,7 @@ from .views import (
     BrandViewSet,
     CategoryViewSet,
     ImageViewSet,
+    ProductImportViewSet,
     ProductVariantViewSet,
     ProductViewSet,
     ShopProductViewSet,
@@ -18,6 +19,7 @@ router.register(
     r"products/variants/attributes", AttributeValueViewset, basename="attributes"
 )
 router.register(r"products/variants", ProductVariantViewSet, basename="variant")
+router.register(r"products/imports", ProductImportViewSet, basename="import")
 router.register(r"products", ShopProductViewSet, basename="product")
 # routes for all users
 router.register(r"shops/categories", CategoryViewSet, basename="category")
@@ -0,0 +1,196 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+SEARCH_INDEX = "product_search_vector_idx"
+DEFAULT_BACKENDS = {
+    "postgresql": "products.search.PostgresSearchBackend",
+    "sqlite": "products.search.SQLiteSearchBackend",
+}
+
+
+def get_search_terms(query):
+    """
+    Split query to words, operators of search syntax are dropped
+    """
+    return re.findall(r"\w+", query)
+
+
+class SimpleSearchBackend:
+    """
+    Fallback backend for databases without full-text search
+    Matches every word with icontains and doesn't rank results
+    """
+
+    def search(self, queryset, query):
+        for term in get_search_terms(query):
+            queryset = queryset.filter(name__icontains=term)
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    def empty(self, queryset):
+        return queryset.annotate(
+            search_rank=Value(0, output_field=IntegerField())
+        ).none()
+
+    def index_queryset(self, queryset):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+
+class PostgresSearchBackend(SimpleSearchBackend):
+    """
+    Backend on Product.search_vector tsvector column with GIN index
+    Name is weighted higher than brand, category and description
+    """
+
+    def get_config(self):
+        return settings.PRODUCT_SEARCH_CONFIG
+
+    def search(self, queryset, query):
+        terms = get_search_terms(query)
+        if not terms:
+            return self.empty(queryset)
+        search_query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config=self.get_config(),
+            search_type="raw",
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    def index_queryset(self, queryset):
+        from products.models import Brand, Category
+
+        config = self.get_config()
+        brand_name = Brand.objects.filter(pk=OuterRef("brand_id")).values("name")[:1]
+        category_name = Category.objects.filter(pk=OuterRef("category_id")).values(
+            "name"
+        )[:1]
+        queryset.update(
+            search_vector=SearchVector("name", weight="A", config=config)
+            + SearchVector(Subquery(brand_name), weight="B", config=config)
+            + SearchVector(Subquery(category_name), weight="B", config=config)
+            + SearchVector("description", weight="C", config=config)
+        )
+
+
+class SQLiteSearchBackend(SimpleSearchBackend):
+    """
+    Backend on FTS5 virtual table for local and benchmark runs
+    Matches are filtered with a subquery, so other filters apply to all of them
+    """
+
+    table = "products_product_fts"
+
+    def ensure_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(name, description, brand, category)"
+        )
+
+    def search(self, queryset, query):
+        terms = get_search_terms(query)
+        if not terms:
+            return self.empty(queryset)
+        match = " ".join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+        product_table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match]
+            )
+        ).annotate(
+            # bm25 is lower for better matches
+            search_rank=RawSQL(
+                f"SELECT -bm25({self.table}, 10.0, 1.0, 4.0, 4.0) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s "
+                f"AND {self.table}.rowid = {product_table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    def index_queryset(self, queryset):
+        rows = [
+            (
+                product.pk,
+                product.name,
+                product.description,
+                product.brand.name,
+                product.category.name,
+            )
+            for product in queryset.select_related("brand", "category")
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            self.delete_rows(cursor, [row[0] for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, name, description, brand, category) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            self.ensure_table(cursor)
+            self.delete_rows(cursor, product_ids)
+
+    def delete_rows(self, cursor, product_ids):
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", product_ids
+        )
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Create GIN index of search vectors after migrate on postgres
+    Index isn't in Product.Meta, so migrations don't depend on the database
+    """
+    database = connections[using]
+    if database.vendor != "postgresql":
+        return
+    with database.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON products_product "
+            "USING gin (search_vector)"
+        )
+
+
+def get_search_backend():
+    """
+    Return backend from PRODUCT_SEARCH_BACKEND setting
+    or the default one for current database
+    """
+    path = settings.PRODUCT_SEARCH_BACKEND or DEFAULT_BACKENDS.get(
+        connection.vendor, "products.search.SimpleSearchBackend"
+    )
+    return import_string(path)()
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Search products with full-text search backend
+    Results are ordered by relevance unless ordering is passed
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        queryset = get_search_backend().search(queryset, " ".join(search_terms))
+        if filters.OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by("-search_rank", "pk")
+        return queryset
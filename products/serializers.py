@@ -2,7 +2,15 @@ from rest_framework import serializers
 from rest_framework.serializers import Field
 
 from attributes.serializers import AttributeSerializer, AttributeValueSerializer
-from products.models import Brand, BrandType, Category, Image, Product, ProductVariant
+from products.models import (
+    Brand,
+    BrandType,
+    Category,
+    Image,
+    Product,
+    ProductImport,
+    ProductVariant,
+)
 from reviews.serializers import ReviewSerializer
 from shops.models import Shop
 
@@ -245,11 +253,17 @@ class ProductSerializer(serializers.ModelSerializer):
             "discount",
             "thumbnail",
             "price",
+            "min_price",
+            "max_price",
         ]
 
     def get_thumbnail(self, object):
-        variant = object.variants.first().thumbnail
-        return self.context["request"].build_absolute_uri(variant.url)
+        if not object.thumbnail:
+            return None
+        request = self.context.get("request", None)
+        if request is not None:
+            return request.build_absolute_uri(object.thumbnail.url)
+        return object.thumbnail.url
 
 
 class SingleCategorySerializer(serializers.ModelSerializer):
@@ -274,3 +288,60 @@ class SingleCategorySerializer(serializers.ModelSerializer):
             "attributes",
             "tax",
         ]
+
+
+class CategoryTreeSerializer(serializers.Serializer):
+    """
+    Category tree node to read only
+    product_count includes products of subcategories
+    """
+
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
+    icon = serializers.CharField(allow_null=True)
+    featured = serializers.BooleanField()
+    product_count = serializers.IntegerField()
+    children = serializers.ListField(child=serializers.DictField())
+
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """
+    Product import serializer
+    Format is taken from file extension if not passed
+    """
+
+    format = serializers.ChoiceField(choices=ProductImport.FORMATS, required=False)
+
+    class Meta:
+        model = ProductImport
+        fields = [
+            "id",
+            "file",
+            "format",
+            "status",
+            "processed_rows",
+            "products_created",
+            "variants_created",
+            "error_count",
+            "errors",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "status",
+            "processed_rows",
+            "products_created",
+            "variants_created",
+            "error_count",
+            "errors",
+            "finished_at",
+        ]
+
+    def validate(self, data):
+        if "format" not in data:
+            extension = data["file"].name.rsplit(".", 1)[-1].lower()
+            if extension not in dict(ProductImport.FORMATS):
+                raise serializers.ValidationError({"format": "Unknown file format"})
+            data["format"] = extension
+        return data
@@ -0,0 +1,29 @@
+from celery import shared_task
+
+from . import recommendations, repricing
+from .importer import run_import
+from .models import ProductImport, ProductVariant
+
+
+@shared_task
+def import_products(import_id):
+    """
+    Import products from file of ProductImport
+    """
+    run_import(ProductImport.objects.select_related("shop").get(pk=import_id))
+
+
+@shared_task
+def reprice_variants(filters, discount=None):
+    """
+    Reprice variants matching filters, set their discount when passed
+    """
+    repricing.reprice_variants(ProductVariant.objects.filter(**filters), discount)
+
+
+@shared_task
+def build_recommendations():
+    """
+    Rebuild "customers also bought" recommendations from completed orders
+    """
+    return recommendations.build_recommendations()
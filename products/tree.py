@@ -0,0 +1,55 @@
+from django.db.models import Count
+
+from common.cache import get_cached, make_tag, set_cached
+
+from .models import Category, Product
+
+CATEGORY_TREE_CACHE_KEY = "category_tree"
+
+
+def build_category_tree():
+    """
+    Return nested category tree with product counts of whole subtrees
+    Categories are read in (tree_id, lft) order, so parents come before
+    children and the tree is built in one pass
+    """
+    counts = dict(
+        Product.objects.order_by().values_list("category").annotate(count=Count("pk"))
+    )
+    roots, nodes = [], {}
+    for category in Category.objects.order_by("tree_id", "lft"):
+        node = {
+            "id": str(category.pk),
+            "name": category.name,
+            "slug": category.slug,
+            "icon": category.icon.url if category.icon else None,
+            "featured": category.featured,
+            "product_count": counts.get(category.pk, 0),
+            "children": [],
+        }
+        nodes[category.pk] = node
+        if category.parent_id is None:
+            roots.append(node)
+        else:
+            nodes[category.parent_id]["children"].append(node)
+
+    def add_subtree_counts(node):
+        node["product_count"] += sum(map(add_subtree_counts, node["children"]))
+        return node["product_count"]
+
+    for root in roots:
+        add_subtree_counts(root)
+    return roots
+
+
+def get_category_tree():
+    """
+    Return cached category tree
+    Cache is invalidated on category writes, product counts may lag
+    for CACHE_TTL
+    """
+    tree = get_cached(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        set_cached(CATEGORY_TREE_CACHE_KEY, tree, {make_tag(Category)})
+    return tree
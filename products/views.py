@@ -1,5 +1,4 @@
-from django.db.models import OuterRef, Subquery
-from django.db.transaction import atomic
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
@@ -7,19 +6,44 @@ from rest_framework import filters, mixins, permissions, serializers, status, vi
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .facets import get_product_facets
 from .filters import ProductFilter
+from .search import ProductSearchFilter
+from .tree import get_category_tree
+from .tasks import import_products
+
+from common.cache import (
+    CachedListMixin,
+    CachedResponseMixin,
+    InvalidateCacheMixin,
+    invalidate_instance,
+    make_tag,
+)
+from common.pagination import NameCursorPagination
 
 from attributes.serializers import AttributeSerializer, CreateAttributeValueSerializer
 from core.permissions import HasShop, IsOwner
+from core.principals import get_shop_id
 from orders.serializers import CreateOrderSerializer, OrderSerializer
-from products.models import Brand, BrandType, Category, Image, Product, ProductVariant
+from products.models import (
+    Brand,
+    BrandType,
+    Category,
+    Image,
+    Product,
+    ProductImport,
+    ProductRecommendation,
+    ProductVariant,
+)
 from products.serializers import (
     BrandSerializer,
     BrandTypeSerializer,
     CategorySerializer,
+    CategoryTreeSerializer,
     CreateProductSerializer,
     CreateProductVariantSerializer,
     ImageSerializer,
+    ProductImportSerializer,
     ProductSerializer,
     ProductVariantSerializer,
     SingleCategorySerializer,
@@ -30,7 +54,8 @@ from reviews.serializers import CreateReviewSerializer, ReviewSerializer
 
 @extend_schema_view(
     list=extend_schema(
-        description="Get list of products",
+        description="Get list of products, facets=true adds counts for filters",
+        parameters=[OpenApiParameter("facets", OpenApiTypes.BOOL)],
         responses={200: ProductSerializer},
         tags=["All"],
     ),
@@ -41,7 +66,10 @@ from reviews.serializers import CreateReviewSerializer, ReviewSerializer
     ),
 )
 class ProductViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """
     Product view set to get all products
@@ -50,50 +78,38 @@ class ProductViewSet(
 
     permission_classes = [permissions.AllowAny]
     filter_backends = [
-        filters.SearchFilter,
         filters.OrderingFilter,
         DjangoFilterBackend,
+        ProductSearchFilter,
     ]
     filterset_class = ProductFilter
     filterset_fields = ["id", "category"]
-    search_fields = ["name", "id"]
     ordering_fields = ["name", "rating", "overall_price", "created_at", "discount"]
+    ordering = ["name", "id"]
+    cursor_pagination_class = NameCursorPagination
+    cache_related_fields = ("shop", "brand", "category")
 
     def get_queryset(self):
-        if self.action == "list":
-            return (
-                Product.objects.prefetch_related("variants")
-                .all()
-                .annotate(
-                    overall_price=Subquery(
-                        ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                            "overall_price"
-                        )[:1]
-                    ),
-                    discount_price=Subquery(
-                        ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                            "discount_price"
-                        )[:1]
-                    ),
-                    price=Subquery(
-                        ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                            "price"
-                        )[:1]
-                    ),
-                    discount=Subquery(
-                        ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                            "discount"
-                        )[:1]
-                    ),
-                )
-            )
-        return Product.objects.all().prefetch_related("variants", "reviews")
+        if self.action in ("list", "recommendations"):
+            return Product.objects.select_related("shop", "category", "brand")
+        return Product.objects.with_details()
 
     def get_serializer_class(self):
         if self.action == "retrieve":
             return SingleProductSerializer
         return ProductSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        List products, add facets of filtered products on request
+        """
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get("facets") in ("1", "true"):
+            response.data["facets"] = get_product_facets(
+                self.filter_queryset(self.get_queryset()), request.query_params
+            )
+        return response
+
     @extend_schema(
         description="Create review for product",
         request=CreateReviewSerializer,
@@ -111,8 +127,35 @@ class ProductViewSet(
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_instance(product, ("shop",))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        description="Get products customers also bought",
+        responses={200: ProductSerializer(many=True)},
+        tags=["All"],
+    )
+    @action(detail=True, methods=["get"])
+    def recommendations(self, request, pk=None):
+        return self.get_cached_response(self.get_recommendations, request)
+
+    def get_recommendations(self, request):
+        """
+        Read precomputed neighbours of product, see products.recommendations
+        """
+        product = self.get_object()
+        self.cache_tags |= {make_tag(Product), make_tag(ProductRecommendation)}
+        recommendation = ProductRecommendation.objects.filter(product=product).first()
+        product_ids = [pk for pk, _ in getattr(recommendation, "neighbours", [])]
+        products = Product.objects.filter(pk__in=product_ids).select_related(
+            "shop", "category", "brand"
+        )
+        products = sorted(products, key=lambda item: product_ids.index(item.pk))
+        serializer = ProductSerializer(
+            products, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
     @extend_schema(
         description="Buy product variant",
         parameters=[OpenApiParameter("id", OpenApiTypes.UUID, OpenApiParameter.PATH)],
@@ -124,21 +167,22 @@ class ProductViewSet(
         detail=True,
         methods=["post"],
     )
-    @atomic
     def buy(self, request, pk=None):
         """
         Buy product variant
+        Stock is reserved in CreateOrderSerializer without locking the variant
         """
-        product_variant = ProductVariant.objects.select_for_update().get(
+        product_variant = ProductVariant.objects.select_related("product").get(
             pk=request.data.get("product_variant")
         )
         request.data["user"] = request.user.id
-        request.data["shop"] = product_variant.product.shop.id
+        request.data["shop"] = product_variant.product.shop_id
         serializer = CreateOrderSerializer(
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        invalidate_instance(product_variant.product, ("shop",))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -150,6 +194,7 @@ class ProductViewSet(
     tags=["Owner"],
 )
 class ProductVariantViewSet(
+    InvalidateCacheMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
@@ -161,6 +206,7 @@ class ProductVariantViewSet(
     """
 
     permission_classes = [permissions.IsAuthenticated, HasShop]
+    cache_invalidate_related = ("product", "product.shop")
 
     def get_object(self):
         return ProductVariant.objects.get(pk=self.kwargs["pk"])
@@ -183,6 +229,7 @@ class ProductVariantViewSet(
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        self.invalidate_cache(product_variant)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def get_queryset(self):
@@ -190,7 +237,7 @@ class ProductVariantViewSet(
         Returns only current user's shop products
         """
         return ProductVariant.objects.filter(
-            product__shop=self.request.user.shop  # type: ignore
+            product__shop_id=get_shop_id(self.request.user)
         ).prefetch_related("attribute_values", "images")
 
     def get_serializer_class(self):
@@ -206,50 +253,24 @@ class ProductVariantViewSet(
     responses={200: ProductSerializer},
     tags=["Owner"],
 )
-class ShopProductViewSet(viewsets.ModelViewSet):
+class ShopProductViewSet(InvalidateCacheMixin, viewsets.ModelViewSet):
     """
     Viewset allows the owner of shop to edit products
     """
 
     permission_classes = [permissions.IsAuthenticated, IsOwner, HasShop]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["name"]
+    filter_backends = [ProductSearchFilter]
+    cursor_pagination_class = NameCursorPagination
+    cache_invalidate_related = ("shop", "category")
 
     def get_queryset(self):
         """
         Returns only current user's shop products
         """
-        return (
-            Product.objects.prefetch_related("variants")
-            .filter(shop=self.request.user.shop)  # type: ignore
-            .annotate(
-                overall_price=Subquery(
-                    ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                        "overall_price"
-                    )[:1]
-                ),
-                discount_price=Subquery(
-                    ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                        "discount_price"
-                    )[:1]
-                ),
-                price=Subquery(
-                    ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                        "price"
-                    )[:1]
-                ),
-                discount=Subquery(
-                    ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                        "discount"
-                    )[:1]
-                ),
-                thumbnail=Subquery(
-                    ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                        "thumbnail"
-                    )[:1]
-                ),
-            )
-        )
+        queryset = Product.objects.filter(shop_id=get_shop_id(self.request.user))
+        if self.action == "retrieve":
+            return queryset.with_details()
+        return queryset.select_related("shop", "category", "brand")
 
     def update(self, request, *args, **kwargs):
         """
@@ -270,6 +291,7 @@ class ShopProductViewSet(viewsets.ModelViewSet):
         """
         if self.request.user.shop is not None:
             serializer.save(shop=self.request.user.shop)  # type: ignore
+            self.invalidate_cache(serializer.instance)
         else:
             raise serializers.ValidationError("Shop not found")
 
@@ -284,6 +306,46 @@ class ShopProductViewSet(viewsets.ModelViewSet):
         return {"request": self.request}
 
 
+@extend_schema(
+    description="Import products of user's shop from CSV or JSON Lines file",
+    parameters=[OpenApiParameter("id", OpenApiTypes.UUID, OpenApiParameter.PATH)],
+    request=ProductImportSerializer,
+    responses={200: ProductImportSerializer},
+    tags=["Owner"],
+)
+class ProductImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Viewset to import products to user's shop
+    Import runs in background, retrieve returns its progress
+    """
+
+    serializer_class = ProductImportSerializer
+    permission_classes = [permissions.IsAuthenticated, HasShop]
+
+    def get_queryset(self):
+        """
+        Returns only current user's shop imports
+        """
+        return ProductImport.objects.filter(shop_id=get_shop_id(self.request.user))
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    def perform_create(self, serializer):
+        """
+        On create set shop to user's and start import after commit
+        """
+        product_import = serializer.save(shop=self.request.user.shop)  # type: ignore
+        transaction.on_commit(lambda: import_products.delay(str(product_import.pk)))
+
+
 @extend_schema(
     description="Brand Types for products",
     parameters=[OpenApiParameter("id", OpenApiTypes.UUID, OpenApiParameter.PATH)],
@@ -309,6 +371,7 @@ class BrandTypeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     tags=["Products additions"],
 )
 class ImageViewSet(
+    InvalidateCacheMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
     mixins.CreateModelMixin,
@@ -321,6 +384,10 @@ class ImageViewSet(
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_invalidate_related = (
+        "product_variant.product",
+        "product_variant.product.shop",
+    )
 
 
 @extend_schema_view(
@@ -337,7 +404,10 @@ class ImageViewSet(
     ),
 )
 class CategoryViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """
     Viewset only to get in a list Categories
@@ -351,6 +421,15 @@ class CategoryViewSet(
             return CategorySerializer
         return SingleCategorySerializer
 
+    @extend_schema(
+        description="Get nested category tree with product counts of subtrees",
+        responses={200: CategoryTreeSerializer(many=True)},
+        tags=["All"],
+    )
+    @action(detail=False, methods=["get"])
+    def tree(self, request):
+        return Response(get_category_tree())
+
 
 @extend_schema(
     description="Brands for products",
@@ -358,7 +437,7 @@ class CategoryViewSet(
     responses={200: BrandSerializer},
     tags=["All"],
 )
-class BrandViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class BrandViewSet(CachedListMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     Viewset only to get in a list Brands
     """
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from products.models import Product
+from reviews.models import Review
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Rebuild rating counters of products and shops from reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of products or shops updated per query",
+        )
+
+    def handle(self, *args, **options):
+        for model, field in [(Product, "product"), (Shop, "shop")]:
+            self.stdout.write(f"Rebuilding {model._meta.verbose_name} ratings")
+            self.rebuild(model, field, options["chunk_size"])
+        self.stdout.write("Ratings rebuilt")
+
+    def rebuild(self, model, field, chunk_size):
+        pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(pks), chunk_size):
+            chunk = pks[start : start + chunk_size]
+            totals = {
+                row[field]: row
+                for row in Review.objects.filter(**{f"{field}__in": chunk})
+                .order_by()
+                .values(field)
+                .annotate(rating_sum=Sum("rating"), rating_count=Count("pk"))
+            }
+            instances = []
+            for pk in chunk:
+                row = totals.get(pk, {"rating_sum": 0, "rating_count": 0})
+                rating = Decimal(0)
+                if row["rating_count"]:
+                    rating = Decimal(row["rating_sum"]) / row["rating_count"]
+                instances.append(
+                    model(
+                        pk=pk,
+                        rating_sum=row["rating_sum"],
+                        rating_count=row["rating_count"],
+                        rating=round(rating, 1),
+                    )
+                )
+            model.objects.bulk_update(
+                instances, ["rating_sum", "rating_count", "rating"]
+            )
@@ -1,7 +1,31 @@
 from django.db import models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.db.transaction import atomic
 import uuid
 
 
+def get_rating_update(sum_delta, count_delta):
+    """
+    Return update() kwargs applying review delta to rating counters
+    Rating is recalculated from new counters in the same UPDATE
+    """
+    rating_sum = F("rating_sum") + sum_delta
+    rating_count = F("rating_count") + count_delta
+    return {
+        "rating_sum": rating_sum,
+        "rating_count": rating_count,
+        "rating": Case(
+            When(
+                rating_count__gt=-count_delta,
+                then=Cast(rating_sum, FloatField()) / rating_count,
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    }
+
+
 class Review(models.Model):
     """
     Rating model for product
@@ -32,11 +56,34 @@ class Review(models.Model):
     class Meta:
         ordering = ["-created_at"]
 
+    def update_ratings(self, sum_delta, count_delta):
+        """
+        Apply delta to product and shop rating counters
+        """
+        from products.models import Product
+        from shops.models import Shop
+
+        update = get_rating_update(sum_delta, count_delta)
+        Product.objects.filter(pk=self.product_id).update(**update)
+        Shop.objects.filter(pk=self.shop_id).update(**update)
+
+    @atomic
     def save(self, *args, **kwargs):
+        if self._state.adding:
+            sum_delta, count_delta = self.rating, 1
+        else:
+            old_rating = (
+                Review.objects.filter(pk=self.pk)
+                .values_list("rating", flat=True)
+                .first()
+            )
+            sum_delta, count_delta = self.rating - (old_rating or 0), 0
         super().save(*args, **kwargs)
+        if sum_delta or count_delta:
+            self.update_ratings(sum_delta, count_delta)
 
-        # update product rating
-        product = self.product
-        product_rating = product.reviews.aggregate(models.Avg("rating"))["rating__avg"]
-        product.rating = product_rating
-        product.save()
+    @atomic
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.update_ratings(-self.rating, -1)
+        return result
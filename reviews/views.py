@@ -4,6 +4,8 @@ from .models import Review
 from .serializers import CreateReviewSerializer, ReviewSerializer
 from drf_spectacular.utils import extend_schema
 
+from common.pagination import CommonCursorPagination
+
 # owner of shop review
 @extend_schema(
     description="Review viewset to get all reviews",
@@ -19,6 +21,7 @@ class ReviewViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
+    cursor_pagination_class = CommonCursorPagination
 
     def get_queryset(self):
         """
@@ -0,0 +1,19 @@
+from django.db import models
+from django.db.models import Prefetch
+
+
+class ShopQuerySet(models.QuerySet):
+    """
+    Custom queryset for shops
+    """
+
+    def with_details(self):
+        """
+        Load everything SingleShopSerializer renders
+        Number of queries doesn't depend on products and their children
+        """
+        from products.models import Product
+
+        return self.select_related("user").prefetch_related(
+            "links", Prefetch("products", queryset=Product.objects.with_details())
+        )
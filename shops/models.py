@@ -1,9 +1,14 @@
 import uuid
+from decimal import Decimal
+
 from django.utils.text import slugify
 
 from django.db import models
 
 from core.helpers import PathAndRename
+from core.principals import invalidate_principal
+
+from .managers import ShopQuerySet
 
 
 # TODO: barcode for product and qr code
@@ -37,6 +42,17 @@ class Shop(models.Model):
     profile_picture = models.ImageField(
         upload_to=PathAndRename("shop/profiles/"), verbose_name="Shop's profile picture"
     )
+    rating = models.DecimalField(
+        max_digits=2,
+        decimal_places=1,
+        default=Decimal(0.0),
+        editable=False,
+        verbose_name="Shop rating",
+    )
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+
+    objects = ShopQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -44,6 +60,13 @@ class Shop(models.Model):
     def save(self, *args, **kwargs):
         self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+        # principal of owner caches shop id
+        invalidate_principal(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_principal(self.user_id)
+        return result
 
     class Meta:
         ordering = ["name"]
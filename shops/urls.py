@@ -22,4 +22,19 @@ urlpatterns = [
         MyShopViewSet.as_view({"get": "get_shop_reviews"}),
         name="my-shop-reviews",
     ),
+    path(
+        "shop/balance/",
+        MyShopViewSet.as_view({"get": "balance"}),
+        name="my-shop-balance",
+    ),
+    path(
+        "shop/statement/",
+        MyShopViewSet.as_view({"get": "statement"}),
+        name="my-shop-statement",
+    ),
+    path(
+        "shop/analytics/",
+        MyShopViewSet.as_view({"get": "analytics"}),
+        name="my-shop-analytics",
+    ),
 ]
@@ -1,17 +1,21 @@
-from django.db.models import OuterRef, Subquery
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import mixins, permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from common.cache import CachedResponseMixin, InvalidateCacheMixin
 from core.permissions import HasShop, IsOwner
-from products.models import Product, ProductVariant
+from core.principals import get_shop_id
+from products.models import Product
 from products.serializers import ProductSerializer
 from reviews.models import Review
 from reviews.serializers import ShopReviewSerializer
 from payments.models import TransferMoney
 from payments.serializers import TransferMoneySerializer
+from payments.views import ShopLedgerMixin
+from orders.rollups import get_sales_analytics
+from orders.serializers import SalesAnalyticsQuerySerializer, SalesAnalyticsSerializer
 
 
 from .models import Link, Shop
@@ -30,6 +34,8 @@ from .serializers import (
     tags=["Owner"],
 )
 class MyShopViewSet(
+    InvalidateCacheMixin,
+    ShopLedgerMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -53,6 +59,7 @@ class MyShopViewSet(
         On create set user to current user
         """
         serializer.save(user=self.request.user)
+        self.invalidate_cache(serializer.instance)
 
     def get_permissions(self):
         """
@@ -66,6 +73,8 @@ class MyShopViewSet(
         """
         Return only user's shop
         """
+        if self.action == "retrieve":
+            return Shop.objects.with_details().get(user=self.request.user)
         return self.request.user.shop
 
     @extend_schema(
@@ -76,10 +85,23 @@ class MyShopViewSet(
     @action(detail=True, methods=["get"])
     def get_shop_reviews(self, request, pk=None):
         shop = self.get_object()
-        reviews = Review.objects.filter(shop=shop)
+        reviews = Review.objects.filter(shop=shop).select_related("user", "product")
         serializer = ShopReviewSerializer(reviews, many=True)
         return Response(data=serializer.data)
 
+    @extend_schema(
+        description="Get shop sales analytics from daily rollups",
+        parameters=[SalesAnalyticsQuerySerializer],
+        responses={200: SalesAnalyticsSerializer},
+        tags=["Owner"],
+    )
+    @action(detail=True, methods=["get"])
+    def analytics(self, request, pk=None):
+        query = SalesAnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        analytics = get_sales_analytics(self.get_object(), **query.validated_data)
+        return Response(data=SalesAnalyticsSerializer(analytics).data)
+
 
 @extend_schema(
     description="Viewset to get all Shops",
@@ -88,7 +110,10 @@ class MyShopViewSet(
     tags=["All"],
 )
 class ShopViewSet(
-    mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+    CachedResponseMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
 ):
     """
     Viewset to get all Shops
@@ -98,6 +123,11 @@ class ShopViewSet(
     queryset = Shop.objects.all()
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        if self.action == "retrieve":
+            return Shop.objects.with_details()
+        return Shop.objects.select_related("user")
+
     def get_serializer_class(self):
         if self.action == "retrieve":
             return SingleShopSerializer
@@ -111,25 +141,12 @@ class ShopViewSet(
     )
     @action(detail=True, methods=["get"])
     def products(self, request, pk=None):
-        products = Product.objects.filter(shop=pk).annotate(
-            overall_price=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "overall_price"
-                )[:1]
-            ),
-            discount_price=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "discount_price"
-                )[:1]
-            ),
-            thumbnail=Subquery(
-                ProductVariant.objects.filter(product=OuterRef("pk")).values(
-                    "thumbnail"
-                )[:1]
-            ),
+        products = Product.objects.filter(shop=pk).select_related(
+            "shop", "category", "brand"
+        )
+        serializer = ProductSerializer(
+            products, many=True, context=self.get_serializer_context()
         )
-        serializer = ProductSerializer(products, many=True)
-        print(serializer.data)
         return Response(data=serializer.data)
 
 
@@ -140,6 +157,7 @@ class ShopViewSet(
     tags=["Owner"],
 )
 class LinkViewSet(
+    InvalidateCacheMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
     mixins.CreateModelMixin,
@@ -153,18 +171,20 @@ class LinkViewSet(
 
     serializer_class = LinkSerializer
     permission_classes = [permissions.IsAuthenticated, HasShop, IsOwner]
+    cache_invalidate_related = ("shop",)
 
     def perform_create(self, serializer):
         """
         On create save shop
         """
         serializer.save(shop=self.request.user.shop)
+        self.invalidate_cache(serializer.instance)
 
     def get_queryset(self):
         """
         Return only user's shop links
         """
-        return Link.objects.filter(shop=self.request.user.shop)
+        return Link.objects.filter(shop_id=get_shop_id(self.request.user))
 
 
 class TransferMoneyViewSet(mixins.ListModelMixin):
@@ -172,4 +192,4 @@ class TransferMoneyViewSet(mixins.ListModelMixin):
     permission_classes = [permissions.IsAuthenticated, HasShop]
 
     def get_queryset(self):
-        return TransferMoney.objects.filter(shop=self.request.user.shop)
\ No newline at end of file
+        return TransferMoney.objects.filter(shop_id=get_shop_id(self.request.user))
@@ -1,6 +1,8 @@
 from rest_framework import mixins, permissions, viewsets
 from drf_spectacular.utils import extend_schema
 
+from common.cache import CachedResponseMixin
+
 from .models import Slider
 from .serializers import (
     SliderSerializer,
@@ -14,7 +16,9 @@ from .serializers import (
     responses={200: SliderSerializer},
     tags=["All"],
 )
-class SliderViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class SliderViewSet(
+    CachedResponseMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
     """
     SliderViewSet to read_only
     """
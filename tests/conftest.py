@@ -1,8 +1,49 @@
+from decimal import Decimal
+
 import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from faker import Faker
 from rest_framework.test import APIClient
 
-from users.models import Customer
+from core.principals import local_principals
+from orders.models import Order
+from products.models import Brand, Category, Product, ProductVariant
+from shops.models import Shop
+from users.models import Address, Customer
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-report",
+        default=None,
+        help="Write query counts of endpoints and their sources to JSON file",
+    )
+
+
+def pytest_sessionfinish(session):
+    from tests.query_budget import write_query_report
+
+    write_query_report(session.config.getoption("--query-report", None))
+
+
+def make_image(name="test_image.webp"):
+    return SimpleUploadedFile(
+        name=name,
+        content=open("tests/test_head/testimage.webp", "rb").read(),
+        content_type="image/webp",
+    )
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    local_principals.clear()
 
 
 @pytest.fixture
@@ -18,3 +59,77 @@ def faker() -> Faker:
 @pytest.fixture
 def user():
     return Customer.objects.create_user("marlen@gmail.com", "jfmfn123")
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(
+        name="category", image=make_image(), description="description", tax=10
+    )
+
+
+@pytest.fixture
+def brand(db):
+    return Brand.objects.create(name="brand", image=make_image())
+
+
+@pytest.fixture
+def shop(db):
+    owner = Customer.objects.create_user("owner@gmail.com", "jfmfn123")
+    return Shop.objects.create(
+        name="shop",
+        user=owner,
+        email="shop@gmail.com",
+        address="address",
+        phone="01020304",
+        cover_picture=make_image(),
+        profile_picture=make_image(),
+    )
+
+
+@pytest.fixture
+def product(category, brand, shop):
+    return Product.objects.create(
+        name="product",
+        description="description",
+        category=category,
+        brand=brand,
+        shop=shop,
+        unit="pcs",
+    )
+
+
+@pytest.fixture
+def make_variant(product):
+    def make(price="100.00", discount=0, stock=10, target=None):
+        return ProductVariant.objects.create(
+            product=target or product,
+            price=Decimal(price),
+            discount=discount,
+            stock=stock,
+            thumbnail=make_image(),
+        )
+
+    return make
+
+
+@pytest.fixture
+def address(user):
+    return Address.objects.create(
+        user=user, city="city", country="country", street="street", phone="01020304"
+    )
+
+
+@pytest.fixture
+def make_order(user, shop, address, make_variant):
+    def make(variant=None, quantity=1, status="pending"):
+        return Order.objects.create(
+            user=user,
+            shop=shop,
+            address=address,
+            product_variant=variant or make_variant(),
+            quantity=quantity,
+            status=status,
+        )
+
+    return make
@@ -2,8 +2,16 @@ import factory
 from django.core.files.base import ContentFile
 from faker import Factory
 
-from shops.models import Shop
-from products.models import Product, Size, Color, Brand, Category, BrandType, Image
+from applications.models import Application
+from attributes.models import Attribute, AttributeValue
+from orders.models import Order
+from pages.models import Page, PageCategory
+from payments.models import Payment
+from posts.models import Post
+from reviews.models import Review
+from shops.models import Link, Shop
+from sliders.models import Slide, Slider
+from products.models import Brand, Category, BrandType, Image, Product, ProductVariant
 from users.models import Customer, Address
 
 faker = Factory.create()
@@ -13,47 +21,56 @@ class CustomerFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Customer
 
+    email = factory.Sequence(lambda n: f"customer{n}@gmail.com")
+    password = factory.PostGenerationMethodCall("set_password", "jfmfn123")
+
 
 class AddressFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Address
 
     user = factory.SubFactory(CustomerFactory)
+    city = "Bishkek"
+    country = "Kyrgyzstan"
+    street = factory.Sequence(lambda n: f"street {n}")
+    phone = "01020304"
 
 
 class BrandTypeFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = BrandType
 
+    name = factory.Sequence(lambda n: f"brand type {n}")
+
 
 class BrandFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Brand
 
+    name = factory.Sequence(lambda n: f"brand {n}")
+    image = factory.django.ImageField(color="blue")
     type = factory.SubFactory(BrandTypeFactory)
 
 
-class ColorFactory(factory.django.DjangoModelFactory):
-    class Meta:
-        model = Color
-
-
 class CategoryFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Category
 
-    parent = factory.SubFactory("tests.factories.CategoryFactory", parent=None)
-
-
-class SizeFactory(factory.django.DjangoModelFactory):
-    class Meta:
-        model = Size
+    name = factory.Sequence(lambda n: f"category {n}")
+    image = factory.django.ImageField(color="blue")
+    description = "description"
+    tax = 10
+    parent = None
 
 
 class ShopFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Shop
 
+    name = factory.Sequence(lambda n: f"shop {n}")
+    email = factory.Sequence(lambda n: f"shop{n}@gmail.com")
+    phone = factory.Sequence(lambda n: f"0102{n:04}")
+    address = "address"
     user = factory.SubFactory(CustomerFactory)
     cover_picture = factory.LazyAttribute(
         lambda _: ContentFile(
@@ -69,48 +86,36 @@ class ShopFactory(factory.django.DjangoModelFactory):
     )
 
 
+class LinkFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Link
+
+    shop = factory.SubFactory(ShopFactory)
+    name = "site"
+    link = factory.Sequence(lambda n: f"https://example.com/{n}")
+
+
 class ProductFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Product
 
+    name = factory.Sequence(lambda n: f"product {n}")
+    description = "description"
+    unit = "piece"
     shop = factory.SubFactory(ShopFactory)
     brand = factory.SubFactory(BrandFactory)
-    thumbnail = factory.LazyAttribute(
-        lambda _: ContentFile(
-            factory.django.ImageField()._make_data({"width": 1024, "height": 768}),
-            "example.jpg",
-        )
-    )
+    category = factory.SubFactory(CategoryFactory)
+
 
-    @factory.post_generation
-    def categories(self, create, extracted, **kwargs):
-        if not create:
-            # simple build do nothing
-            return
-        if extracted:
-            # A list of groups were passed in, use them
-            for category in extracted:
-                self.categories.add(category)
-
-    @factory.post_generation
-    def sizes(self, create, extracted, **kwargs):
-        if not create:
-            # simple build do nothing
-            return
-        if extracted:
-            # A list of groups were passed in, use them
-            for size in extracted:
-                self.sizes.add(size)
-
-    @factory.post_generation
-    def colors(self, create, extracted, **kwargs):
-        if not create:
-            # simple build do nothing
-            return
-        if extracted:
-            # A list of groups were passed in, use them
-            for color in extracted:
-                self.colors.add(color)
+class ProductVariantFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = ProductVariant
+
+    product = factory.SubFactory(ProductFactory)
+    price = 100
+    discount = 0
+    stock = 10
+    thumbnail = factory.django.ImageField(color="blue")
 
 
 class ImageFactory(factory.django.DjangoModelFactory):
@@ -118,9 +123,104 @@ class ImageFactory(factory.django.DjangoModelFactory):
         model = Image
 
     image = factory.django.ImageField(color="blue")
-    product = factory.LazyAttribute(
-        lambda _: ContentFile(
-            factory.django.ImageField()._make_data({"width": 1024, "height": 768}),
-            "example.jpg",
-        )
-    )
+    product_variant = factory.SubFactory(ProductVariantFactory)
+
+
+class AttributeFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Attribute
+
+    name = factory.Sequence(lambda n: f"attribute {n}")
+
+
+class AttributeValueFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = AttributeValue
+
+    product_variant = factory.SubFactory(ProductVariantFactory)
+    attribute = factory.SubFactory(AttributeFactory)
+    value = factory.Sequence(lambda n: f"value {n}")
+
+
+class ReviewFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Review
+
+    user = factory.SubFactory(CustomerFactory)
+    product_variant = factory.SubFactory(ProductVariantFactory)
+    product = factory.SelfAttribute("product_variant.product")
+    shop = factory.SelfAttribute("product.shop")
+    rating = 5
+    comment = "comment"
+
+
+class PaymentFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Payment
+
+    payment_type = "visa"
+    confirm_photo = factory.django.ImageField(color="blue")
+    phone_number = "01020304"
+    bank_account = "1234567890"
+
+
+class OrderFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Order
+
+    user = factory.SubFactory(CustomerFactory)
+    address = factory.SubFactory(AddressFactory, user=factory.SelfAttribute("..user"))
+    product_variant = factory.SubFactory(ProductVariantFactory)
+    shop = factory.SelfAttribute("product_variant.product.shop")
+    quantity = 1
+
+
+class ApplicationFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Application
+
+    user = factory.SubFactory(CustomerFactory)
+    document = factory.django.FileField(filename="document.pdf")
+    short_name = factory.Sequence(lambda n: f"application {n}")
+    shop_name = factory.Sequence(lambda n: f"application shop {n}")
+
+
+class PostFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Post
+
+    title = factory.Sequence(lambda n: f"post {n}")
+    content = {"blocks": []}
+
+
+class PageCategoryFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = PageCategory
+
+    title = factory.Sequence(lambda n: f"page category {n}")
+
+
+class PageFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Page
+
+    title = factory.Sequence(lambda n: f"page {n}")
+    content = {"blocks": []}
+    category = factory.SubFactory(PageCategoryFactory)
+
+
+class SliderFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Slider
+
+    title = factory.Sequence(lambda n: f"slider {n}")
+
+
+class SlideFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Slide
+
+    title = factory.Sequence(lambda n: f"slide {n}")
+    content = {"blocks": []}
+    link = "https://example.com"
+    slider = factory.SubFactory(SliderFactory)
@@ -0,0 +1,223 @@
+"""
+Query budget harness
+Records queries of API endpoints and attributes every query to the serializer
+field which was being rendered when it ran
+"""
+import json
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.urls import URLResolver, get_resolver
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from applications.models import Application
+from attributes.models import Attribute
+from core.principals import local_principals
+from pages.models import PageCategory
+from products.models import Brand, Category, Product, ProductImport
+from products.recommendations import build_recommendations
+from sliders.models import Slider
+from tests.factories import (
+    ApplicationFactory,
+    AttributeFactory,
+    AttributeValueFactory,
+    BrandFactory,
+    CategoryFactory,
+    ImageFactory,
+    LinkFactory,
+    OrderFactory,
+    PageFactory,
+    PaymentFactory,
+    PostFactory,
+    ProductFactory,
+    ProductVariantFactory,
+    ReviewFactory,
+    ShopFactory,
+    SlideFactory,
+)
+
+VIEW_LABEL = "view"
+SERIALIZER_CODE = serializers.Serializer.to_representation.__code__
+KWARG_PATTERN = re.compile(r"\(\?P<(\w+)>[^)]*\)|<(?:\w+:)?(\w+)>")
+
+# endpoint results of the session, written by write_query_report
+report = []
+
+
+def get_serializer_path(frame):
+    """
+    Return serializer fields being rendered in frame and its callers,
+    outermost first
+    """
+    path = []
+    while frame is not None:
+        if frame.f_code is SERIALIZER_CODE:
+            field = frame.f_locals.get("field")
+            name = field.field_name if field is not None else "?"
+            path.append(f"{type(frame.f_locals['self']).__name__}.{name}")
+        frame = frame.f_back
+    return " > ".join(reversed(path)) or VIEW_LABEL
+
+
+class QueryRecorder:
+    """
+    Connection execute wrapper storing source and SQL of queries
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((get_serializer_path(sys._getframe(1)), sql))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def get_sources(self):
+        return dict(Counter(source for source, _ in self.queries).most_common())
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+
+
+def seed_dataset(owner, customers):
+    """
+    Add shops with products, variant with images and attribute values to every
+    product, reviews and completed orders of owner and customers
+    Every call grows results of list endpoints and children of detail endpoints
+    """
+    category = Category.objects.filter(parent__isnull=False).first()
+    if category is None:
+        category = CategoryFactory(parent=CategoryFactory())
+    brand = Brand.objects.first() or BrandFactory()
+    attribute = Attribute.objects.first() or AttributeFactory()
+    category.attributes.add(attribute)
+
+    for shop in [owner.shop, *ShopFactory.create_batch(2)]:
+        ProductFactory.create_batch(2, shop=shop, brand=brand, category=category)
+        LinkFactory(shop=shop)
+    ProductImport.objects.create(shop=owner.shop, file="import.csv", format="csv")
+
+    payment = PaymentFactory()
+    for product in Product.objects.all():
+        variant = ProductVariantFactory(product=product)
+        ImageFactory.create_batch(2, product_variant=variant)
+        AttributeValueFactory(product_variant=variant, attribute=attribute)
+        for customer in (owner, *customers):
+            ReviewFactory(user=customer, product_variant=variant)
+            OrderFactory(
+                user=customer,
+                product_variant=variant,
+                payment=payment,
+                status="completed",
+            )
+    build_recommendations()
+
+    for customer in (owner, *customers):
+        if not Application.objects.filter(user=customer).exists():
+            ApplicationFactory(user=customer)
+    PostFactory()
+    PageFactory(category=PageCategory.objects.first() or PageFactory().category)
+    SlideFactory(slider=Slider.objects.first() or SlideFactory().slider)
+
+
+def iter_patterns(patterns, prefix=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(
+                pattern.url_patterns, prefix + str(pattern.pattern)
+            )
+        else:
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+def get_api_routes():
+    """
+    Return (route, view) of API endpoints answering GET
+    Format suffix duplicates and schema views are left out
+    """
+    routes = []
+    for route, callback in iter_patterns(get_resolver().url_patterns):
+        view_class = getattr(callback, "cls", None)
+        if (
+            not route.startswith("api/")
+            or view_class is None
+            or not issubclass(view_class, APIView)
+            or view_class.__module__.startswith("drf_spectacular")
+            or "(?P<format>" in route
+        ):
+            continue
+        actions = getattr(callback, "actions", None)
+        if "get" in (actions or {}) or actions is None and hasattr(view_class, "get"):
+            route = KWARG_PATTERN.sub(
+                lambda match: f"<{match.group(1) or match.group(2)}>",
+                re.sub(r"(?<!\[)\^|\$", "", route),
+            )
+            routes.append((route, callback))
+    return routes
+
+
+def get_route_kwargs(route):
+    return [match.group(1) or match.group(2) for match in KWARG_PATTERN.finditer(route)]
+
+
+def get_lookup_value(callback, user):
+    """
+    Lookup value of first instance the viewset would retrieve for user
+    """
+    view = callback.cls(**callback.initkwargs)
+    request = Request(APIRequestFactory().get("/"))
+    request.user = user
+    view.request = request
+    view.action = "retrieve"
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    instance = view.get_queryset().first()
+    assert instance is not None, f"no {view.get_queryset().model.__name__} seeded"
+    return getattr(instance, view.lookup_field)
+
+
+def build_url(route, callback, user):
+    kwargs = get_route_kwargs(route)
+    if not kwargs:
+        return "/" + route
+    value = get_lookup_value(callback, user)
+    return "/" + KWARG_PATTERN.sub(str(value), route)
+
+
+def measure(client, url):
+    """
+    Request url with cold caches, return response and recorder
+    """
+    cache.clear()
+    local_principals.clear()
+    with record_queries() as recorder:
+        response = client.get(url)
+    return response, recorder
+
+
+def write_query_report(path):
+    if path and report:
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+def format_problems(problems):
+    lines = []
+    for problem in problems:
+        lines.append(f"{problem['route']}: {problem['problem']}")
+        for source, count in problem["sources"].items():
+            lines.append(f"    {count:>3}  {source}")
+    return "\n".join(lines)
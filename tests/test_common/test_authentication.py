@@ -0,0 +1,102 @@
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.principals import get_principal, get_principal_key, local_principals
+from shops.models import Link, Shop
+from tests.conftest import make_image
+
+pytestmark = pytest.mark.django_db
+
+LINKS_URL = "/api/shop/link/"
+
+
+def authenticate(client, user):
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+
+def test_cached_principal_skips_user_and_shop_queries(
+    client, shop, django_assert_num_queries
+):
+    Link.objects.create(shop=shop, name="site", link="https://example.com")
+    authenticate(client, shop.user)
+
+    # first request loads user with shop, second one only counts and lists links
+    with django_assert_num_queries(3):
+        response = client.get(LINKS_URL)
+    assert response.status_code == 200
+    with django_assert_num_queries(2):
+        response = client.get(LINKS_URL)
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+
+
+def test_user_without_shop_is_rejected_without_shop_query(
+    client, user, django_assert_num_queries
+):
+    authenticate(client, user)
+    client.get(LINKS_URL)
+
+    with django_assert_num_queries(0):
+        response = client.get(LINKS_URL)
+    assert response.status_code == 403
+
+
+def test_shop_creation_invalidates_principal(
+    client, user, django_capture_on_commit_callbacks
+):
+    authenticate(client, user)
+    assert client.get(LINKS_URL).status_code == 403
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Shop.objects.create(
+            name="new shop",
+            user=user,
+            email="new@gmail.com",
+            address="address",
+            phone="01020304",
+            cover_picture=make_image(),
+            profile_picture=make_image(),
+        )
+        # requests before commit would cache shop id of the old row again
+        assert local_principals.get(get_principal_key(user.pk)) is not None
+    assert local_principals.get(get_principal_key(user.pk)) is None
+    assert client.get(LINKS_URL).status_code == 200
+
+
+def test_deactivated_user_is_rejected(client, user, django_capture_on_commit_callbacks):
+    authenticate(client, user)
+    assert client.get(LINKS_URL).status_code == 403
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+    assert client.get(LINKS_URL).status_code == 401
+
+
+def test_principal_keeps_only_auth_fields(user):
+    principal = get_principal(user.pk)
+
+    assert set(principal["fields"]) == {
+        "id",
+        "email",
+        "is_active",
+        "is_staff",
+        "is_seller",
+    }
+    assert principal["shop_id"] is None
+
+
+def test_profile_update_does_not_write_cached_fields(client, user):
+    authenticate(client, user)
+    client.get(LINKS_URL)
+    # changed without invalidating the principal cached above
+    type(user).objects.filter(pk=user.pk).update(is_staff=True, email="new@gmail.com")
+
+    response = client.patch("/api/profile/", {"first_name": "Name"})
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert (user.first_name, user.is_staff, user.email) == (
+        "Name",
+        True,
+        "new@gmail.com",
+    )
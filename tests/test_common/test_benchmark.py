@@ -0,0 +1,127 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from common.benchmark import ENDPOINTS, compare, percentile, run_benchmarks
+from common.synthetic import Plan, generate
+from orders.models import Order
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def dataset():
+    generate(Plan(40, seed=1), log=lambda *args: None)
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_run_benchmarks(dataset):
+    orders = Order.objects.count()
+
+    results = run_benchmarks(requests=3, warmup=1)
+
+    assert set(results["endpoints"]) == {endpoint.name for endpoint in ENDPOINTS}
+    for name, row in results["endpoints"].items():
+        assert row["errors"] == 0, name
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+        assert row["throughput_rps"] > 0
+        assert row["peak_memory_kb"] > 0
+    assert results["endpoints"]["buy"]["queries"] > 0
+    # anonymous list is served from response cache after warmup
+    assert results["endpoints"]["products-anonymous"]["queries"] == 0
+    # orders created by buy are rolled back
+    assert Order.objects.count() == orders
+
+
+def test_run_benchmarks_without_data():
+    assert run_benchmarks(requests=1) is None
+
+
+def test_compare_flags_slower_endpoints_more_queries_and_errors():
+    meta = {"database": "postgresql", "target": "client", "requests": 100}
+    baseline = {
+        "meta": meta,
+        "endpoints": {
+            "products": {"p95_ms": 10, "queries": 2, "errors": 0},
+            "orders": {"p95_ms": 10, "queries": 2, "errors": 0},
+            "buy": {"p95_ms": 10, "queries": 5, "errors": 0},
+            "product-detail": {"p95_ms": 10, "queries": 3, "errors": 1},
+        },
+    }
+    results = {
+        "meta": meta,
+        "endpoints": {
+            "products": {"p95_ms": 10.5, "queries": 2, "errors": 0},
+            "orders": {"p95_ms": 12, "queries": 2, "errors": 0},
+            "buy": {"p95_ms": 9, "queries": 6, "errors": 0},
+            "product-detail": {"p95_ms": 4, "queries": 3, "errors": 2},
+            "admin-users": {"p95_ms": 3, "queries": 2, "errors": 0},
+        },
+    }
+
+    rows = {row[0]: row for row in compare(results, baseline, threshold=0.1)}
+
+    assert rows["products"][-1] is False
+    assert rows["orders"] == ("orders", 10, 12, pytest.approx(0.2), True)
+    assert rows["buy"][-1] is True
+    # failing requests are fast, more errors regress whatever the latency
+    assert rows["product-detail"][-1] is True
+    assert rows["admin-users"] == ("admin-users", None, 3, None, False)
+
+
+@pytest.mark.parametrize(
+    "key, value", [("database", "sqlite"), ("target", "http://x"), ("requests", 10)]
+)
+def test_compare_rejects_different_runs(key, value):
+    meta = {"database": "postgresql", "target": "client", "requests": 100}
+    endpoints = {"products": {"p95_ms": 10, "queries": 2, "errors": 0}}
+    baseline = {"meta": meta, "endpoints": endpoints}
+    results = {"meta": {**meta, key: value}, "endpoints": endpoints}
+
+    with pytest.raises(ValueError, match=f"not comparable: {key}"):
+        compare(results, baseline)
+
+
+def test_benchmark_command_output_and_baseline(dataset, tmp_path):
+    output = tmp_path / "results.json"
+    call_command(
+        "benchmark",
+        requests=2,
+        warmup=0,
+        endpoints="products,orders",
+        output=str(output),
+        stdout=StringIO(),
+    )
+    results = json.loads(output.read_text())
+    assert set(results["endpoints"]) == {"products", "orders"}
+    assert results["meta"]["target"] == "client"
+
+    for row in results["endpoints"].values():
+        row["p95_ms"] /= 10
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results))
+    with pytest.raises(CommandError, match="Regressed endpoints"):
+        call_command(
+            "benchmark",
+            requests=2,
+            endpoints="products,orders",
+            baseline=str(baseline),
+            stdout=StringIO(),
+        )
+    with pytest.raises(CommandError, match="not comparable: requests 2 != 3"):
+        call_command(
+            "benchmark",
+            requests=3,
+            endpoints="products,orders",
+            baseline=str(baseline),
+            stdout=StringIO(),
+        )
@@ -0,0 +1,82 @@
+import pytest
+
+from products.models import Brand, Product
+from tests.factories import ProductFactory
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+PRODUCTS = "/api/shops/products/"
+
+
+@pytest.fixture
+def admin_client(client):
+    admin = Customer.objects.create_user(
+        "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+    )
+    client.force_authenticate(admin)
+    return client
+
+
+def test_anonymous_list_is_cached(client, product, django_assert_num_queries):
+    response = client.get(PRODUCTS, {"page_size": 5})
+    with django_assert_num_queries(0):
+        cached = client.get(PRODUCTS, {"page_size": 5})
+    assert cached.data == response.data
+
+
+def test_authenticated_list_is_not_cached(client, product, user):
+    client.force_authenticate(user)
+    client.get(PRODUCTS)
+    product.name = "renamed"
+    product.save()
+    assert client.get(PRODUCTS).data["results"][0]["name"] == "renamed"
+
+
+def test_admin_write_invalidates_related_entries(client, admin_client, product, brand):
+    other = Brand.objects.create(name="other")
+    anonymous = client.__class__()
+    anonymous.get(PRODUCTS)
+    anonymous.get(f"{PRODUCTS}{product.pk}/")
+    anonymous.get("/api/shops/brand/")
+
+    response = admin_client.patch(f"/api/admin/brand/{other.pk}/", {"name": "new"})
+    assert response.status_code == 200
+    # product entries don't contain the other brand
+    Brand.objects.filter(pk=brand.pk).update(name="stale")
+    assert anonymous.get(PRODUCTS).data["results"][0]["brand"] == "brand"
+    assert anonymous.get(f"{PRODUCTS}{product.pk}/").data["brand"]["name"] == "brand"
+    names = {row["name"] for row in anonymous.get("/api/shops/brand/").data["results"]}
+    assert names == {"stale", "new"}
+
+    admin_client.patch(f"/api/admin/brand/{brand.pk}/", {"name": "renamed"})
+    assert anonymous.get(PRODUCTS).data["results"][0]["brand"] == "renamed"
+    assert anonymous.get(f"{PRODUCTS}{product.pk}/").data["brand"]["name"] == "renamed"
+
+
+def test_owner_write_invalidates_product(client, product, make_variant):
+    variant = make_variant()
+    anonymous = client.__class__()
+    anonymous.get(f"{PRODUCTS}{product.pk}/")
+
+    client.force_authenticate(product.shop.user)
+    response = client.patch(f"/api/products/variants/{variant.pk}/", {"stock": 3})
+    assert response.status_code == 200
+    data = anonymous.get(f"{PRODUCTS}{product.pk}/").data
+    assert data["variants"][0]["stock"] == 3
+
+
+def test_write_keeps_details_of_other_instances(client, admin_client, product):
+    # other product doesn't share related instances with product
+    other = ProductFactory()
+    anonymous = client.__class__()
+    anonymous.get(PRODUCTS)
+    anonymous.get(f"{PRODUCTS}{product.pk}/")
+    Product.objects.filter(pk=product.pk).update(name="stale")
+
+    response = admin_client.patch(f"/api/admin/products/{other.pk}/", {"name": "new"})
+    assert response.status_code == 200
+    # list entries are tagged with the model, details only with their instance
+    names = {row["name"] for row in anonymous.get(PRODUCTS).data["results"]}
+    assert names == {"stale", "new"}
+    assert anonymous.get(f"{PRODUCTS}{product.pk}/").data["name"] == product.name
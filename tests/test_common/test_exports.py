@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.files.storage import default_storage
+
+from common import tasks
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin_client(client):
+    admin = Customer.objects.create_user(
+        "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+    )
+    client.force_authenticate(admin)
+    return client
+
+
+def read_content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+def test_export_orders_csv_with_filters(admin_client, make_order):
+    paid = make_order(quantity=2, status="paid")
+    make_order()
+
+    response = admin_client.get("/api/admin/orders/export/", {"status": "paid"})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(read_content(response))))
+    assert [(row["id"], row["quantity"], row["total_price"]) for row in rows] == [
+        (str(paid.pk), "2", "200.00")
+    ]
+    assert rows[0]["product_variant__product__name"] == "product"
+
+
+def test_export_products_jsonl(admin_client, product):
+    response = admin_client.get(
+        "/api/admin/products/export/", {"export_format": "jsonl", "search": "prod"}
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in read_content(response).splitlines()]
+    assert [(row["id"], row["shop__name"]) for row in rows] == [(product.pk, "shop")]
+
+
+def test_export_in_background(admin_client, make_order, monkeypatch):
+    # arguments go through JSON as with Celery broker
+    monkeypatch.setattr(
+        tasks.export_queryset,
+        "delay",
+        lambda *args: tasks.export_queryset(*json.loads(json.dumps(args))),
+    )
+    orders = [make_order(status="paid") for _ in range(3)]
+    make_order()
+
+    response = admin_client.get(
+        "/api/admin/orders/export/", {"status": "paid", "background": "true"}
+    )
+    assert response.status_code == 202
+    name = response.data["file"].split("/media/", 1)[1]
+    with default_storage.open(name) as file:
+        rows = list(csv.DictReader(io.TextIOWrapper(file)))
+    assert {row["id"] for row in rows} == {str(order.pk) for order in orders}
+
+
+def test_export_in_background_with_search(admin_client, product, monkeypatch):
+    monkeypatch.setattr(
+        tasks.export_queryset,
+        "delay",
+        lambda *args: tasks.export_queryset(*json.loads(json.dumps(args))),
+    )
+    response = admin_client.get(
+        "/api/admin/products/export/",
+        {"search": "missing", "export_format": "jsonl", "background": "true"},
+    )
+    name = response.data["file"].split("/media/", 1)[1]
+    with default_storage.open(name) as file:
+        assert file.read() == b""
+
+
+def test_export_requires_admin(client, user):
+    client.force_authenticate(user)
+    assert client.get("/api/admin/payments/export/").status_code == 403
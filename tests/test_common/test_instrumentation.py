@@ -0,0 +1,140 @@
+import json
+
+import pytest
+
+from common.instrumentation import (
+    RequestMetrics,
+    RouteMetrics,
+    SharedRouteMetrics,
+    route_metrics,
+)
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+PRODUCTS_URL = "/api/shops/products/"
+METRICS_URL = "/api/admin/metrics/"
+
+
+@pytest.fixture(autouse=True)
+def sample_all(settings):
+    settings.INSTRUMENTATION_SAMPLE_RATE = 1
+    route_metrics.clear()
+    yield
+    route_metrics.clear()
+
+
+def test_server_timing_and_log_line(client, product, caplog):
+    with caplog.at_level("INFO", logger="common.instrumentation"):
+        response = client.get(PRODUCTS_URL)
+        client.get(PRODUCTS_URL)
+
+    timing = response["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert "serializer;dur=" in timing
+    assert 'cache;desc="0 hits 1 misses"' in timing
+
+    first, second = [json.loads(record.message) for record in caplog.records]
+    assert first["path"] == PRODUCTS_URL
+    assert first["status"] == 200
+    assert first["queries"] > 0
+    assert first["serializer_ms"] >= 0
+    # second anonymous request is served from response cache
+    assert second["cache_hits"] == 1
+    assert second["queries"] == 0
+
+
+def test_requests_are_not_measured_when_sampling_is_off(client, product, settings):
+    settings.INSTRUMENTATION_SAMPLE_RATE = 0
+
+    response = client.get(PRODUCTS_URL)
+
+    assert "Server-Timing" not in response
+    assert route_metrics.routes == {}
+
+
+def test_prometheus_metrics(client, product):
+    client.get(PRODUCTS_URL)
+    assert client.get(METRICS_URL).status_code == 401
+
+    admin = Customer.objects.create_user(
+        "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+    )
+    client.force_authenticate(admin)
+    response = client.get(METRICS_URL)
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.content.decode()
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    route = next(route for method, route in route_metrics.routes if method == "GET")
+    assert (
+        f'http_request_duration_seconds_count{{method="GET",route="{route}"}} 1' in text
+    )
+    assert 'le="+Inf"' in text
+    assert "http_request_cache_misses_total" in text
+
+
+class HashConnection:
+    """
+    Hash commands of Redis connection used by SharedRouteMetrics
+    """
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field.encode()] = str(
+            int(values.get(field.encode(), b"0")) + amount
+        ).encode()
+
+    def hincrbyfloat(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field.encode()] = repr(
+            float(values.get(field.encode(), b"0")) + amount
+        ).encode()
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+def make_metrics(queries, total_time, cache_hits=0):
+    metrics = RequestMetrics()
+    metrics.queries = queries
+    metrics.total_time = total_time
+    metrics.cache_hits = cache_hits
+    return metrics
+
+
+def test_shared_metrics_aggregate_processes():
+    connection = HashConnection()
+    # metrics objects of two worker processes writing to one Redis hash
+    first, second = SharedRouteMetrics(connection), SharedRouteMetrics(connection)
+    local = RouteMetrics()
+    observations = [
+        (first, "GET", "api/products/", make_metrics(3, 0.02)),
+        (second, "GET", "api/products/", make_metrics(0, 0.3, cache_hits=1)),
+        (second, "POST", "api/orders/", make_metrics(12, 1.5)),
+    ]
+    for metrics, method, route, request_metrics in observations:
+        metrics.observe(method, route, request_metrics)
+        local.observe(method, route, request_metrics)
+
+    assert first.render() == second.render() == local.render()
+    assert (
+        'http_request_db_queries_bucket{method="GET",route="api/products/",le="5"} 2'
+        in first.render()
+    )
+
+    first.clear()
+    assert second.get_routes() == {}
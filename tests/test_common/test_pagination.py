@@ -0,0 +1,44 @@
+import pytest
+
+from products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCursorPagination:
+    endpoint = "/api/shops/products/"
+
+    @pytest.fixture
+    def products(self, category, brand, shop):
+        return [
+            Product.objects.create(
+                name=f"product{i:02}", category=category, brand=brand, shop=shop
+            )
+            for i in range(5)
+        ]
+
+    def test_page_number_is_default(self, client, products):
+        response = client.get(self.endpoint, {"page_size": 2})
+
+        assert response.status_code == 200
+        assert response.data["count"] == 5
+        assert "page=2" in response.data["next"]
+
+    def test_cursor_walks_all_products(self, client, products):
+        names = []
+        response = client.get(self.endpoint, {"cursor": "", "page_size": 2})
+        while True:
+            assert response.status_code == 200
+            assert response.data["count"] is None
+            names += [item["name"] for item in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            response = client.get(response.data["next"])
+
+        assert names == [product.name for product in products]
+
+    def test_cursor_capped_count(self, client, products):
+        response = client.get(self.endpoint, {"cursor": "", "count": "true"})
+
+        assert response.data["count"] == 5
+        assert response.data["previous"] is None
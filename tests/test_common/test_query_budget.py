@@ -0,0 +1,90 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.factories import CustomerFactory
+from tests.query_budget import (
+    build_url,
+    format_problems,
+    get_api_routes,
+    measure,
+    report,
+    seed_dataset,
+)
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+ADMIN_PREFIX = "api/admin/"
+# counts include loading of authenticated user, caches are cleared before requests
+DEFAULT_QUERY_BUDGET = 6
+# routes which need more queries than default, see --query-report for sources
+QUERY_BUDGETS = {
+    "api/admin/products/": 7,
+    "api/admin/shops/<pk>/": 8,
+    "api/shops/<pk>/": 8,
+    "api/shop/": 8,
+    "api/home/": 8,
+}
+SKIPPED_ROUTES = {
+    # filters by product_pk of a nested route which isn't registered
+    "api/reviews/",
+}
+
+
+def make_client(user):
+    client = APIClient(raise_request_exception=False)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+def test_endpoints_query_budget(shop):
+    """
+    Every GET endpoint stays within its budget and its query count
+    doesn't grow with number of returned instances and their children
+    Admin endpoints are requested by admin, others by shop owner
+    """
+    admin = Customer.objects.create_user(
+        "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+    )
+    customers = CustomerFactory.create_batch(2)
+    seed_dataset(shop.user, customers)
+
+    endpoints = []
+    for route, callback in get_api_routes():
+        if route in SKIPPED_ROUTES:
+            continue
+        user = admin if route.startswith(ADMIN_PREFIX) else shop.user
+        endpoints.append((route, build_url(route, callback, user), make_client(user)))
+    first = {route: measure(client, url) for route, url, client in endpoints}
+    seed_dataset(shop.user, customers)
+    second = {route: measure(client, url) for route, url, client in endpoints}
+
+    problems = []
+    for route, url, client in endpoints:
+        (response, recorder), (_, grown) = first[route], second[route]
+        budget = QUERY_BUDGETS.get(route, DEFAULT_QUERY_BUDGET)
+        report.append(
+            {
+                "route": route,
+                "url": url,
+                "status": response.status_code,
+                "budget": budget,
+                "queries": recorder.count,
+                "grown_queries": grown.count,
+                "sources": grown.get_sources(),
+            }
+        )
+        if response.status_code >= 500:
+            problem = f"status {response.status_code}"
+        elif grown.count > budget:
+            problem = f"{grown.count} queries, budget is {budget}"
+        elif grown.count != recorder.count:
+            problem = f"{recorder.count} queries grew to {grown.count} with more data"
+        else:
+            continue
+        problems.append(
+            {"route": route, "problem": problem, "sources": grown.get_sources()}
+        )
+
+    assert not problems, "\n" + format_problems(problems)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from common.synthetic import Plan, generate
+from orders.models import DailySales, Order
+from payments.models import ShopBalance, ShopLedgerEntry
+from products.models import Category, Product, ProductVariant
+from products.pricing import calculate_variant_prices
+from reviews.models import Review
+from shops.models import Shop
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+def snapshot():
+    return {
+        "customers": list(
+            Customer.objects.order_by("pk").values_list("pk", "email", "date_joined")
+        ),
+        "variants": list(
+            ProductVariant.objects.order_by("pk").values_list(
+                "product__slug", "price", "discount", "overall_price", "stock"
+            )
+        ),
+        "orders": list(
+            Order.objects.order_by("pk").values_list(
+                "pk", "product_variant__product__slug", "total_price", "status"
+            )
+        ),
+    }
+
+
+def test_fill_scale_generates_consistent_data():
+    out = StringIO()
+    call_command("fill", scale=200, seed=3, batch_size=50, stdout=out)
+
+    assert "products: 1100 rows" in out.getvalue()
+    assert "rows/s" in out.getvalue()
+    assert Customer.objects.count() == 200
+    assert Shop.objects.count() == 2
+    assert Product.objects.count() == 100
+    assert Order.objects.count() == 200
+
+    variant = ProductVariant.objects.select_related("product__category").first()
+    assert variant.overall_price == calculate_variant_prices(
+        variant.price, variant.discount, variant.product.category.tax
+    )[1].quantize(variant.overall_price)
+
+    # denormalized columns match what the rebuild commands would calculate
+    listing = list(
+        Product.objects.order_by("pk").values_list(
+            "price", "min_price", "max_price", "thumbnail", "rating", "rating_count"
+        )
+    )
+    Product.objects.all().refresh_listing_prices()
+    call_command("rebuild_ratings", stdout=StringIO())
+    assert listing == list(
+        Product.objects.order_by("pk").values_list(
+            "price", "min_price", "max_price", "thumbnail", "rating", "rating_count"
+        )
+    )
+    shop = Shop.objects.first()
+    assert shop.rating_count == Review.objects.filter(shop=shop).count()
+    assert ShopBalance.objects.get(shop=shop).balance == (
+        ShopLedgerEntry.objects.filter(shop=shop).latest("created_at").balance
+    )
+    assert DailySales.objects.exists()
+
+
+def test_same_seed_generates_same_rows():
+    generate(Plan(60, seed=5, batch_size=25), log=lambda *args: None)
+    first = snapshot()
+    Customer.objects.all().delete()
+    Category.objects.all().delete()
+
+    generate(Plan(60, seed=5, batch_size=7), log=lambda *args: None)
+
+    assert snapshot() == first
+
+
+def test_fill_scale_rejects_generated_seed():
+    generate(Plan(20, seed=4), log=lambda *args: None)
+    customers = Customer.objects.count()
+
+    with pytest.raises(CommandError, match="seed 4 is already generated"):
+        call_command("fill", scale=20, seed=4, stdout=StringIO())
+    assert Customer.objects.count() == customers
+    call_command("fill", scale=20, seed=14, stdout=StringIO())
@@ -3,7 +3,7 @@ from typing import List
 from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile
 from model_bakery import baker
 from shops.models import Shop
-from products.models import Product, Size, Color, Brand, Category, BrandType, Image
+from products.models import Product, Brand, Category, BrandType, Image
 from tests.factories import (
     BrandFactory,
     BrandTypeFactory,
@@ -72,18 +72,6 @@ def category_set(db, admin_client: APIClient):
     return Category.objects.all()
 
 
-@pytest.fixture
-def size_set(db, admin_client: APIClient) -> List[Size]:
-    size_set = baker.make(Size, _quantity=5)
-    return size_set
-
-
-@pytest.fixture
-def color_set(db, admin_client: APIClient) -> List[Color]:
-    color_set = baker.make(Color, _quantity=4)
-    return color_set
-
-
 @pytest.fixture
 def brandtype_set(db, admin_client: APIClient) -> BrandType:
     brand_type = BrandTypeFactory.create(name="testBrandType")
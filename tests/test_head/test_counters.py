@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from applications.models import Application
+from django.core.cache import cache
+
+from head import counters as counters_module
+from head.counters import (
+    counters_lock,
+    discard_pending,
+    flush_counters,
+    get_pending_key,
+    get_pending,
+    get_platform_stats,
+    increment,
+    reconcile_counters,
+)
+from head.models import PlatformCounter
+from orders.tasks import complete_delivered_orders
+from products.models import ProductVariant
+from tests.conftest import make_image
+from users.models import Customer
+
+# counters are incremented when transactions commit
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_counters_follow_transitions(make_order, make_variant, user):
+    paid = make_order(status="paid")
+    make_order(quantity=2, status="delivered")
+    make_order()
+    paid.status = "canceled"
+    paid.save()
+    variant = make_variant(stock=6)
+    ProductVariant.objects.filter(pk=variant.pk).reserve_stock(2)
+    application = Application.objects.create(user=user, document=make_image())
+
+    stats = get_platform_stats()
+    assert stats["gmv"] == Decimal("200")
+    assert stats["orders"]["paid"] == 0
+    assert stats["orders"]["canceled"] == 1
+    assert stats["orders"]["pending"] == 1
+    assert stats["orders"]["delivered"] == 1
+    # user fixture and shop owner
+    assert stats["new_users"] == {"1d": 2, "7d": 2, "30d": 2}
+    assert stats["pending_applications"] == 1
+    assert stats["low_stock_variants"] == 1
+
+    application.status = "approved"
+    application.save()
+    complete_delivered_orders(days=-1)
+    stats = get_platform_stats()
+    assert stats["pending_applications"] == 0
+    assert (stats["orders"]["delivered"], stats["orders"]["completed"]) == (0, 1)
+
+
+def test_increments_are_applied_after_commit(make_order):
+    with transaction.atomic():
+        make_order(status="paid")
+        assert get_platform_stats()["gmv"] == 0
+    assert get_platform_stats()["gmv"] == Decimal("100")
+    # deltas wait in cache until they are flushed
+    assert not PlatformCounter.objects.filter(name="gmv").exists()
+
+    flush_counters()
+    assert PlatformCounter.objects.get(name="gmv").value == Decimal("100")
+    assert get_pending(["gmv", "orders.paid"]) == {}
+    assert get_platform_stats()["gmv"] == Decimal("100")
+
+
+def test_reconcile_counters(make_order, make_variant):
+    make_order(status="paid")
+    make_variant(stock=1)
+    flush_counters()
+    counters = dict(PlatformCounter.objects.values_list("name", "value"))
+    PlatformCounter.objects.update(value=100)
+    increment({"gmv": 5})
+
+    reconcile_counters()
+    assert get_platform_stats()["gmv"] == Decimal("100")
+    assert dict(PlatformCounter.objects.values_list("name", "value")) == {
+        **counters,
+        **{
+            name: 0
+            for name in PlatformCounter.objects.exclude(name__in=counters).values_list(
+                "name", flat=True
+            )
+        },
+    }
+
+
+def test_admin_stats_view(client, make_order):
+    make_order(status="paid")
+    admin = Customer.objects.create_user(
+        "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+    )
+    assert client.get("/api/admin/stats/").status_code == 401
+
+    client.force_authenticate(admin)
+    response = client.get("/api/admin/stats/")
+    assert response.status_code == 200
+    assert response.data["gmv"] == "100.00"
+    assert response.data["orders"]["paid"] == 1
+    assert response.data["new_users"]["1d"] == 3
+
+
+def test_flush_and_reconcile_share_lock(make_order, monkeypatch):
+    make_order(status="paid")
+
+    with counters_lock() as acquired:
+        assert acquired
+        assert flush_counters() == {}
+        monkeypatch.setattr(counters_module, "LOCK_WAIT", 0)
+        reconcile_counters()
+    assert not PlatformCounter.objects.exists()
+
+    # reconcile flushes pending deltas before it recalculates rows
+    reconcile_counters()
+    assert get_pending(["gmv"]) == {}
+    assert PlatformCounter.objects.get(name="gmv").value == Decimal("100")
+    assert flush_counters() == {}
+    assert get_platform_stats()["gmv"] == Decimal("100")
+
+
+def test_discard_pending_skips_missing_keys():
+    increment({"gmv": 5, "orders.paid": 1})
+    cache.delete(get_pending_key("gmv"))
+
+    discard_pending({"gmv": 500, "orders.paid": 100})
+    assert get_pending(["gmv", "orders.paid"]) == {}
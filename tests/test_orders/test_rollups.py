@@ -0,0 +1,93 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from orders.models import DailySales, Order
+from orders.rollups import rebuild_daily_sales
+
+pytestmark = pytest.mark.django_db
+
+
+def get_rollups():
+    return sorted(
+        DailySales.objects.values_list(
+            "product_variant", "date", "revenue", "units", "orders"
+        )
+    )
+
+
+def test_rollups_follow_status_transitions(make_order, make_variant):
+    variant = make_variant()
+    first = make_order(variant=variant, quantity=2, status="paid")
+    make_order(variant=variant, status="paid")
+    make_order(variant=variant)
+    first.status = "delivered"
+    first.save()
+
+    row = DailySales.objects.get()
+    assert (row.revenue, row.units, row.orders) == (Decimal("300"), 3, 2)
+
+    first.status = "canceled"
+    first.save()
+    row.refresh_from_db()
+    assert (row.revenue, row.units, row.orders) == (Decimal("100"), 1, 1)
+
+
+def test_reversal_after_repricing_removes_recorded_revenue(make_order, make_variant):
+    variant = make_variant()
+    order = make_order(variant=variant, quantity=2, status="paid")
+    variant.price = 500
+    variant.save()
+
+    order.refresh_from_db()
+    order.status = "canceled"
+    order.save()
+
+    row = DailySales.objects.get()
+    assert (row.revenue, row.units, row.orders) == (0, 0, 0)
+
+
+def test_rebuild_matches_incremental_rollups(make_order, make_variant):
+    old = make_order(status="paid")
+    Order.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=40)
+    )
+    for quantity in (1, 3):
+        make_order(variant=make_variant(), quantity=quantity, status="completed")
+    make_order(status="pending")
+    DailySales.objects.filter(date=timezone.localdate()).update(revenue=0)
+
+    assert rebuild_daily_sales(date_from=timezone.localdate() - timedelta(days=7)) == 2
+    rebuilt = get_rollups()
+    assert rebuild_daily_sales() == 3
+    assert [row for row in get_rollups() if row in rebuilt] == rebuilt
+    assert sum(row[2] for row in get_rollups()) == Decimal("500")
+
+
+def test_shop_analytics_view(client, shop, make_order, make_variant):
+    make_order(quantity=2, status="paid")
+    make_order(variant=make_variant(price="50.00"), status="delivered")
+    client.force_authenticate(shop.user)
+
+    response = client.get("/api/shop/analytics/")
+    assert response.status_code == 200
+    assert response.data["totals"] == {
+        "revenue": "250.00",
+        "units": 3,
+        "orders": 2,
+        "average_order_value": "125.00",
+    }
+    assert [row["date"] for row in response.data["results"]] == [
+        str(timezone.localdate())
+    ]
+
+    response = client.get("/api/shop/analytics/", {"group_by": "product"})
+    assert response.data["results"][0]["name"] == "product"
+    assert response.data["results"][0]["orders"] == 2
+
+    response = client.get(
+        "/api/shop/analytics/", {"date_from": "2020-01-01", "date_to": "2022-01-01"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from orders.models import Order
+from orders.tasks import complete_delivered_orders
+
+pytestmark = pytest.mark.django_db
+
+
+def test_complete_delivered_orders(make_order):
+    old = [make_order(status="delivered") for _ in range(3)]
+    recent = make_order(status="delivered")
+    pending = make_order()
+    Order.objects.filter(pk__in=[order.pk for order in old]).update(
+        delivered_at=timezone.now() - timedelta(days=4)
+    )
+
+    assert complete_delivered_orders(days=3, chunk_size=2) == 3
+    statuses = dict(Order.objects.values_list("pk", "status"))
+    assert all(statuses[order.pk] == "completed" for order in old)
+    assert statuses[recent.pk] == "delivered"
+    assert statuses[pending.pk] == "pending"
+
+    assert complete_delivered_orders(days=3) == 0
+
+
+def test_delivered_at_is_kept_on_save(make_order):
+    order = make_order(status="delivered")
+    delivered_at = order.delivered_at
+    order.quantity = 2
+    order.save()
+    order.refresh_from_db()
+    assert order.delivered_at == delivered_at
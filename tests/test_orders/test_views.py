@@ -0,0 +1,57 @@
+import pytest
+
+from attributes.models import Attribute, AttributeValue
+from products.models import Image
+from tests.conftest import make_image
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def fill(make_order, make_variant):
+    attribute = Attribute.objects.create(name="color")
+
+    def fill(count):
+        for i in range(count):
+            variant = make_variant()
+            AttributeValue.objects.create(
+                product_variant=variant, attribute=attribute, value=str(i)
+            )
+            Image.objects.create(product_variant=variant, image=make_image())
+            make_order(variant=variant)
+
+    return fill
+
+
+@pytest.mark.parametrize("expand", [False, True])
+def test_list_query_count_is_constant(
+    client, user, fill, expand, django_assert_num_queries
+):
+    client.force_authenticate(user)
+    params = {"expand": "true"} if expand else {}
+    queries = 4 if expand else 2
+
+    fill(1)
+    with django_assert_num_queries(queries):
+        response = client.get("/api/orders/", params)
+    assert response.data["count"] == 1
+
+    fill(5)
+    with django_assert_num_queries(queries):
+        response = client.get("/api/orders/", params)
+    assert response.data["count"] == 6
+
+
+def test_list_is_compact(client, user, make_order):
+    order = make_order()
+    client.force_authenticate(user)
+
+    compact = client.get("/api/orders/").data["results"][0]
+    assert compact["product"] == order.product_variant.product_id
+    assert compact["product_name"] == "product"
+    assert compact["product_variant"] == order.product_variant_id
+    assert compact["shop"]["name"] == "shop"
+
+    expanded = client.get("/api/orders/", {"expand": "true"}).data["results"][0]
+    assert expanded["product_variant"]["id"] == order.product_variant_id
+    assert expanded["product"]["name"] == "product"
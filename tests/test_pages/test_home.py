@@ -0,0 +1,48 @@
+import pytest
+
+from common.cache import invalidate_instance
+from pages import tasks
+from posts.models import Post
+from products.models import Brand
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.refresh_home, "delay", lambda: calls.append(1))
+    return calls
+
+
+def test_home_is_served_from_cache(client, product, brand, django_assert_num_queries):
+    product.featured = True
+    product.save()
+    brand.featured = True
+    brand.save()
+    Post.objects.create(title="post", content={})
+
+    response = client.get("/api/home/")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["products"]] == [product.pk]
+    assert [item["name"] for item in response.data["brands"]] == ["brand"]
+    assert [item["title"] for item in response.data["posts"]] == ["post"]
+    assert response.data["settings"] is None
+
+    with django_assert_num_queries(0):
+        assert client.get("/api/home/").data == response.data
+
+
+def test_stale_home_is_rebuilt_in_background(client, brand, refreshes):
+    client.get("/api/home/")
+    Brand.objects.filter(pk=brand.pk).update(featured=True)
+    invalidate_instance(brand)
+
+    assert client.get("/api/home/").data["brands"] == []
+    assert client.get("/api/home/").data["brands"] == []
+    assert len(refreshes) == 1
+
+    tasks.refresh_home()
+    assert [item["name"] for item in client.get("/api/home/").data["brands"]] == [
+        "brand"
+    ]
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from payments.models import Payment, ShopBalance, ShopLedgerEntry, TransferMoney
+from tests.conftest import make_image
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def payment():
+    return Payment.objects.create(
+        payment_type="visa",
+        confirm_photo=make_image(),
+        phone_number="01020304",
+        bank_account="0102",
+    )
+
+
+def get_balance(shop):
+    return ShopBalance.objects.get(shop=shop).balance
+
+
+def test_paid_order_credits_shop_once(shop, make_order, payment):
+    order = make_order(quantity=2)
+    order.payment = payment
+    order.save()
+    assert not ShopLedgerEntry.objects.exists()
+
+    payment.is_verified = True
+    payment.save()
+    order.refresh_from_db()
+    order.status = "delivered"
+    order.save()
+
+    entry = ShopLedgerEntry.objects.get()
+    assert (entry.kind, entry.amount, entry.order) == ("order", Decimal("180"), order)
+    assert get_balance(shop) == Decimal("180")
+    transfer = TransferMoney.objects.get()
+    assert (transfer.amount, transfer.tax) == (Decimal("200"), Decimal("20"))
+
+
+def test_refund_and_payout(shop, make_order, payment):
+    paid = make_order(status="paid")
+    declined = make_order(status="paid")
+    declined.status = "shop_decline"
+    declined.save()
+    transfer = TransferMoney.objects.create(
+        payment=payment, shop=shop, amount=Decimal("100"), tax=Decimal("10")
+    )
+    transfer.confirm_photo = make_image()
+    transfer.save()
+    transfer.save()
+
+    entries = list(ShopLedgerEntry.objects.order_by("id"))
+    assert [(entry.kind, entry.amount, entry.balance) for entry in entries] == [
+        ("order", Decimal("90"), Decimal("90")),
+        ("order", Decimal("90"), Decimal("180")),
+        ("refund", Decimal("-90"), Decimal("90")),
+        ("payout", Decimal("-90"), Decimal("0")),
+    ]
+    assert entries[0].order == paid
+    assert get_balance(shop) == 0
+
+    ShopBalance.objects.update(balance=Decimal("1000"))
+    call_command("rebuild_shop_balances")
+    assert get_balance(shop) == 0
+
+
+def test_balance_and_statement_views(client, shop, make_order):
+    for _ in range(3):
+        make_order(status="paid")
+    client.force_authenticate(shop.user)
+
+    response = client.get("/api/shop/balance/")
+    assert response.status_code == 200
+    assert Decimal(response.data["balance"]) == Decimal("270")
+
+    response = client.get("/api/shop/statement/", {"page_size": 2})
+    assert response.status_code == 200
+    assert [Decimal(entry["balance"]) for entry in response.data["results"]] == [
+        Decimal("270"),
+        Decimal("180"),
+    ]
+    response = client.get(response.data["next"])
+    assert [Decimal(entry["balance"]) for entry in response.data["results"]] == [
+        Decimal("90")
+    ]
+
+    response = client.get("/api/shop/statement/", {"date_to": "2000-01-01"})
+    assert response.data["results"] == []
+
+
+def test_refund_reverses_credited_amount_after_repricing(shop, make_order):
+    order = make_order(status="paid")
+    variant = order.product_variant
+    variant.price = 500
+    variant.save()
+
+    order.refresh_from_db()
+    order.status = "canceled"
+    order.save()
+
+    assert order.total_price == Decimal("100")
+    refund = ShopLedgerEntry.objects.get(kind="refund")
+    assert refund.amount == Decimal("-90")
+    assert get_balance(shop) == 0
+
+
+def test_statement_date_range_includes_whole_days(client, shop, make_order):
+    make_order(status="paid")
+    client.force_authenticate(shop.user)
+    today = timezone.localdate().isoformat()
+
+    response = client.get(
+        "/api/shop/statement/", {"date_from": today, "date_to": today}
+    )
+    assert len(response.data["results"]) == 1
@@ -0,0 +1,62 @@
+import pytest
+
+from attributes.models import Attribute, AttributeValue
+from products.models import Brand, Category, Product
+from tests.conftest import make_image
+
+pytestmark = pytest.mark.django_db
+
+
+class TestProductFacets:
+    endpoint = "/api/shops/products/"
+
+    @pytest.fixture
+    def catalog(self, category, brand, shop, make_variant):
+        child = Category.objects.create(
+            name="child", image=make_image(), description="child", parent=category
+        )
+        other_brand = Brand.objects.create(name="other", image=make_image())
+        color = Attribute.objects.create(name="color")
+        for name, target_category, target_brand, price, value in [
+            ("first", category, brand, "100.00", "red"),
+            ("second", child, brand, "200.00", "red"),
+            ("third", child, other_brand, "1000.00", "blue"),
+        ]:
+            product = Product.objects.create(
+                name=name, category=target_category, brand=target_brand, shop=shop
+            )
+            variant = make_variant(price=price, target=product)
+            AttributeValue.objects.create(
+                product_variant=variant, attribute=color, value=value
+            )
+        return child
+
+    def test_facets_are_opt_in(self, client, catalog):
+        response = client.get(self.endpoint)
+        assert "facets" not in response.data
+
+    def test_facets(self, client, catalog, category, brand):
+        response = client.get(self.endpoint, {"facets": "true"})
+
+        facets = response.data["facets"]
+        assert [(item["name"], item["count"]) for item in facets["brands"]] == [
+            ("brand", 3),
+            ("other", 1),
+        ]
+        assert {item["name"]: item["count"] for item in facets["categories"]} == {
+            "category": 4,
+            "child": 2,
+        }
+        assert [bucket["count"] for bucket in facets["prices"]] == [1, 1, 1]
+        assert facets["prices"][0]["min"] == 90
+        assert facets["prices"][-1]["max"] == 1000
+        assert [(item["value"], item["count"]) for item in facets["attributes"]] == [
+            ("blue", 1),
+            ("red", 2),
+        ]
+
+    def test_facets_follow_filters(self, client, catalog):
+        response = client.get(self.endpoint, {"facets": "1", "brand": "other,none"})
+
+        assert response.data["count"] == 1
+        assert [item["name"] for item in response.data["facets"]["brands"]] == ["other"]
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import call_command
+
+from attributes.models import Attribute, AttributeValue
+from products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+endpoint = "/api/shops/products/"
+
+
+@pytest.fixture
+def catalog(category, brand, shop, make_variant):
+    color = Attribute.objects.create(name="Color")
+    size = Attribute.objects.create(name="size")
+    products = {}
+    for name, variants in [
+        ("shirt", [("Red", "XL"), ("blue", "M")]),
+        ("dress", [(" red ", "m")]),
+        ("coat", [("Black", "XL")]),
+    ]:
+        product = Product.objects.create(
+            name=name, category=category, brand=brand, shop=shop
+        )
+        for color_value, size_value in variants:
+            variant = make_variant(target=product)
+            for attribute, value in [(color, color_value), (size, size_value)]:
+                AttributeValue.objects.create(
+                    product_variant=variant, attribute=attribute, value=value
+                )
+        products[name] = product.pk
+    return products
+
+
+def get_names(client, attributes):
+    response = client.get(endpoint, {"attributes": attributes})
+    assert response.status_code == 200
+    return sorted(item["name"] for item in response.data["results"])
+
+
+def test_attribute_filters(client, catalog, django_assert_max_num_queries):
+    assert get_names(client, "color:red") == ["dress", "shirt"]
+    assert get_names(client, "color:RED,color:black") == ["coat", "dress", "shirt"]
+    assert get_names(client, "color:red,size:xl") == ["shirt"]
+    assert get_names(client, "color:red,color:black,size:xl") == ["coat", "shirt"]
+    assert get_names(client, "color:green") == []
+    assert get_names(client, "weight:1") == []
+    assert get_names(client, "malformed") == ["coat", "dress", "product", "shirt"]
+
+    # attributes are read with one query, matching values are a subquery
+    with django_assert_max_num_queries(3):
+        client.get(endpoint, {"attributes": "color:red,size:xl,size:m"})
+
+
+def test_rebuild_attribute_index(client, catalog):
+    AttributeValue.objects.update(normalized_value="", product=None)
+    call_command("rebuild_attribute_index", chunk_size=2)
+    assert get_names(client, "color:red,size:m") == ["dress", "shirt"]
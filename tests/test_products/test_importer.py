@@ -0,0 +1,103 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from attributes.models import Attribute, AttributeValue
+from products.importer import ProductImporter
+from products.models import Product, ProductImport, ProductVariant
+from products.tasks import import_products
+
+pytestmark = pytest.mark.django_db
+
+CSV = """product,name,category,brand,unit,price,discount,stock,attribute.color
+tee,T-shirt,category,brand,pcs,100.00,10,5,red
+tee,T-shirt,category,brand,pcs,120.00,,0,blue
+cup,Cup,category,brand,pcs,50.00,,3,
+bad,Bad,missing,brand,pcs,abc,,1,
+"""
+
+
+@pytest.fixture
+def color():
+    return Attribute.objects.create(name="color")
+
+
+def test_import_csv(shop, category, brand, color):
+    importer = ProductImporter(shop, batch_size=2)
+    stats = importer.run(io.BytesIO(CSV.encode()), "csv")
+
+    assert stats["processed_rows"] == 4
+    assert stats["products_created"] == 2
+    assert stats["variants_created"] == 3
+    assert stats["error_count"] == 1
+    assert stats["errors"][0]["row"] == 4
+    assert set(stats["errors"][0]["errors"]) == {"price"}
+
+    tee = Product.objects.get(name="T-shirt")
+    assert tee.slug == "shop-t-shirt"
+    assert tee.variants.count() == 2
+    assert tee.price == Decimal("100.00")
+    assert tee.overall_price == Decimal("81.00")
+    assert tee.max_price == Decimal("108.00")
+    variant = tee.variants.get(price=Decimal("120.00"))
+    assert variant.status == "unavailable"
+    assert variant.tax_price == Decimal("12.00")
+    assert set(AttributeValue.objects.values_list("value", flat=True)) == {
+        "red",
+        "blue",
+    }
+
+
+def test_import_jsonl_reports_reference_errors(shop, category, brand, color):
+    rows = [
+        {
+            "name": "Cup",
+            "category": str(category.pk),
+            "brand": "brand",
+            "unit": "pcs",
+            "price": "10",
+            "stock": 1,
+        },
+        {
+            "name": "Pan",
+            "category": "category",
+            "brand": "missing",
+            "unit": "pcs",
+            "price": "10",
+            "stock": 1,
+            "attributes": {"size": "xl"},
+        },
+    ]
+    data = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+    stats = ProductImporter(shop).run(io.BytesIO(data.encode()), "jsonl")
+
+    assert stats["variants_created"] == 1
+    assert [error["row"] for error in stats["errors"]] == [2, 3]
+    assert set(stats["errors"][0]["errors"]) == {"brand", "attributes"}
+
+
+def test_import_endpoint(
+    client,
+    shop,
+    category,
+    brand,
+    color,
+    django_capture_on_commit_callbacks,
+    monkeypatch,
+):
+    monkeypatch.setattr(import_products, "delay", import_products)
+    client.force_authenticate(shop.user)
+    upload = SimpleUploadedFile("products.csv", CSV.encode(), "text/csv")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post("/api/products/imports/", {"file": upload})
+    assert response.status_code == 202
+    assert response.data["format"] == "csv"
+
+    response = client.get(f"/api/products/imports/{response.data['id']}/")
+    assert response.data["status"] == "done"
+    assert response.data["variants_created"] == 3
+    assert ProductImport.objects.get().error_count == 1
+    assert ProductVariant.objects.count() == 3
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pytest
+
+from products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+class TestProductListingPrice:
+    def test_first_variant_is_listed(self, product, make_variant):
+        variant = make_variant(price="100.00", discount=10)
+        make_variant(price="300.00")
+        product.refresh_from_db()
+
+        assert product.price == Decimal("100.00")
+        assert product.discount == 10
+        assert product.discount_price == Decimal("90.00")
+        assert product.overall_price == variant.overall_price
+        assert product.thumbnail.name == variant.thumbnail.name
+        assert product.min_price == Decimal("81.00")
+        assert product.max_price == Decimal("270.00")
+
+    def test_delete_variant_refreshes_product(self, product, make_variant):
+        first = make_variant(price="100.00")
+        make_variant(price="200.00")
+        first.delete()
+        product.refresh_from_db()
+
+        assert product.price == Decimal("200.00")
+        assert product.min_price == product.max_price == Decimal("180.00")
+
+    def test_product_without_variants(self, product, make_variant):
+        make_variant().delete()
+        product.refresh_from_db()
+
+        assert product.price is None
+        assert product.overall_price is None
+        assert not product.thumbnail
+
+    def test_bulk_refresh(self, product, make_variant):
+        make_variant(price="100.00")
+        Product.objects.filter(pk=product.pk).update(price=None, min_price=None)
+        Product.objects.all().refresh_listing_prices()
+        product.refresh_from_db()
+
+        assert product.price == Decimal("100.00")
+        assert product.min_price == Decimal("90.00")
+
+
+class TestProductListOrdering:
+    def test_order_by_overall_price(
+        self, client, product, category, brand, shop, make_variant
+    ):
+        cheap = Product.objects.create(
+            name="cheap", category=category, brand=brand, shop=shop, unit="pcs"
+        )
+        make_variant(price="500.00")
+        make_variant(price="10.00", target=cheap)
+
+        response = client.get("/api/shops/products/", {"ordering": "overall_price"})
+
+        assert response.status_code == 200
+        names = [item["name"] for item in response.data["results"]]
+        assert names == ["cheap", "product"]
+        assert response.data["results"][0]["thumbnail"].startswith("http")
@@ -0,0 +1,73 @@
+import pytest
+
+from orders.models import Order
+from products.models import Product, ProductRecommendation
+from products.recommendations import build_recommendations
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def make_product(product):
+    def make(name):
+        return Product.objects.create(
+            name=name,
+            description="description",
+            category=product.category,
+            brand=product.brand,
+            shop=product.shop,
+            unit="pcs",
+        )
+
+    return make
+
+
+def buy(customer, products, make_order, make_variant, status="completed"):
+    for product in products:
+        order = make_order(variant=make_variant(target=product), status=status)
+        Order.objects.filter(pk=order.pk).update(user=customer)
+
+
+def test_build_recommendations(product, make_product, make_order, make_variant):
+    phone, case, charger, cable = (
+        make_product(name) for name in ("phone", "case", "charger", "cable")
+    )
+    customers = [
+        Customer.objects.create_user(f"customer{index}@gmail.com", "jfmfn123")
+        for index in range(3)
+    ]
+    buy(customers[0], [phone, case, charger], make_order, make_variant)
+    buy(customers[1], [phone, case], make_order, make_variant)
+    buy(customers[2], [phone, cable], make_order, make_variant, status="paid")
+
+    assert build_recommendations(top_k=1) == 3
+    neighbours = dict(
+        ProductRecommendation.objects.values_list("product", "neighbours")
+    )
+    assert neighbours[phone.pk] == [[case.pk, 1.0]]
+    assert neighbours[charger.pk] == [[phone.pk, 0.7071]]
+    assert cable.pk not in neighbours
+
+
+def test_recommendations_action(
+    client, product, make_product, make_order, make_variant, django_assert_num_queries
+):
+    other = make_product("other")
+    buy(
+        Customer.objects.get(email="marlen@gmail.com"),
+        [product, other],
+        make_order,
+        make_variant,
+    )
+
+    response = client.get(f"/api/shops/products/{product.pk}/recommendations/")
+    assert response.status_code == 200
+    assert response.data == []
+
+    build_recommendations()
+    response = client.get(f"/api/shops/products/{product.pk}/recommendations/")
+    assert [item["id"] for item in response.data] == [other.pk]
+    with django_assert_num_queries(0):
+        client.get(f"/api/shops/products/{product.pk}/recommendations/")
+    assert client.get("/api/shops/products/0/recommendations/").status_code == 404
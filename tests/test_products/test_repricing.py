@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+
+from products.models import Category, Product, ProductVariant
+from products.repricing import reprice_variants
+from products.tasks import reprice_variants as reprice_variants_task
+from tests.conftest import make_image
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reprice_variants_in_chunks(product, make_variant):
+    variants = [make_variant(price="100.00", discount=10) for _ in range(3)]
+    ProductVariant.objects.update(overall_price=0, tax_price=0)
+
+    assert reprice_variants(ProductVariant.objects.all(), chunk_size=2) == 3
+    for variant in variants:
+        variant.refresh_from_db()
+        assert variant.discount_price == Decimal("90.00")
+        assert variant.tax_price == Decimal("9.00")
+        assert variant.overall_price == Decimal("81.00")
+    product.refresh_from_db()
+    assert product.overall_price == Decimal("81.00")
+
+
+def test_category_tax_change_reprices_variants(
+    category, make_variant, monkeypatch, django_capture_on_commit_callbacks
+):
+    monkeypatch.setattr(reprice_variants_task, "delay", reprice_variants_task)
+    variant = make_variant(price="100.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        category.tax = Decimal("20.00")
+        category.save()
+    variant.refresh_from_db()
+    assert variant.tax_price == Decimal("20.00")
+    assert variant.overall_price == Decimal("80.00")
+
+
+def test_apply_discount_to_category_subtree(
+    client, category, product, make_variant, monkeypatch
+):
+    monkeypatch.setattr(reprice_variants_task, "delay", reprice_variants_task)
+    child = Category.objects.create(
+        name="child", image=make_image(), description="child", parent=category
+    )
+    other = Category.objects.create(name="other", image=make_image(), description="")
+    product.category = child
+    product.save()
+    variant = make_variant(price="100.00")
+    untouched = make_variant(
+        price="100.00",
+        target=Product.objects.create(
+            name="other",
+            description="",
+            category=other,
+            brand=product.brand,
+            shop=product.shop,
+            unit="pcs",
+        ),
+    )
+    client.force_authenticate(
+        Customer.objects.create_user(
+            "admin@gmail.com", "jfmfn123", is_staff=True, is_superuser=True
+        )
+    )
+
+    response = client.post(
+        f"/api/admin/categories/{category.pk}/apply_discount/", {"discount": 50}
+    )
+    assert response.status_code == 202
+    variant.refresh_from_db()
+    assert variant.discount == 50
+    assert variant.discount_price == Decimal("50.00")
+    assert variant.overall_price == Decimal("50.00")
+    untouched.refresh_from_db()
+    assert untouched.discount == 0
+    assert untouched.discount_price == Decimal("100.00")
@@ -0,0 +1,59 @@
+import pytest
+
+from products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+class TestProductSearch:
+    endpoint = "/api/shops/products/"
+
+    @pytest.fixture
+    def products(self, category, brand, shop):
+        return [
+            Product.objects.create(
+                name=name,
+                description=description,
+                category=category,
+                brand=brand,
+                shop=shop,
+            )
+            for name, description in [
+                ("Red shirt", "cotton"),
+                ("Blue jeans", "denim, goes well with a red shirt"),
+                ("Green hat", "wool"),
+            ]
+        ]
+
+    def search(self, client, query, **params):
+        response = client.get(self.endpoint, {"search": query, **params})
+        assert response.status_code == 200
+        return [item["name"] for item in response.data["results"]]
+
+    def test_ranked_by_relevance(self, client, products):
+        assert self.search(client, "red shirt") == ["Red shirt", "Blue jeans"]
+
+    def test_prefix_match(self, client, products):
+        assert self.search(client, "gre") == ["Green hat"]
+
+    def test_brand_and_category_names(self, client, products, brand):
+        assert len(self.search(client, brand.name)) == 3
+
+    def test_explicit_ordering_wins(self, client, products):
+        assert self.search(client, "red shirt", ordering="name") == [
+            "Blue jeans",
+            "Red shirt",
+        ]
+
+    def test_index_follows_changes(self, client, products, brand):
+        products[2].name = "Yellow hat"
+        products[2].save()
+        brand.name = "Acme"
+        brand.save()
+
+        assert self.search(client, "green") == []
+        assert self.search(client, "yellow") == ["Yellow hat"]
+        assert len(self.search(client, "acme")) == 3
+
+        products[0].delete()
+        assert self.search(client, "red") == ["Blue jeans"]
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+from django.db import OperationalError, connection
+
+from orders.models import Order
+from products.models import ProductVariant
+from users.models import Address
+
+
+@pytest.mark.django_db
+class TestReserveStock:
+    def test_reserve(self, make_variant):
+        variant = make_variant(stock=5)
+        variants = ProductVariant.objects.filter(pk=variant.pk)
+
+        assert variants.reserve_stock(3)
+        assert not variants.reserve_stock(3)
+        assert variants.reserve_stock(2)
+        variant.refresh_from_db()
+        assert variant.stock == 0
+        assert variant.status == "unavailable"
+
+    def test_buy_out_of_stock(self, client, user, product, make_variant):
+        variant = make_variant(stock=2)
+        address = Address.objects.create(
+            user=user, city="city", country="country", street="street", phone="1"
+        )
+        client.force_authenticate(user)
+        endpoint = f"/api/shops/products/{product.pk}/buy/"
+        data = {"product_variant": variant.pk, "address": address.pk}
+
+        response = client.post(endpoint, {**data, "quantity": 2}, format="json")
+        assert response.status_code == 201
+        response = client.post(endpoint, {**data, "quantity": 1}, format="json")
+        assert response.status_code == 400
+        assert Order.objects.count() == 1
+        variant.refresh_from_db()
+        assert variant.stock == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_reservations_dont_oversell(make_variant):
+    stock, workers, attempts = 30, 8, 10
+    variant = make_variant(stock=stock)
+    reserved = []
+
+    def buy():
+        try:
+            for _ in range(attempts):
+                while True:
+                    try:
+                        result = ProductVariant.objects.filter(
+                            pk=variant.pk
+                        ).reserve_stock(1)
+                        break
+                    except OperationalError:
+                        # sqlite doesn't allow concurrent writers, retry
+                        continue
+                reserved.append(result)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=buy) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    variant.refresh_from_db()
+    assert reserved.count(True) == stock
+    assert reserved.count(False) == workers * attempts - stock
+    assert variant.stock == 0
+    assert variant.status == "unavailable"
@@ -0,0 +1,65 @@
+import pytest
+
+from products.models import Category, Product
+from tests.conftest import make_image
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def tree(category, brand, shop):
+    child = Category.objects.create(
+        name="child", image=make_image(), description="child", parent=category
+    )
+    grandchild = Category.objects.create(
+        name="grandchild", image=make_image(), description="grandchild", parent=child
+    )
+    other = Category.objects.create(name="other", image=make_image(), description="")
+    for name, target in [
+        ("root product", category),
+        ("child product", child),
+        ("grandchild product", grandchild),
+        ("other product", other),
+    ]:
+        Product.objects.create(name=name, category=target, brand=brand, shop=shop)
+    return child, grandchild
+
+
+def test_category_tree(client, tree, django_assert_num_queries):
+    response = client.get("/api/shops/categories/tree/")
+    assert response.status_code == 200
+    root, other = response.data
+    assert (root["name"], root["product_count"]) == ("category", 3)
+    assert (other["name"], other["product_count"]) == ("other", 1)
+    child = root["children"][0]
+    assert (child["name"], child["product_count"]) == ("child", 2)
+    assert child["children"][0]["children"] == []
+
+    with django_assert_num_queries(0):
+        assert client.get("/api/shops/categories/tree/").data == response.data
+
+
+def test_category_tree_is_invalidated_on_category_write(client, tree, user):
+    client.get("/api/shops/categories/tree/")
+    user.is_staff = True
+    user.save()
+    client.force_authenticate(user)
+    response = client.patch(
+        f"/api/admin/categories/{tree[1].pk}/", {"name": "renamed"}, format="json"
+    )
+    assert response.status_code == 200
+
+    client.force_authenticate(None)
+    root = client.get("/api/shops/categories/tree/").data[0]
+    assert root["children"][0]["children"][0]["name"] == "renamed"
+
+
+def test_filter_products_by_category_subtree(client, tree, category):
+    child, _ = tree
+    for value, expected in [
+        (str(category.pk), {"root product", "child product", "grandchild product"}),
+        (child.slug, {"child product", "grandchild product"}),
+        ("missing", set()),
+    ]:
+        response = client.get("/api/shops/products/", {"category": value})
+        assert {item["name"] for item in response.data["results"]} == expected
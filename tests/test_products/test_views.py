@@ -0,0 +1,54 @@
+import pytest
+from django.core.cache import cache
+
+from attributes.models import Attribute, AttributeValue
+from products.models import Image
+from reviews.models import Review
+from tests.conftest import make_image
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+class TestProductRetrieve:
+    @pytest.fixture
+    def fill(self, product, shop, make_variant):
+        attributes = [Attribute.objects.create(name=name) for name in ["color", "size"]]
+
+        def fill(count):
+            for i in range(count):
+                variant = make_variant()
+                for attribute in attributes:
+                    AttributeValue.objects.create(
+                        product_variant=variant, attribute=attribute, value=str(i)
+                    )
+                for _ in range(2):
+                    Image.objects.create(product_variant=variant, image=make_image())
+                Review.objects.create(
+                    user=Customer.objects.create_user(f"{count}-{i}@gmail.com", "pass"),
+                    product_variant=variant,
+                    product=product,
+                    shop=shop,
+                    rating=5,
+                    comment="comment",
+                )
+
+        return fill
+
+    def test_constant_query_count(
+        self, client, product, fill, django_assert_num_queries
+    ):
+        endpoint = f"/api/shops/products/{product.pk}/"
+        fill(1)
+        with django_assert_num_queries(5):
+            response = client.get(endpoint)
+        assert len(response.data["variants"]) == 1
+
+        fill(5)
+        cache.clear()
+        with django_assert_num_queries(5):
+            response = client.get(endpoint)
+        assert len(response.data["variants"]) == 6
+        assert len(response.data["reviews"]) == 6
+        assert len(response.data["variants"][0]["images"]) == 2
+        assert response.data["reviews"][0]["product_variant"] == product.name
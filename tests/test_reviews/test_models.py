@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from products.models import Product
+from reviews.models import Review
+from shops.models import Shop
+from users.models import Customer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def make_review(product, shop, make_variant):
+    variant = make_variant()
+
+    def make(rating):
+        user = Customer.objects.create_user(f"{Review.objects.count()}@gmail.com", "p")
+        return Review.objects.create(
+            user=user,
+            product_variant=variant,
+            product=product,
+            shop=shop,
+            rating=rating,
+            comment="comment",
+        )
+
+    return make
+
+
+def get_counters(instance):
+    instance.refresh_from_db()
+    return instance.rating, instance.rating_sum, instance.rating_count
+
+
+def test_review_write_updates_counters(product, shop, make_review):
+    first = make_review(5)
+    make_review(4)
+    assert get_counters(product) == (Decimal("4.5"), 9, 2)
+    assert get_counters(shop) == (Decimal("4.5"), 9, 2)
+
+    first.rating = 1
+    first.save()
+    assert get_counters(product) == (Decimal("2.5"), 5, 2)
+
+    first.delete()
+    assert get_counters(product) == (Decimal("4.0"), 4, 1)
+    assert get_counters(shop) == (Decimal("4.0"), 4, 1)
+
+    Review.objects.get().delete()
+    assert get_counters(product) == (Decimal("0.0"), 0, 0)
+
+
+def test_rebuild_ratings(product, shop, make_review):
+    for rating in [5, 4, 4]:
+        make_review(rating)
+    Product.objects.update(rating=0, rating_sum=0, rating_count=0)
+    Shop.objects.update(rating=0, rating_sum=0, rating_count=0)
+
+    call_command("rebuild_ratings", chunk_size=1)
+    assert get_counters(product) == (Decimal("4.3"), 13, 3)
+    assert get_counters(shop) == (Decimal("4.3"), 13, 3)
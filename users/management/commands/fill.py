@@ -3,10 +3,11 @@ import os
 import random
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from faker import Faker
 
 from attributes.models import Attribute, AttributeValue
+from common.synthetic import Plan, generate, is_generated
 from orders.models import Order
 from products.models import Brand, BrandType, Category, Image, Product, ProductVariant
 from reviews.models import Review
@@ -32,6 +33,33 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete all data in database",
         )
+        parser.add_argument(
+            "--scale",
+            type=int,
+            default=None,
+            help="Generate benchmark data for this number of customers with "
+            "bulk inserts instead of the small dummy dataset",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of generated data, runs with the same seed and scale "
+            "generate the same rows",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted per query",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes generating chunks of a stage, "
+            "ignored on sqlite",
+        )
 
     def handle(self, *args, **options):
         if options["delete"]:
@@ -48,6 +76,8 @@ class Command(BaseCommand):
             Image.objects.all().delete()
             Review.objects.all().delete()
             self.stdout.write("All data deleted")
+        elif options["scale"] is not None:
+            self.fill_scale(options)
         else:
             self.stdout.write("Filling database with dummy data")
             self.stdout.write("Filling customer")
@@ -75,6 +105,28 @@ class Command(BaseCommand):
             # fill_review()
             self.stdout.write("Database filled with dummy data")
 
+    def fill_scale(self, options):
+        plan = Plan(options["scale"], options["seed"], options["batch_size"])
+        if is_generated(plan):
+            raise CommandError(
+                f"Data of seed {options['seed']} is already generated, "
+                "use another --seed or remove data with fill --delete"
+            )
+        self.stdout.write(
+            f"Generating data for {options['scale']} customers "
+            f"with seed {options['seed']}"
+        )
+        totals = generate(plan, options["workers"], log=self.log_stage)
+        self.stdout.write(f"Generated {sum(totals.values())} rows")
+
+    def log_stage(self, stage, rows, seconds):
+        total = sum(rows.values())
+        line = f"{stage}: {total} rows in {seconds:.2f}s"
+        line += f" ({total / max(seconds, 1e-6):.0f} rows/s)"
+        if len(rows) > 1:
+            line += " - " + ", ".join(f"{count} {name}" for name, count in rows.items())
+        self.stdout.write(line)
+
 
 def fill_basic_data():
     # create superuser
@@ -3,8 +3,10 @@ from typing import List
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from core.helpers import PathAndRename
+from core.principals import invalidate_principal
 from users.managers import CustomManager
 
 
@@ -29,6 +31,21 @@ class Customer(AbstractUser):
     def __str__(self) -> str:
         return self.email
 
+    def save(self, *args, **kwargs):
+        from head.counters import get_new_users_counter, increment
+
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        invalidate_principal(self.pk)
+        if adding:
+            increment({get_new_users_counter(timezone.localdate(self.date_joined)): 1})
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_principal(user_id)
+        return result
+
 
 class Seller(models.Model):
     """
@@ -4,6 +4,7 @@ from rest_framework import mixins, permissions
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
 from core.permissions import IsAnonymous
+from core.principals import load_user
 
 from .models import Address, Customer
 from .serializers import (
@@ -51,7 +52,8 @@ class CustomerViewSet(
         return Customer.objects.all().filter(id=self.request.user.id)
 
     def get_object(self, pk=None):
-        return self.request.user
+        # request.user is built from cached principal with deferred fields
+        return load_user(self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(password=make_password(self.request.data["password"]))
@@ -1 +1 @@
-celery -A backend worker --loglevel=info --concurrency 1 -E
+celery -A core worker -B --loglevel=info --concurrency 1 -E